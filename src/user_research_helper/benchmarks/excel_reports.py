@@ -0,0 +1,153 @@
+"""
+Time and peak memory of the transcript report (answers and quotes workbooks) built with
+in-memory workbooks formatted afterwards (the former behavior) and with the streaming writer,
+on a synthetic campaign.
+
+    python -m user_research_helper.benchmarks.excel_reports --interviews 500 --questions 60
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, PatternFill
+from user_research_helper.transcript.transcript_report_builder import create_excel_report, load_results
+
+
+def generate_results(results_dir: str, interviews: int, questions: int, seed: int = 0) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """
+    Write one structured transcript per interview with an answer of a few sentences per question
+
+    Returns:
+        Tuple[List[Tuple[str, str]], List[str]]: Questions and paths of the structured transcripts
+    """
+    rng = random.Random(seed)
+    words = ["coffee", "morning", "price", "taste", "home", "office", "usually", "prefer", "strong", "cup"]
+    question_list = [(f"Q{i}", f"Question {i} about coffee habits?") for i in range(questions)]
+    results_files = []
+    for i in range(interviews):
+        results = {}
+        for question_id, question_text in question_list:
+            found = rng.random() > 0.1
+            results[question_id] = {
+                "question": question_text,
+                "analysis": {
+                    "found": found,
+                    "answer": " ".join(rng.choice(words) for _ in range(rng.randint(20, 80))) if found else "",
+                    "confidence": rng.choice(["high", "high", "medium", "low"]),
+                    "quote": " ".join(rng.choice(words) for _ in range(rng.randint(5, 30))) if found else "",
+                },
+            }
+        path = os.path.join(results_dir, f"interview-{i:04d}_structured.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f)
+        results_files.append(path)
+    return question_list, results_files
+
+
+def create_in_memory_report(questions: List[Tuple[str, str]], results_files: List[str], output_file: str) -> None:
+    """Former builder: two full workbooks in memory, then a second pass setting an Alignment on every cell"""
+    workbooks = []
+    for title in ("Analysis Results", "Quotes"):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.title = title
+        sheet.cell(row=1, column=1, value="File Name")
+        sheet.cell(row=1, column=2, value="Segments")
+        for col, (_, question_text) in enumerate(questions, start=3):
+            sheet.cell(row=1, column=col, value=question_text)
+        workbooks.append((workbook, sheet))
+    (wb, ws), (wb_quotes, ws_quotes) = workbooks
+    orange_fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
+    red_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
+
+    for row, results_file in enumerate(results_files, start=2):
+        file_name = os.path.splitext(os.path.basename(results_file))[0]
+        ws.cell(row=row, column=1, value=file_name)
+        ws_quotes.cell(row=row, column=1, value=file_name)
+        results = load_results(results_file)
+        for col, (question_id, _) in enumerate(questions, start=3):
+            cell = ws.cell(row=row, column=col)
+            quote_cell = ws_quotes.cell(row=row, column=col)
+            if question_id in results:
+                result = results[question_id]['analysis']
+                if result['found']:
+                    cell.value = result['answer']
+                    quote_cell.value = result.get('quote', '')
+                    if result['confidence'] == 'medium':
+                        cell.fill = orange_fill
+                    elif result['confidence'] == 'low':
+                        cell.fill = red_fill
+
+    for worksheet in (ws, ws_quotes):
+        for column_cells in worksheet.columns:
+            for cell in column_cells:
+                cell.alignment = Alignment(wrap_text=True)
+            col_letter = column_cells[0].column_letter
+            worksheet.column_dimensions[col_letter].width = 30 if col_letter in ['A', 'B'] else 80
+
+    wb.save(output_file)
+    wb_quotes.save(output_file.replace('.xlsx', '_quotes.xlsx'))
+
+
+def measure(build: Callable, questions, results_files, output_file: str, memory: bool) -> dict:
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    build(questions, results_files, output_file)
+    elapsed = time.perf_counter() - start
+    stats = {"seconds": elapsed, "size_mb": (
+        os.path.getsize(output_file) + os.path.getsize(output_file.replace('.xlsx', '_quotes.xlsx'))
+    ) / 1e6}
+    if memory:
+        stats["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return stats
+
+
+def run_benchmark(interviews: int = 500, questions: int = 60, memory: bool = True) -> dict:
+    """
+    Build the same report with both builders
+
+    Args:
+        interviews: Rows of the report
+        questions: Question columns of the report
+        memory: Also measure the peak memory (tracemalloc slows both builders down)
+
+    Returns:
+        dict: Seconds, output size and peak memory (MB) per builder
+    """
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        question_list, results_files = generate_results(tmp_dir, interviews, questions)
+        builders = {
+            "in-memory workbooks": create_in_memory_report,
+            "streaming writer": create_excel_report,
+        }
+        for name, build in builders.items():
+            report[name] = measure(build, question_list, results_files, os.path.join(tmp_dir, f"{name.split()[0]}.xlsx"), False)
+            if memory:
+                report[name]["peak_memory_mb"] = measure(
+                    build, question_list, results_files, os.path.join(tmp_dir, f"{name.split()[0]}.xlsx"), True
+                )["peak_memory_mb"]
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the transcript report builders on a synthetic campaign')
+    parser.add_argument('--interviews', type=int, default=500, help='Number of interviews (rows)')
+    parser.add_argument('--questions', type=int, default=60, help='Number of questions (columns)')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the peak memory measurement')
+    args = parser.parse_args()
+
+    report = run_benchmark(args.interviews, args.questions, not args.no_memory)
+    print(f"{args.interviews} interviews x {args.questions} questions")
+    print(f"{'builder':<22}{'time':>10}{'size':>10}{'peak memory':>14}")
+    for name, stats in report.items():
+        memory = f"{stats['peak_memory_mb']:>11.0f} MB" if 'peak_memory_mb' in stats else f"{'-':>14}"
+        print(f"{name:<22}{stats['seconds']:>9.2f}s{stats['size_mb']:>8.1f}MB{memory}")
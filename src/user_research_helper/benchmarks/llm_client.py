@@ -0,0 +1,86 @@
+"""
+Per-call latency of LLM requests with a new OpenAI client per call (the former behavior)
+and with the shared pooled client, measured against the local mock OpenAI server.
+
+    python -m user_research_helper.benchmarks.llm_client --calls 200 --workers 8 --latency 0.01
+
+The mock server speaks plain HTTP: against the real API, the pooled client also saves
+the TLS handshake of every call, so the gain is larger than measured here.
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from openai import OpenAI
+from user_research_helper.llm.client import close_clients, get_client
+from user_research_helper.mock.openai_server import MockOpenAIServer
+from user_research_helper.mock.project import mock_project
+
+
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def measure(get: Callable[[], OpenAI], calls: int, workers: int) -> List[float]:
+    """Latency in seconds of each call, `workers` calls being in flight at the same time"""
+    def call(i: int) -> float:
+        start = time.perf_counter()
+        client = get()
+        client.chat.completions.create(
+            model="gpt-4o",
+            messages=[{"role": "user", "content": f"Benchmark call {i}"}],
+            response_format={"type": "json_object"},
+        )
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(call, range(calls)))
+
+
+def run_benchmark(calls: int = 200, workers: int = 8, latency: float = 0.01) -> dict:
+    """
+    Compare a new client per call with the shared pooled client
+
+    Returns:
+        dict: Latency statistics in milliseconds for each mode
+    """
+    report = {}
+    with MockOpenAIServer(latency=latency) as mock_server, \
+            mock_project({"llm": {"max_connections": workers}}, openai_server=mock_server):
+
+        modes = {
+            "new client per call": lambda: OpenAI(max_retries=0),
+            "shared pooled client": get_client,
+        }
+        for mode, get in modes.items():
+            measure(get, min(calls, 10), workers)  # warm up
+            start = time.perf_counter()
+            latencies = measure(get, calls, workers)
+            elapsed = time.perf_counter() - start
+            report[mode] = {
+                "mean_ms": statistics.mean(latencies) * 1000,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "overhead_ms": (statistics.mean(latencies) - latency) * 1000,
+                "calls_per_second": calls / elapsed,
+            }
+        close_clients()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the shared LLM client against a local mock endpoint')
+    parser.add_argument('--calls', type=int, default=200, help='Number of calls per mode')
+    parser.add_argument('--workers', type=int, default=8, help='Calls in flight at the same time')
+    parser.add_argument('--latency', type=float, default=0.01, help='Latency of the mock server in seconds')
+    args = parser.parse_args()
+
+    report = run_benchmark(args.calls, args.workers, args.latency)
+    print(f"{args.calls} calls, {args.workers} workers, {args.latency * 1000:.0f} ms server latency")
+    print(f"{'mode':<24}{'mean':>10}{'p50':>10}{'p95':>10}{'overhead':>10}{'calls/s':>10}")
+    for mode, stats in report.items():
+        print(f"{mode:<24}{stats['mean_ms']:>8.1f}ms{stats['p50_ms']:>8.1f}ms{stats['p95_ms']:>8.1f}ms"
+              f"{stats['overhead_ms']:>8.1f}ms{stats['calls_per_second']:>10.1f}")
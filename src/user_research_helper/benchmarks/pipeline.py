@@ -0,0 +1,291 @@
+"""
+End-to-end benchmark of process_transcripts and process_analysis on a synthetic campaign,
+against the local mock OpenAI and AssemblyAI servers.
+
+    python -m user_research_helper.benchmarks.pipeline --interviews 50 --turns 40 --questions 20 --segments 4
+
+The campaign (fake recordings, questions and segments) is generated from `--seed`, and the
+mock servers answer deterministically, so two runs only differ by the code under test.
+Per-stage times come from the run metrics of each pipeline. `--output` appends the result
+as a JSON line to a file, to track scaling behavior over releases.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import List, Optional
+
+import assemblyai as aai
+from openpyxl import load_workbook
+from user_research_helper.campaign.config import config
+from user_research_helper.campaign.metrics import get_metrics
+from user_research_helper.llm.client import close_clients
+from user_research_helper.mock.assemblyai_server import MockAssemblyAIServer
+from user_research_helper.mock.openai_server import MockOpenAIServer
+
+
+TOPICS = ["coffee", "work", "commute", "breakfast", "energy", "price", "taste", "habits", "family", "weekend"]
+WORDS = [
+    "usually", "morning", "really", "prefer", "because", "home", "office", "cup", "friends", "cheap",
+    "strong", "sometimes", "never", "always", "think", "quality", "quick", "machine", "shop", "time",
+]
+
+
+def generate_campaign(
+    root_dir: str,
+    interviews: int = 10,
+    turns: int = 20,
+    words_per_turn: int = 25,
+    questions: int = 10,
+    seed: int = 0,
+    batch_transcription: bool = True,
+    workers: int = 4,
+) -> List[str]:
+    """
+    Write a synthetic project: config.json, questions.txt and one fake recording per interview.
+    Fake recordings hold `Speaker X: text` lines, which the mock AssemblyAI server returns as utterances.
+
+    Args:
+        root_dir: Project directory
+        interviews: Number of recordings
+        turns: Speaker turns per recording
+        words_per_turn: Words per speaker turn
+        questions: Number of questions
+        seed: Seed of the generated content
+        batch_transcription: Use the submit-all-then-poll transcription mode
+        workers: Concurrency of every stage
+
+    Returns:
+        List[str]: Names of the interviews
+    """
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root_dir, "audios"), exist_ok=True)
+
+    question_texts = [
+        f"What do you think about {TOPICS[i % len(TOPICS)]} (question {i})?" for i in range(questions)
+    ]
+    with open(os.path.join(root_dir, "questions.txt"), 'w', encoding='utf-8') as f:
+        f.write("\n\n".join(question_texts) + "\n")
+
+    names = []
+    for i in range(interviews):
+        name = f"interview-{i:04d}"
+        lines = []
+        for turn in range(turns):
+            if turn % 2 == 0:
+                lines.append(f"Speaker A: {question_texts[(turn // 2) % questions]}")
+            else:
+                lines.append("Speaker B: " + " ".join(rng.choice(WORDS) for _ in range(words_per_turn)) + ".")
+        with open(os.path.join(root_dir, "audios", f"{name}.mp3"), 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        names.append(name)
+
+    with open(os.path.join(root_dir, "config.json"), 'w', encoding='utf-8') as f:
+        json.dump({
+            "language_id": "en",
+            "language": "english",
+            "word_boost": [],
+            "do_transcribe_audio": True,
+            "do_analyze_audio_transcript": True,
+            "do_make_transcript_report": True,
+            "do_segment_summaries": True,
+            "do_result_analysis": True,
+            "do_add_quotes": True,
+            "concurrency": {
+                "max_workers": 2 * workers,
+                "transcription_workers": workers,
+                "analysis_workers": workers,
+                "question_workers": workers,
+                "synthesis_workers": workers,
+            },
+            "transcription": {
+                "backend": "assemblyai",
+                "batch": {"enabled": batch_transcription, "upload_workers": workers, "poll_interval_seconds": 0.1},
+            },
+            "llm": {"max_connections": 4 * workers},
+            "llm_cache": {"enabled": False},
+            "metrics": {"enabled": True},
+            "debug": {"verbose": False},
+        }, f, indent=2)
+    return names
+
+
+def assign_segments(report_file: str, segments: int, seed: int = 0) -> None:
+    """
+    Fill the Segments column of a transcript report, as a researcher does before the analysis
+    (each interview gets one or two of `segments` segments)
+    """
+    rng = random.Random(seed)
+    segment_names = [f"segment-{i}" for i in range(segments)]
+    workbook = load_workbook(report_file)
+    sheet = workbook.active
+    for row in range(2, sheet.max_row + 1):
+        chosen = rng.sample(segment_names, min(len(segment_names), rng.choice([1, 2])))
+        sheet.cell(row=row, column=2, value=", ".join(chosen))
+    workbook.save(report_file)
+
+
+def stage_times(summary: dict) -> dict:
+    """Items, wall time (sum over items), LLM calls and median LLM latency of every stage of a run summary"""
+    return {
+        name: {
+            "items": stage["items"],
+            "wall_time": stage.get("wall_time_total", 0.0),
+            "llm_calls": stage.get("llm", {}).get("calls", 0),
+            "llm_latency_p50": stage.get("llm", {}).get("latency_p50"),
+        }
+        for name, stage in summary["stages"].items()
+    }
+
+
+def run_benchmark(
+    interviews: int = 10,
+    turns: int = 20,
+    words_per_turn: int = 25,
+    questions: int = 10,
+    segments: int = 3,
+    llm_latency: float = 0.05,
+    upload_latency: float = 0.05,
+    transcription_seconds: float = 0.5,
+    workers: int = 4,
+    batch_transcription: bool = True,
+    seed: int = 0,
+    root_dir: Optional[str] = None,
+) -> dict:
+    """
+    Generate a campaign and run both pipelines on it against the mock servers
+
+    Args:
+        interviews, turns, words_per_turn, questions: Size of the campaign (see generate_campaign)
+        segments: Number of segments the interviews are spread over
+        llm_latency: Latency of each mock LLM request in seconds
+        upload_latency: Latency of each mock AssemblyAI upload in seconds
+        transcription_seconds: Time before a mock transcription job is completed
+        workers: Concurrency of every stage
+        batch_transcription: Use the submit-all-then-poll transcription mode
+        seed: Seed of the generated content
+        root_dir: Directory of the generated project, kept after the run (default: a temporary directory)
+
+    Returns:
+        dict: Parameters, wall time and throughput of each pipeline, with per-stage times
+    """
+    parameters = {
+        "interviews": interviews, "turns": turns, "words_per_turn": words_per_turn, "questions": questions,
+        "segments": segments, "llm_latency": llm_latency, "upload_latency": upload_latency,
+        "transcription_seconds": transcription_seconds, "workers": workers,
+        "batch_transcription": batch_transcription, "seed": seed,
+    }
+    temporary_dir = None
+    if root_dir is None:
+        temporary_dir = tempfile.mkdtemp(prefix="urh-benchmark-")
+        root_dir = temporary_dir
+    previous_base_url = aai.settings.base_url
+    previous_polling_interval = aai.settings.polling_interval
+    previous_environ = {key: os.environ.get(key) for key in ("OPENAI_BASE_URL", "OPENAI_API_KEY", "ASSEMBLYAI_API_KEY")}
+    previous_config = config.save_state()
+    report = {"parameters": parameters}
+    try:
+        generate_campaign(root_dir, interviews, turns, words_per_turn, questions, seed, batch_transcription, workers)
+        with MockOpenAIServer(latency=llm_latency) as openai_server, \
+                MockAssemblyAIServer(upload_latency=upload_latency, processing_seconds=transcription_seconds) as assemblyai_server:
+            os.environ.update(OPENAI_BASE_URL=openai_server.base_url, OPENAI_API_KEY="mock", ASSEMBLYAI_API_KEY="mock")
+            aai.settings.base_url = assemblyai_server.base_url
+            aai.settings.polling_interval = 0.1
+            from user_research_helper.transcript.process_transcripts import process_transcripts
+            from user_research_helper.result_analysis.process_analysis import process_analysis
+
+            start = time.perf_counter()
+            process_transcripts(root_dir)
+            elapsed = time.perf_counter() - start
+            report["process_transcripts"] = {
+                "wall_time": round(elapsed, 3),
+                "interviews_per_second": round(interviews / elapsed, 3),
+                "llm_requests": openai_server.request_count,
+                "stages": stage_times(get_metrics().summary()),
+            }
+
+            assign_segments(os.path.join(config.get_path('analysis_dir'), "transcript_analysis_report.xlsx"), segments, seed)
+            llm_requests = openai_server.request_count
+            start = time.perf_counter()
+            process_analysis(root_dir)
+            elapsed = time.perf_counter() - start
+            report["process_analysis"] = {
+                "wall_time": round(elapsed, 3),
+                "questions_per_second": round(questions / elapsed, 3),
+                "llm_requests": openai_server.request_count - llm_requests,
+                "stages": stage_times(get_metrics().summary()),
+            }
+            report["llm_requests_per_second"] = round(
+                openai_server.request_count
+                / (report["process_transcripts"]["wall_time"] + report["process_analysis"]["wall_time"]), 1
+            )
+            close_clients()
+    finally:
+        aai.settings.base_url = previous_base_url
+        aai.settings.polling_interval = previous_polling_interval
+        for key, value in previous_environ.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        config.restore_state(previous_config)
+        if temporary_dir:
+            shutil.rmtree(temporary_dir, ignore_errors=True)
+    return report
+
+
+def print_report(report: dict) -> None:
+    parameters = report["parameters"]
+    print(f"{parameters['interviews']} interviews x {parameters['turns']} turns, {parameters['questions']} questions, "
+          f"{parameters['segments']} segments, {parameters['workers']} workers, "
+          f"LLM latency {parameters['llm_latency'] * 1000:.0f} ms")
+    for pipeline, throughput in (("process_transcripts", "interviews_per_second"), ("process_analysis", "questions_per_second")):
+        run = report[pipeline]
+        print(f"{pipeline}: {run['wall_time']:.2f}s, {run[throughput]:.2f} {throughput.replace('_', ' ')}, "
+              f"{run['llm_requests']} LLM requests")
+        for name, stage in run["stages"].items():
+            line = f"  {name:<28}{stage['items']:>6} items{stage['wall_time']:>10.2f}s"
+            if stage["llm_calls"]:
+                line += f"{stage['llm_calls']:>6} LLM calls, p50 {stage['llm_latency_p50'] * 1000:.0f} ms"
+            print(line)
+    print(f"{report['llm_requests_per_second']} LLM requests per second overall")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark both pipelines on a synthetic campaign against local mock servers')
+    parser.add_argument('--interviews', type=int, default=10, help='Number of interviews')
+    parser.add_argument('--turns', type=int, default=20, help='Speaker turns per interview')
+    parser.add_argument('--words-per-turn', type=int, default=25, help='Words per speaker turn')
+    parser.add_argument('--questions', type=int, default=10, help='Number of questions')
+    parser.add_argument('--segments', type=int, default=3, help='Number of segments')
+    parser.add_argument('--llm-latency', type=float, default=0.05, help='Latency of the mock LLM in seconds')
+    parser.add_argument('--upload-latency', type=float, default=0.05, help='Latency of the mock uploads in seconds')
+    parser.add_argument('--transcription-seconds', type=float, default=0.5, help='Processing time of the mock transcriptions')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrency of every stage')
+    parser.add_argument('--per-file-transcription', action='store_true', help='Transcribe one file at a time per worker instead of the batch mode')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the generated campaign')
+    parser.add_argument('--keep', help='Generate the campaign in this directory and keep it')
+    parser.add_argument('--output', help='Append the result as a JSON line to this file')
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        interviews=args.interviews,
+        turns=args.turns,
+        words_per_turn=args.words_per_turn,
+        questions=args.questions,
+        segments=args.segments,
+        llm_latency=args.llm_latency,
+        upload_latency=args.upload_latency,
+        transcription_seconds=args.transcription_seconds,
+        workers=args.workers,
+        batch_transcription=not args.per_file_transcription,
+        seed=args.seed,
+        root_dir=args.keep,
+    )
+    print_report(report)
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report) + "\n")
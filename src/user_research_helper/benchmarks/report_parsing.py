@@ -0,0 +1,175 @@
+"""
+Time of the report parsers with row by row extraction (the former `iterrows` loops) and with
+column-wise extraction, on synthetic transcript, quotes and segment reports. The parsing of the
+loaded DataFrames is timed apart from the reading of the transcript report xlsx, which is timed
+with each Excel reader.
+
+    python -m user_research_helper.benchmarks.report_parsing --interviews 2000 --questions 60
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import pandas as pd
+from user_research_helper.campaign.excel_reader import READERS
+from user_research_helper.result_analysis.data import (
+    Interview, InterviewDataset, Question, SegmentAnswer, SegmentDataset
+)
+from user_research_helper.result_analysis.quote_addition import quotes_from_dataframe
+from user_research_helper.result_analysis.segment_report_parsing import segment_dataset_from_dataframe
+from user_research_helper.result_analysis.transcript_report_parsing import interview_dataset_from_dataframe
+
+
+SEGMENTS = ["adult", "student", "senior", "remote", "office", "visually impaired", "mobile"]
+WORDS = ["coffee", "morning", "price", "taste", "home", "office", "usually", "prefer", "strong", "cup"]
+
+
+def generate_transcript_report(interviews: int, questions: int, seed: int = 0) -> pd.DataFrame:
+    """Transcript (or quotes) report: name, segments, then an answer per question, about 10% empty"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(interviews):
+        segments = ", ".join(rng.sample(SEGMENTS, rng.randint(0, 3)))
+        answers = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 40))) if rng.random() > 0.1 else None
+            for _ in range(questions)
+        ]
+        rows.append([f"interview-{i:04d}", segments or None] + answers)
+    return pd.DataFrame(rows, columns=["File Name", "Segments"] + [f"Question {q} about coffee habits?" for q in range(questions)])
+
+
+def generate_segment_report(segments: int, questions: int, seed: int = 0) -> pd.DataFrame:
+    """Segment report: segment name, then a summary per question, about 10% empty"""
+    rng = random.Random(seed)
+    rows = [
+        [f"segment-{i}"] + [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))) if rng.random() > 0.1 else None
+            for _ in range(questions)
+        ]
+        for i in range(segments)
+    ]
+    return pd.DataFrame(rows, columns=["Segment Name"] + [f"Question {q} about coffee habits?" for q in range(questions)])
+
+
+def iterrows_interview_dataset(df: pd.DataFrame) -> InterviewDataset:
+    """Former transcript report parser: one row and one model at a time"""
+    questions = [
+        Question(id=str(i+3), text=str(col_name), column_index=i+2)
+        for i, col_name in enumerate(df.columns[2:])
+    ]
+    interviews = []
+    for _, row in df.iterrows():
+        segments_str = str(row.iloc[1]) if pd.notna(row.iloc[1]) else ""
+        segments = list({s.strip() for s in segments_str.split(',') if s.strip()})
+        answers = {
+            q.id: str(row.iloc[q.column_index])
+            for q in questions
+            if pd.notna(row.iloc[q.column_index])
+        }
+        interviews.append(Interview(name=str(row.iloc[0]), segments=segments, answers=answers))
+    return InterviewDataset(questions=questions, interviews=interviews)
+
+
+def iterrows_segment_dataset(df: pd.DataFrame) -> SegmentDataset:
+    """Former segment report parser: one row and one model at a time"""
+    questions = [
+        Question(id=str(i+2), text=str(col_name), column_index=i+1)
+        for i, col_name in enumerate(df.columns[1:])
+    ]
+    segments = {}
+    for _, row in df.iterrows():
+        segment_name = row.iloc[0]
+        segment_answers = {}
+        for i, question in enumerate(questions):
+            answer_text = row.iloc[i+1]
+            if pd.notna(answer_text):
+                segment_answers[question.id] = SegmentAnswer(
+                    segment_name=segment_name, question_id=question.id, answer_summary=str(answer_text)
+                )
+        segments[segment_name] = segment_answers
+    return SegmentDataset(questions=questions, segments=segments)
+
+
+def iterrows_quotes(df: pd.DataFrame) -> Dict[str, List[str]]:
+    """Former quotes extraction: one cell at a time"""
+    quotes_by_question = {}
+    for _, row in df.iterrows():
+        segments_str = str(row.iloc[1]) if pd.notna(row.iloc[1]) else ""
+        segments = [s.strip() for s in segments_str.split(',') if s.strip()]
+        for col_idx, answer in enumerate(row.iloc[2:], start=2):
+            if pd.notna(answer):
+                quote = str(answer).strip()
+                if segments:
+                    quote += " (" + ", ".join(segments) + ")"
+                quotes_by_question.setdefault(str(col_idx), []).append(quote)
+    return quotes_by_question
+
+
+def measure(parse: Callable, source, repeat: int) -> float:
+    """Best time of `repeat` parsings (or readings)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(source)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(interviews: int = 2000, questions: int = 60, segments: int = 200, repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Parse the same reports with both parsers, after checking they give the same result
+
+    Returns:
+        Dict[str, Dict[str, float]]: Seconds of each parser and speedup, per report, and seconds
+            of each available Excel reader under "xlsx reading"
+    """
+    transcript_report = generate_transcript_report(interviews, questions)
+    segment_report = generate_segment_report(segments, questions)
+
+    old_dataset, new_dataset = iterrows_interview_dataset(transcript_report), interview_dataset_from_dataframe(transcript_report)
+    # the former parser listed the segments of an interview in set order
+    assert [(i.name, set(i.segments), i.answers) for i in old_dataset.interviews] == \
+        [(i.name, set(i.segments), i.answers) for i in new_dataset.interviews], "Transcript report parsers differ"
+    assert iterrows_segment_dataset(segment_report) == segment_dataset_from_dataframe(segment_report), "Segment report parsers differ"
+    assert iterrows_quotes(transcript_report) == quotes_from_dataframe(transcript_report), "Quotes parsers differ"
+
+    parsers = {
+        "transcript report": (iterrows_interview_dataset, interview_dataset_from_dataframe, transcript_report),
+        "quotes report": (iterrows_quotes, quotes_from_dataframe, transcript_report),
+        "segment report": (iterrows_segment_dataset, segment_dataset_from_dataframe, segment_report),
+    }
+    report = {}
+    for name, (former, columnwise, df) in parsers.items():
+        before, after = measure(former, df, repeat), measure(columnwise, df, repeat)
+        report[name] = {"iterrows_seconds": before, "columnwise_seconds": after, "speedup": before / after}
+
+    report["xlsx reading"] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report_file = os.path.join(tmp_dir, "transcript_analysis_report.xlsx")
+        transcript_report.to_excel(report_file, index=False)
+        for name, read in READERS.items():
+            try:
+                report["xlsx reading"][name] = measure(read, report_file, 1)
+            except ImportError:
+                pass
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the report parsers on synthetic reports')
+    parser.add_argument('--interviews', type=int, default=2000, help='Rows of the transcript and quotes reports')
+    parser.add_argument('--questions', type=int, default=60, help='Question columns of the reports')
+    parser.add_argument('--segments', type=int, default=200, help='Rows of the segment report')
+    parser.add_argument('--repeat', type=int, default=3, help='Parsings per parser, the best time is kept')
+    args = parser.parse_args()
+
+    report = run_benchmark(args.interviews, args.questions, args.segments, args.repeat)
+    print(f"{args.interviews} interviews / {args.segments} segments x {args.questions} questions")
+    reading = report.pop("xlsx reading")
+    print(f"{'report':<20}{'iterrows':>10}{'column-wise':>13}{'speedup':>10}")
+    for name, stats in report.items():
+        print(f"{name:<20}{stats['iterrows_seconds']:>9.3f}s{stats['columnwise_seconds']:>12.3f}s{stats['speedup']:>9.1f}x")
+    print("transcript report reading: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in reading.items()))
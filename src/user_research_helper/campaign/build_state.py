@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Set
+
+from user_research_helper.campaign.config import config
+
+
+# Settings that change the output of each stage (dotted config keys). `word_boost` is left out
+# of the transcription settings: it is mostly edited for the extraction prompts, and a change
+# must not re-transcribe (and pay for) every recording
+STAGE_SETTINGS = {
+    "transcription": [
+        "language_id", "transcription.backend",
+        "transcription.local.model", "transcription.local.compute_type",
+        "transcription.chunking.enabled", "transcription.chunking.min_duration_seconds",
+        "transcription.chunking.chunk_seconds", "transcription.chunking.overlap_seconds",
+    ],
+    # the part of the transcript the answers are drawn from, not how the questions are sent
+    # (batch_size, history...), which keeps the answers already extracted
+    "extraction": [
+        "language", "word_boost", "llm_common_context", "llm_answer_extraction_context",
+        "extraction.context_mode", "extraction.retrieval_top_k", "extraction.retrieval_token_budget",
+        "extraction.retrieval_scorer", "models.extraction",
+    ],
+    "segment_synthesis": [
+        "language", "llm_common_context", "llm_answer_analysis_context", "models.segment_synthesis",
+    ],
+    "cross_segment_synthesis": [
+        "language", "llm_common_context", "llm_result_analysis_context", "models.cross_segment_synthesis",
+    ],
+}
+
+
+def fingerprint(*values: Any) -> str:
+    """SHA-256 of the canonical JSON of some values (texts, settings, lists of fingerprints...)"""
+    payload = json.dumps(values, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def settings_fingerprint(stage: str) -> str:
+    """Fingerprint of the prompt contexts and model settings of a stage (see STAGE_SETTINGS)"""
+    return fingerprint({key: config.get_config(key) for key in STAGE_SETTINGS[stage]})
+
+
+class BuildState:
+    """
+    Build records of the artifacts of a project, like `make` for research artifacts.
+
+    The pipeline is a graph of nodes: audio -> raw transcript -> structured transcript ->
+    transcript report -> segment files -> segment report -> results -> Word document.
+    When a node is built, the fingerprints of its inputs (content of the input files,
+    prompt contexts and model settings) are recorded with its outputs. A node is built
+    again only when one of these fingerprints changed, an output is missing or its last
+    build did not complete; the content of its outputs then changes the fingerprints of
+    the nodes downstream. Unchanged nodes are skipped, so editing the segments of one
+    interview in the transcript report only recomputes the segments concerned.
+
+    Outputs with no record (e.g. built before this file existed) are adopted as they are.
+    Files are fingerprinted by content; hashes are cached by path, modification time and
+    size, so files that did not change are not read again.
+    """
+
+    def __init__(self, state_file: str, root_dir: str):
+        """
+        Args:
+            state_file: JSON file holding the records
+            root_dir: Root of the project, paths are recorded relative to it
+        """
+        self.state_file = state_file
+        self.root_dir = root_dir
+        self._lock = threading.Lock()
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        self._nodes: Dict[str, dict] = state.get("nodes", {})
+        self._files: Dict[str, list] = state.get("files", {})  # path -> [mtime_ns, size, sha256]
+
+    def _relpath(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.root_dir))
+
+    def file_fingerprint(self, path: str) -> Optional[str]:
+        """
+        Content hash of a file
+
+        Returns:
+            Optional[str]: SHA-256 of the content, or None if the file does not exist
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = self._relpath(path)
+        with self._lock:
+            cached = self._files.get(key)
+        if cached and cached[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        with self._lock:
+            self._files[key] = [stat.st_mtime_ns, stat.st_size, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def files_fingerprint(self, paths: Iterable[str]) -> str:
+        """Fingerprint of a set of files (names and contents)"""
+        return fingerprint(sorted((os.path.basename(path), self.file_fingerprint(path)) for path in paths))
+
+    def changes(self, node: str, inputs: Dict[str, str], outputs: Iterable[str] = ()) -> Optional[Set[str]]:
+        """
+        What changed since a node was last built
+
+        Args:
+            node: Node name, e.g. "extraction/interview-1"
+            inputs: Fingerprint of each input, by name
+            outputs: Paths of the outputs of the node
+
+        Returns:
+            Optional[Set[str]]: None if the node was never recorded, otherwise the names of the
+                inputs that changed, plus "outputs" if an output is missing and "incomplete" if
+                its last build did not complete. An empty set means the node is up to date.
+        """
+        with self._lock:
+            record = self._nodes.get(node)
+        if record is None:
+            return None
+        changed = {name for name, value in inputs.items() if record["inputs"].get(name) != value}
+        changed |= set(record["inputs"]) - set(inputs)
+        if not all(os.path.exists(path) for path in outputs):
+            changed.add("outputs")
+        if not record.get("complete", True):
+            changed.add("incomplete")
+        return changed
+
+    def is_up_to_date(self, node: str, inputs: Dict[str, str], outputs: Iterable[str]) -> bool:
+        """
+        Check if a node can be skipped: nothing changed since it was built, or it was never
+        recorded but all its outputs exist (they are then adopted with the current inputs)
+        """
+        outputs = list(outputs)
+        changes = self.changes(node, inputs, outputs)
+        if changes is None and outputs and all(os.path.exists(path) for path in outputs):
+            self.record(node, inputs, outputs)
+            return True
+        return changes == set()
+
+    def output_modified(self, node: str, path: str) -> bool:
+        """Check if an output of a node was modified since the node was built (e.g. edited by hand)"""
+        with self._lock:
+            recorded = self._nodes.get(node, {}).get("outputs", {}).get(self._relpath(path))
+        return recorded is not None and recorded != self.file_fingerprint(path)
+
+    def record(self, node: str, inputs: Dict[str, str], outputs: Iterable[str] = (), complete: bool = True) -> None:
+        """
+        Record a build of a node and save the state
+
+        Args:
+            node: Node name
+            inputs: Fingerprint of each input, by name
+            outputs: Paths of the outputs written
+            complete: False when the build started (its partial results can be resumed
+                with the same inputs) or did not complete (e.g. failed requests)
+        """
+        output_fingerprints = {self._relpath(path): self.file_fingerprint(path) for path in outputs}
+        with self._lock:
+            self._nodes[node] = {"inputs": dict(inputs), "outputs": output_fingerprints, "complete": complete}
+            self._save()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        tmp_path = f"{self.state_file}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"nodes": self._nodes, "files": self._files}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_file)
+
+
+_states: Dict[str, BuildState] = {}
+_states_lock = threading.Lock()
+
+
+def get_build_state() -> BuildState:
+    """Get the build records of the current project (`.cache/build_state.json`)"""
+    state_file = config.get_path('build_state_file')
+    with _states_lock:
+        if state_file not in _states:
+            _states[state_file] = BuildState(state_file, config.root_dir)
+        return _states[state_file]
+
+
+def test_build_state():
+    """Nodes are rebuilt when an input changes or an output is missing, and adopted when never recorded"""
+    from user_research_helper.mock.project import mock_project, write_config
+
+    with mock_project({}) as root_dir:
+        state_file = os.path.join(root_dir, ".cache", "build_state.json")
+        source, output = os.path.join(root_dir, "raw.txt"), os.path.join(root_dir, "structured.json")
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write("Speaker A: hello")
+        state = BuildState(state_file, root_dir)
+        inputs = {"transcript": state.file_fingerprint(source), "settings": fingerprint({"model": "gpt-4o"})}
+
+        assert state.changes("extraction/raw", inputs, [output]) is None
+        assert not state.is_up_to_date("extraction/raw", inputs, [output]), "Missing output must be built"
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write("{}")
+        state.record("extraction/raw", inputs, [output])
+        assert BuildState(state_file, root_dir).is_up_to_date("extraction/raw", inputs, [output]), "Records must be saved"
+
+        # an input edited by hand
+        with open(source, 'a', encoding='utf-8') as f:
+            f.write(" world")
+        edited = {**inputs, "transcript": state.file_fingerprint(source)}
+        assert state.changes("extraction/raw", edited, [output]) == {"transcript"}
+
+        # other settings
+        assert state.changes("extraction/raw", {**inputs, "settings": fingerprint({"model": "gpt-4o-mini"})}, [output]) == {"settings"}
+
+        # started but not completed
+        state.record("extraction/raw", edited, complete=False)
+        assert state.changes("extraction/raw", edited, [output]) == {"incomplete"}
+
+        # outputs of a project built before the build records are adopted
+        assert state.is_up_to_date("extraction/other", inputs, [output])
+        assert state.changes("extraction/other", inputs, [output]) == set()
+
+        # outputs edited after their build
+        assert not state.output_modified("extraction/other", output)
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write('{"edited": true}')
+        assert state.output_modified("extraction/other", output)
+
+        # how the questions are sent does not change the answers, the context they are drawn from does
+        fingerprints = []
+        for extraction in ({"batch_size": 1}, {"batch_size": 4, "history": "window"}, {"context_mode": "retrieval"}):
+            write_config(root_dir, {"extraction": extraction})
+            fingerprints.append(settings_fingerprint("extraction"))
+        assert fingerprints[0] == fingerprints[1] != fingerprints[2], "Extraction settings fingerprint"
+    print("Build state OK")
+
+
+if __name__ == "__main__":
+    test_build_state()
@@ -17,6 +17,12 @@ class Config:
         'transcript_report_dir': 'transcripts',
         'analysis_dir': 'analysis',
         'segment_analysis_dir': 'analysis/segments',
+        'run_report_dir': 'analysis/run_reports',
+        'llm_cache_dir': '.cache/llm',
+        'embedding_index_dir': '.cache/embeddings',
+        'report_cache_dir': '.cache/reports',
+        'build_state_file': '.cache/build_state.json',
+        'transcription_jobs_file': 'transcripts/assemblyai_jobs.json',
         'config_file': 'config.json'
     }
 
@@ -52,6 +58,17 @@ class Config:
         self._load_config()
         self._initialized = True
 
+    def save_state(self) -> tuple:
+        """
+        Get the current root directory and settings, to restore them with restore_state
+        (e.g. after a test that initialized another project)
+        """
+        return (self._root_dir, self._config, self._initialized)
+
+    def restore_state(self, state: tuple) -> None:
+        """Restore a root directory and settings returned by save_state"""
+        self._root_dir, self._config, self._initialized = state
+
     def _check_initialized(self) -> None:
         """
         Check if the configuration has been initialized
@@ -0,0 +1,130 @@
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from user_research_helper.campaign.config import config
+
+
+def read_with_calamine(file_path: str) -> pd.DataFrame:
+    """Read the first sheet with the calamine engine (Rust, requires python-calamine)"""
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        raise ImportError(
+            "The calamine Excel reader requires python-calamine. "
+            "Install it with: pip install python-calamine"
+        )
+    return pd.read_excel(file_path, engine="calamine")
+
+
+def read_with_openpyxl_read_only(file_path: str) -> pd.DataFrame:
+    """
+    Read the first sheet with a read-only openpyxl workbook, streaming the cell values only
+    (no cell objects) and only for the columns that have a header.
+
+    Columns without a header are ignored, so the cells formatted far to the right of the
+    data by spreadsheet editors are not read. The values are then converted as pandas does.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        header = list(next(sheet.iter_rows(max_row=1, values_only=True), ()))
+        while header and header[-1] is None:
+            header.pop()
+        if not header:
+            return pd.DataFrame()
+
+        data = [["" if value is None else value for value in header]]
+        for row in sheet.iter_rows(min_row=2, max_col=len(header), values_only=True):
+            # same conversions as pandas: empty cells as "", integral numbers as int
+            data.append([
+                "" if value is None else int(value) if isinstance(value, float) and value.is_integer() else value
+                for value in row
+            ])
+    finally:
+        workbook.close()
+
+    # trim trailing empty rows and pad short rows
+    while len(data) > 1 and all(value == "" for value in data[-1]):
+        data.pop()
+    data = [row + [""] * (len(header) - len(row)) for row in data]
+    return TextParser(data, header=0).read()
+
+
+def read_with_pandas(file_path: str) -> pd.DataFrame:
+    """Read the first sheet with the default pandas engine (openpyxl)"""
+    return pd.read_excel(file_path)
+
+
+READERS: Dict[str, Callable[[str], pd.DataFrame]] = {
+    "calamine": read_with_calamine,
+    "openpyxl_read_only": read_with_openpyxl_read_only,
+    "openpyxl": read_with_pandas,
+}
+
+# fastest first, the default pandas engine last
+AUTO_ORDER: List[str] = ["calamine", "openpyxl_read_only", "openpyxl"]
+
+
+def read_excel_report(file_path: str, reader: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read the first sheet of an Excel report as `pd.read_excel` does, with a faster engine
+
+    The reader falls back to the next one of AUTO_ORDER when its engine is not installed
+    or fails on the file, down to the default pandas engine.
+
+    Args:
+        file_path: Path of the xlsx file
+        reader: Name of the reader, one of READERS or "auto" (default: config `excel.reader`, "auto")
+
+    Returns:
+        pd.DataFrame: The sheet, first row as header
+
+    Raises:
+        ValueError: If the reader is unknown
+    """
+    reader = reader or config.get_config('excel.reader', 'auto')
+    if reader != "auto" and reader not in READERS:
+        raise ValueError(f"Unknown Excel reader: {reader} (expected auto or one of {list(READERS)})")
+    names = AUTO_ORDER if reader == "auto" else [reader] + [name for name in AUTO_ORDER if name != reader]
+
+    for i, name in enumerate(names):
+        try:
+            return READERS[name](file_path)
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            if i == len(names) - 1:
+                raise
+            # a missing optional engine is expected in auto mode
+            if reader != "auto" or not isinstance(e, ImportError):
+                print(f"Excel reader {name} failed on {file_path} ({e}), falling back to {names[i + 1]}")
+
+
+def test_excel_readers():
+    """Every reader gives the same DataFrame as pd.read_excel"""
+    import os
+    import tempfile
+
+    df = pd.DataFrame({
+        "File Name": ["interview-1", "interview-2", "interview-3"],
+        "Segments": ["adult, remote", None, "student"],
+        "Question 1?": ["Every morning", None, "  never "],
+        "Question 2?": [None, None, None],
+        "Question 3?": [2, 3.5, None],
+    })
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "report.xlsx")
+        df.to_excel(file_path, index=False)
+        expected = pd.read_excel(file_path)
+        for name in READERS:
+            pd.testing.assert_frame_equal(read_excel_report(file_path, name), expected)
+        pd.testing.assert_frame_equal(read_excel_report(file_path, "auto"), expected)
+    print(f"Excel readers OK ({', '.join(READERS)})")
+
+
+if __name__ == "__main__":
+    test_excel_readers()
@@ -0,0 +1,57 @@
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, PatternFill
+from openpyxl.utils import get_column_letter
+
+
+WRAP_TEXT = Alignment(wrap_text=True)
+
+
+@lru_cache(maxsize=None)
+def solid_fill(color: str) -> PatternFill:
+    """Shared solid fill of a color (e.g. "FFA500")"""
+    return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+
+class StreamingSheetWriter:
+    """
+    Single-sheet Excel report written row by row with a write-only openpyxl workbook.
+
+    Rows are streamed to disk as they are appended instead of being kept in memory, and
+    all the cells share the same style objects, so the memory used stays flat whatever
+    the number of rows. Column widths are set up front, as write-only sheets require.
+    """
+
+    def __init__(self, title: str, column_widths: Sequence[float]):
+        """
+        Args:
+            title: Title of the sheet
+            column_widths: Width of each column, from column A
+        """
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(title)
+        for column, width in enumerate(column_widths, start=1):
+            self.sheet.column_dimensions[get_column_letter(column)].width = width
+        self.rows = 0
+
+    def cell(self, value: Any = None, wrap: bool = True, fill: Optional[PatternFill] = None) -> WriteOnlyCell:
+        """Build a cell of the sheet with shared styles"""
+        cell = WriteOnlyCell(self.sheet, value=value)
+        if wrap:
+            cell.alignment = WRAP_TEXT
+        if fill is not None:
+            cell.fill = fill
+        return cell
+
+    def append(self, cells: List[Any]) -> None:
+        """Write the next row (cells built with `cell`, or plain values)"""
+        self.sheet.append(cells)
+        self.rows += 1
+
+    def save(self, output_file: str) -> None:
+        """Write the workbook (a write-only workbook can only be saved once)"""
+        self.workbook.save(output_file)
+        self.workbook.close()
@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+from typing import Any, Dict
+
+
+class ResultJournal:
+    """
+    Crash-safe append-only journal of intermediate results.
+    
+    Each result is appended as one JSON line next to the final output file
+    (`<output>.journal.jsonl`) instead of rewriting the whole file after every result.
+    Once all results are known, the journal is compacted into the final JSON file with
+    an atomic rename, so readers only ever see complete files.
+    """
+
+    JOURNAL_SUFFIX = ".journal.jsonl"
+
+    def __init__(self, output_path: str):
+        """
+        Args:
+            output_path: Path of the final JSON file
+        """
+        self.output_path = output_path
+        self.journal_path = output_path + self.JOURNAL_SUFFIX
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        """Check if results of an interrupted run are waiting in the journal"""
+        return os.path.exists(self.journal_path)
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Read the results recorded in the journal
+        
+        A torn last line (process killed mid-write) is ignored. When a key was recorded
+        several times, the last record wins.
+        
+        Returns:
+            Dict[str, Any]: Recorded values by key, in recording order
+        """
+        records = {}
+        if not self.exists():
+            return records
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record["key"]] = record["value"]
+        return records
+
+    def append(self, key: str, value: Any) -> None:
+        """Durably record one result"""
+        line = json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.bytes_written += len(line.encode('utf-8'))
+
+    def compact(self, data: Any) -> None:
+        """
+        Write the final JSON file atomically and remove the journal
+        
+        Args:
+            data: Complete content of the final file
+        """
+        tmp_path = self.output_path + ".tmp"
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+                self.bytes_written += f.tell()
+            os.replace(tmp_path, self.output_path)
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+
+    def discard(self) -> None:
+        """Remove the final file and the journal, e.g. when their results are out of date"""
+        with self._lock:
+            for path in (self.output_path, self.journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def test_result_journal():
+    """Check journal recovery after a torn write and compaction"""
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "results.json")
+        journal = ResultJournal(output_path)
+        journal.append("Q0", {"answer": "first"})
+        journal.append("Q1", {"answer": "second"})
+        journal.append("Q0", {"answer": "first, retried"})
+        # simulate a process killed in the middle of a write
+        with open(journal.journal_path, 'a', encoding='utf-8') as f:
+            f.write('{"key": "Q2", "val')
+        
+        records = ResultJournal(output_path).load()
+        assert records == {"Q0": {"answer": "first, retried"}, "Q1": {"answer": "second"}}, records
+        assert not os.path.exists(output_path), "The final file must only appear on compaction"
+        
+        journal.compact(records)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            assert json.load(f) == records
+        assert not journal.exists(), "The journal must be removed after compaction"
+
+
+if __name__ == "__main__":
+    test_result_journal()
+    print("All tests passed!")
@@ -0,0 +1,267 @@
+import csv
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile, None for no values"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+class RunMetrics:
+    """
+    Measurements of one run of a pipeline (process_transcripts or process_analysis).
+
+    Work items (an interview, a segment answer, a question...) are timed per stage with
+    `timed`, which records the queue wait (time between submission and start) and the wall
+    time, and lets the caller attach counters (tokens, bytes written...). LLM calls are
+    recorded per stage and model with `llm_call`. `write_report` saves a JSON summary and a
+    CSV of the items, to compare runs and spot regressions across campaigns.
+    """
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.items: List[dict] = []
+        self.llm_calls: List[dict] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timed(self, stage: str, item: str, queued_at: Optional[float] = None) -> Iterator[dict]:
+        """
+        Time a work item
+
+        Args:
+            stage: Pipeline stage
+            item: Name of the item (interview, segment/question...)
+            queued_at: time.perf_counter() when the item was submitted, to measure its queue wait
+
+        Yields:
+            dict: Record of the item, counters can be added to it
+        """
+        start = time.perf_counter()
+        record = {
+            "stage": stage,
+            "item": item,
+            "queue_wait": round(start - queued_at, 4) if queued_at is not None else 0.0,
+            "wall_time": 0.0,
+            "ok": True,
+        }
+        # recorded right away so that `update` can add counters while the item runs
+        with self._lock:
+            self.items.append(record)
+        try:
+            yield record
+        except BaseException:
+            record["ok"] = False
+            raise
+        finally:
+            record["wall_time"] = round(time.perf_counter() - start, 4)
+
+    def update(self, stage: str, item: str, **counters) -> None:
+        """Add counters to the last record of an item (or create it when the item is not timed)"""
+        with self._lock:
+            for record in reversed(self.items):
+                if record["stage"] == stage and record["item"] == item:
+                    break
+            else:
+                record = {"stage": stage, "item": item, "queue_wait": 0.0, "wall_time": 0.0, "ok": True}
+                self.items.append(record)
+            for key, value in counters.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    value += record.get(key, 0)
+                record[key] = value
+
+    def llm_call(
+        self, stage: str, model: str, latency: float, prompt_tokens: int = 0, completion_tokens: int = 0,
+        cached_tokens: int = 0, retries: int = 0, from_cache: bool = False, error: bool = False
+    ) -> None:
+        """Record one LLM call"""
+        with self._lock:
+            self.llm_calls.append({
+                "stage": stage, "model": model, "latency": round(latency, 4),
+                "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "cached_tokens": cached_tokens, "retries": retries,
+                "from_cache": from_cache, "error": error,
+            })
+
+    def summary(self) -> dict:
+        """
+        Per stage: items, failures, wall and queue wait times, counters summed over the items,
+        and LLM calls with latency percentiles, tokens and retries
+        """
+        with self._lock:
+            items = list(self.items)
+            llm_calls = list(self.llm_calls)
+
+        stages: Dict[str, dict] = {}
+        for record in items:
+            stage = stages.setdefault(record["stage"], {"items": 0, "failed": 0, "wall_times": [], "queue_waits": [], "counters": {}})
+            stage["items"] += 1
+            stage["failed"] += not record["ok"]
+            stage["wall_times"].append(record["wall_time"])
+            stage["queue_waits"].append(record["queue_wait"])
+            for key, value in record.items():
+                if key not in ("stage", "item", "queue_wait", "wall_time", "ok") and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    stage["counters"][key] = stage["counters"].get(key, 0) + value
+
+        report_stages = {}
+        for name, stage in stages.items():
+            report_stages[name] = {
+                "items": stage["items"],
+                "failed": stage["failed"],
+                "wall_time_total": round(sum(stage["wall_times"]), 3),
+                "wall_time_p50": percentile(stage["wall_times"], 50),
+                "wall_time_max": max(stage["wall_times"]),
+                "queue_wait_mean": round(sum(stage["queue_waits"]) / len(stage["queue_waits"]), 4),
+                "queue_wait_max": max(stage["queue_waits"]),
+                **stage["counters"],
+            }
+
+        for call in llm_calls:
+            report_stages.setdefault(call["stage"], {"items": 0, "failed": 0})
+        for name in report_stages:
+            calls = [call for call in llm_calls if call["stage"] == name]
+            if not calls:
+                continue
+            api_latencies = [call["latency"] for call in calls if not call["from_cache"] and not call["error"]]
+            report_stages[name]["llm"] = {
+                "calls": len(calls),
+                "cache_hits": sum(call["from_cache"] for call in calls),
+                "errors": sum(call["error"] for call in calls),
+                "retries": sum(call["retries"] for call in calls),
+                "latency_p50": percentile(api_latencies, 50),
+                "latency_p90": percentile(api_latencies, 90),
+                "latency_p99": percentile(api_latencies, 99),
+                "prompt_tokens": sum(call["prompt_tokens"] for call in calls),
+                "completion_tokens": sum(call["completion_tokens"] for call in calls),
+                "cached_tokens": sum(call["cached_tokens"] for call in calls),
+                "models": sorted({call["model"] for call in calls}),
+            }
+
+        return {
+            "pipeline": self.pipeline,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "wall_time": round(time.perf_counter() - self._start, 3),
+            "stages": report_stages,
+        }
+
+    def write_report(self, report_dir: str) -> str:
+        """
+        Write `<timestamp>_<pipeline>.json` (summary and items) and `<timestamp>_<pipeline>.csv` (one row per item)
+
+        Args:
+            report_dir: Directory of the run reports
+
+        Returns:
+            str: Path to the JSON report
+        """
+        os.makedirs(report_dir, exist_ok=True)
+        base_path = os.path.join(report_dir, f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))}_{self.pipeline}")
+        with self._lock:
+            items = list(self.items)
+        with open(base_path + ".json", 'w', encoding='utf-8') as f:
+            json.dump({**self.summary(), "items": items}, f, ensure_ascii=False, indent=2)
+
+        columns = ["stage", "item", "ok", "queue_wait", "wall_time"]
+        for record in items:
+            columns.extend(key for key in record if key not in columns)
+        with open(base_path + ".csv", 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(items)
+        return base_path + ".json"
+
+
+_metrics = RunMetrics("run")
+_metrics_lock = threading.Lock()
+
+
+def start_run(pipeline: str) -> RunMetrics:
+    """Start collecting the metrics of a new run"""
+    global _metrics
+    with _metrics_lock:
+        _metrics = RunMetrics(pipeline)
+        return _metrics
+
+
+def get_metrics() -> RunMetrics:
+    """Metrics of the current run"""
+    with _metrics_lock:
+        return _metrics
+
+
+def print_run_summary(summary: dict) -> None:
+    """Print the per stage summary of a run"""
+    print(f"Run metrics ({summary['pipeline']}, {summary['wall_time']:.1f}s):")
+    for name, stage in summary["stages"].items():
+        line = f"  {name}: {stage['items']} items"
+        if "wall_time_total" in stage:
+            line += f", wall {stage['wall_time_total']:.1f}s (max {stage['wall_time_max']:.1f}s), queue wait max {stage['queue_wait_max']:.1f}s"
+        if "llm" in stage:
+            llm = stage["llm"]
+            p50 = f"{llm['latency_p50']:.2f}s" if llm['latency_p50'] is not None else "-"
+            p99 = f"{llm['latency_p99']:.2f}s" if llm['latency_p99'] is not None else "-"
+            line += (f", {llm['calls']} LLM calls ({llm['cache_hits']} cached, {llm['retries']} retries), "
+                     f"p50 {p50} p99 {p99}, {llm['prompt_tokens']} + {llm['completion_tokens']} tokens "
+                     f"({llm['cached_tokens']} cached)")
+        print(line)
+
+
+def test_run_metrics():
+    """Failed items, summed counters, LLM call summary and written reports"""
+    import tempfile
+
+    metrics = RunMetrics("test")
+    with metrics.timed("analysis", "interview-1", queued_at=time.perf_counter()) as record:
+        record["questions"] = 3
+    try:
+        with metrics.timed("analysis", "interview-2"):
+            raise ValueError("simulated failure")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("timed must not swallow the exception")
+    assert [record["ok"] for record in metrics.items] == [True, False], "A failed item was not marked"
+
+    metrics.update("analysis", "interview-1", questions=2, bytes_written=100)
+    metrics.update("analysis", "interview-1", bytes_written=50)
+    metrics.update("quotes", "report.xlsx", quotes=7)
+    assert metrics.items[0]["questions"] == 5 and metrics.items[0]["bytes_written"] == 150, "Counters were not summed"
+    assert metrics.items[-1]["stage"] == "quotes", "An item that is not timed was not created"
+
+    metrics.llm_call("analysis", "gpt-4o-mini", 0.5, prompt_tokens=100, completion_tokens=20, cached_tokens=80)
+    metrics.llm_call("analysis", "gpt-4o-mini", 0.0, prompt_tokens=100, completion_tokens=20, from_cache=True)
+    metrics.llm_call("analysis", "gpt-4o", 1.5, retries=2, error=True)
+    metrics.llm_call("segment_synthesis", "gpt-4o", 0.8)
+    summary = metrics.summary()
+    analysis = summary["stages"]["analysis"]
+    assert (analysis["items"], analysis["failed"], analysis["questions"]) == (2, 1, 5)
+    assert analysis["llm"]["calls"] == 3 and analysis["llm"]["cache_hits"] == 1 and analysis["llm"]["errors"] == 1
+    assert analysis["llm"]["retries"] == 2 and analysis["llm"]["prompt_tokens"] == 200
+    # cache hits and errors are left out of the API latencies
+    assert analysis["llm"]["latency_p50"] == 0.5 and analysis["llm"]["models"] == ["gpt-4o", "gpt-4o-mini"]
+    assert summary["stages"]["segment_synthesis"]["llm"]["calls"] == 1, "A stage with LLM calls only is missing"
+
+    with tempfile.TemporaryDirectory() as report_dir:
+        json_path = metrics.write_report(report_dir)
+        with open(json_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        assert report["pipeline"] == "test" and len(report["items"]) == 3
+        with open(json_path[:-len(".json")] + ".csv", 'r', encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        assert [row["item"] for row in rows] == ["interview-1", "interview-2", "report.xlsx"]
+        assert rows[0]["bytes_written"] == "150" and rows[1]["ok"] == "False" and rows[2]["quotes"] == "7"
+    print_run_summary(summary)
+
+
+if __name__ == "__main__":
+    test_run_metrics()
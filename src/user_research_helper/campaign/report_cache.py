@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from user_research_helper.campaign.config import config
+from user_research_helper.campaign.excel_reader import read_excel_report
+
+
+class ReportCache:
+    """
+    Sidecar cache of the Excel reports read back by the pipeline.
+
+    The sheet read from a report is stored next to a small metadata file holding the
+    modification time, size and SHA-256 of the xlsx it comes from. While the xlsx keeps
+    the same modification time and size, the sheet is loaded from the sidecar without
+    opening the workbook; when they change (the report was rebuilt or edited by hand),
+    the content hash decides whether the report must be read again.
+
+    Sidecars are Parquet files when pyarrow is installed, pickled DataFrames otherwise
+    (or when a sheet cannot be stored as Parquet, e.g. a column mixing text and numbers).
+    """
+
+    def __init__(self, cache_dir: str):
+        """
+        Args:
+            cache_dir: Directory holding the sidecars
+        """
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _paths(self, file_path: str) -> Dict[str, str]:
+        """Sidecar paths of a report, named after the report and a hash of its full path"""
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:8]
+        base = os.path.join(self.cache_dir, f"{name}-{key}")
+        return {"meta": f"{base}.json", "parquet": f"{base}.parquet", "pickle": f"{base}.pkl"}
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """SHA-256 of the content of a file"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def read(self, file_path: str, reader: Optional[str] = None) -> pd.DataFrame:
+        """
+        Read the first sheet of a report, from its sidecar when the report did not change
+
+        Args:
+            file_path: Path of the xlsx file
+            reader: Excel reader used on a miss (see read_excel_report)
+
+        Returns:
+            pd.DataFrame: The sheet, as read_excel_report returns it
+        """
+        stat = os.stat(file_path)
+        paths = self._paths(file_path)
+        with self._lock:
+            meta = self._load_meta(paths["meta"])
+            content_hash = None
+            if meta and (meta["mtime_ns"], meta["size"]) != (stat.st_mtime_ns, stat.st_size):
+                # touched or copied but maybe not modified
+                content_hash = self.file_hash(file_path)
+                if content_hash != meta["sha256"]:
+                    meta = None
+            df = self._load_sheet(paths[meta["format"]]) if meta else None
+            if df is not None:
+                if content_hash is not None:
+                    self._save_meta(paths["meta"], {**meta, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size})
+                self.hits += 1
+                return df
+
+            self.misses += 1
+            df = read_excel_report(file_path, reader)
+            self._save(paths, df, {
+                "source": os.path.abspath(file_path),
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": content_hash or self.file_hash(file_path),
+            })
+            return df
+
+    @staticmethod
+    def _load_meta(meta_path: str) -> Optional[dict]:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    @staticmethod
+    def _save_meta(meta_path: str, meta: dict) -> None:
+        tmp_path = f"{meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    @staticmethod
+    def _load_sheet(sheet_path: str) -> Optional[pd.DataFrame]:
+        """Load a sidecar, or None if it is missing or unreadable"""
+        try:
+            if sheet_path.endswith(".parquet"):
+                df = pd.read_parquet(sheet_path)
+                # Parquet has a single null: give empty text cells back as NaN, as pandas reads them
+                return df.where(df.notna(), np.nan) if len(df.columns) else df
+            return pd.read_pickle(sheet_path)
+        except Exception:
+            return None
+
+    def _save(self, paths: Dict[str, str], df: pd.DataFrame, meta: dict) -> None:
+        """Write the sidecar, then its metadata (a sidecar without metadata is never used)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            tmp_path = f"{paths['parquet']}.tmp"
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, paths["parquet"])
+            meta["format"] = "parquet"
+        except Exception:
+            # pyarrow not installed, or columns Parquet cannot store
+            tmp_path = f"{paths['pickle']}.tmp"
+            df.to_pickle(tmp_path)
+            os.replace(tmp_path, paths["pickle"])
+            meta["format"] = "pickle"
+        self._save_meta(paths["meta"], meta)
+
+
+_caches: Dict[str, ReportCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_report_cache() -> Optional[ReportCache]:
+    """
+    Get the report cache of the current project
+
+    Returns:
+        Optional[ReportCache]: The cache, or None if `report_cache.enabled` is false
+    """
+    if not config.get_config('report_cache.enabled', True):
+        return None
+    cache_dir = config.get_path('report_cache_dir')
+    with _caches_lock:
+        if cache_dir not in _caches:
+            _caches[cache_dir] = ReportCache(cache_dir)
+        return _caches[cache_dir]
+
+
+def read_report(file_path: str) -> pd.DataFrame:
+    """Read the first sheet of an Excel report through the report cache, when it is enabled"""
+    cache = get_report_cache()
+    if cache is None:
+        return read_excel_report(file_path)
+    return cache.read(file_path)
+
+
+def test_report_cache():
+    """Unchanged reports are loaded from the sidecar, edited ones are read again"""
+    import tempfile
+    import time
+
+    df = pd.DataFrame({
+        "File Name": ["interview-1", "interview-2", None],
+        "Segments": ["adult, remote", None, "student"],
+        "Question 1?": ["Every morning", None, "  never "],
+        "Question 2?": [None, None, None],
+        "Question 3?": [2, 3.5, None],
+    })
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "report.xlsx")
+        df.to_excel(file_path, index=False)
+        expected = pd.read_excel(file_path)
+        cache = ReportCache(os.path.join(tmp_dir, "cache"))
+
+        pd.testing.assert_frame_equal(cache.read(file_path, "openpyxl"), expected)
+        pd.testing.assert_frame_equal(cache.read(file_path, "openpyxl"), expected)
+        assert (cache.hits, cache.misses) == (1, 1), "Unchanged report was read again"
+
+        # touched without being modified: the content hash matches
+        os.utime(file_path, (time.time() + 10, time.time() + 10))
+        cache.read(file_path, "openpyxl")
+        assert (cache.hits, cache.misses) == (2, 1), "Touched report was read again"
+
+        # edited by hand
+        df.loc[0, "Segments"] = "senior"
+        df.to_excel(file_path, index=False)
+        edited = cache.read(file_path, "openpyxl")
+        assert edited.loc[0, "Segments"] == "senior" and cache.misses == 2, "Edited report was loaded from the cache"
+
+        # a new instance uses the sidecars left on disk
+        other = ReportCache(cache.cache_dir)
+        pd.testing.assert_frame_equal(other.read(file_path, "openpyxl"), edited)
+        assert other.hits == 1
+        print(f"Report cache OK ({other._load_meta(other._paths(file_path)['meta'])['format']} sidecars)")
+
+
+if __name__ == "__main__":
+    test_report_cache()
@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from user_research_helper.campaign.config import config
+
+
+class LLMCache:
+    """
+    On-disk cache of chat completion responses.
+    
+    Entries are content addressed: the key is a hash of everything that determines the
+    answer (provider URL, model, temperature, messages and response format), so a rerun only pays for
+    the prompts that actually changed. The cache is bounded in size and evicts the least
+    recently used entries first (recency is kept in the file modification times).
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int):
+        """
+        Args:
+            cache_dir: Directory holding the cached responses
+            max_size_bytes: Size above which least recently used entries are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Tuple[int, float]]] = None  # path -> (size, last use)
+        self._size = 0
+
+    @staticmethod
+    def make_key(
+        model: str, temperature: Any, messages: List[dict], response_format: Any = None, base_url: Optional[str] = None
+    ) -> str:
+        """
+        Compute the content hash identifying a request
+        
+        Args:
+            base_url: API URL of the provider, the same model name may be served by several providers
+        
+        Returns:
+            str: Hex digest of the canonical JSON of the request parameters
+        """
+        payload = json.dumps({
+            "base_url": base_url,
+            "model": model,
+            "temperature": temperature,
+            "messages": messages,
+            "response_format": response_format,
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_index(self) -> None:
+        """Scan the cache directory once to know the size and recency of every entry"""
+        if self._entries is not None:
+            return
+        self._entries = {}
+        self._size = 0
+        if not os.path.isdir(self.cache_dir):
+            return
+        for dir_path, _, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                if not file_name.endswith(".json"):
+                    continue
+                path = os.path.join(dir_path, file_name)
+                stat = os.stat(path)
+                self._entries[path] = (stat.st_size, stat.st_mtime)
+                self._size += stat.st_size
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Get a cached response
+        
+        Returns:
+            Optional[dict]: The response as a dict, or None on a miss
+        """
+        path = self._path(key)
+        with self._lock:
+            self._load_index()
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.misses += 1
+                return None
+            now = time.time()
+            os.utime(path, (now, now))
+            self._entries[path] = (self._entries.get(path, (os.path.getsize(path), now))[0], now)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, response: dict) -> None:
+        """Store a response and evict the least recently used entries if the cache is full"""
+        path = self._path(key)
+        data = json.dumps(response, ensure_ascii=False)
+        with self._lock:
+            self._load_index()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            
+            previous_size = self._entries.get(path, (0, 0))[0]
+            size = os.path.getsize(path)
+            self._entries[path] = (size, time.time())
+            self._size += size - previous_size
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        """Remove a response from the cache, if present"""
+        path = self._path(key)
+        with self._lock:
+            self._load_index()
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size, _ = self._entries.pop(path, (0, 0))
+            self._size -= size
+
+    def _evict(self) -> None:
+        if self._size <= self.max_size_bytes:
+            return
+        for path, (size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._size <= self.max_size_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            del self._entries[path]
+            self._size -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: hits, misses, evictions, number of entries and size in bytes
+        """
+        with self._lock:
+            self._load_index()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+            }
+
+
+_caches: Dict[str, LLMCache] = {}
+_caches_lock = threading.Lock()
+
+def get_cache() -> Optional[LLMCache]:
+    """
+    Get the response cache of the current project
+    
+    Returns:
+        Optional[LLMCache]: The cache, or None if `llm_cache.enabled` is false
+    """
+    if not config.get_config('llm_cache.enabled', True):
+        return None
+    cache_dir = config.get_path('llm_cache_dir')
+    with _caches_lock:
+        if cache_dir not in _caches:
+            max_size_mb = config.get_config('llm_cache.max_size_mb', 200)
+            _caches[cache_dir] = LLMCache(cache_dir, int(max_size_mb * 1024 * 1024))
+        return _caches[cache_dir]
+
+
+def print_cache_stats() -> None:
+    """Print the hit/miss counters of the response cache"""
+    cache = get_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions "
+              f"({stats['entries']} entries, {stats['size_bytes'] / (1024 * 1024):.1f} MB)")
+
+
+def test_llm_cache():
+    """Check hits, misses and least recently used eviction"""
+    import tempfile
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        response = {"choices": [{"message": {"content": "x" * 100}}]}
+        cache = LLMCache(cache_dir, max_size_bytes=3 * len(json.dumps(response)))
+        keys = [LLMCache.make_key("gpt-4o", 0.2, [{"role": "user", "content": f"Question {i}"}]) for i in range(4)]
+        assert len(set(keys)) == 4, "Different prompts must have different keys"
+        assert keys[0] == LLMCache.make_key("gpt-4o", 0.2, [{"role": "user", "content": "Question 0"}]), "Keys must be stable"
+        assert keys[0] != LLMCache.make_key("gpt-4o", 0.2, [{"role": "user", "content": "Question 0"}], base_url="https://openrouter.ai/api/v1"), \
+            "Providers must not share responses"
+        
+        assert cache.get(keys[0]) is None
+        for key in keys[:3]:
+            cache.put(key, response)
+            time.sleep(0.01)
+        assert cache.get(keys[0]) == response
+        time.sleep(0.01)
+        # keys[1] is now the least recently used entry
+        cache.put(keys[3], response)
+        assert cache.get(keys[1]) is None, "Least recently used entry was not evicted"
+        assert cache.get(keys[0]) == response
+        
+        stats = cache.stats()
+        assert stats["evictions"] == 1 and stats["entries"] == 3
+        assert stats["hits"] == 2 and stats["misses"] == 2
+        
+        # a new instance sees the entries left on disk
+        assert LLMCache(cache_dir, cache.max_size_bytes).get(keys[3]) == response
+        print(f"LLM cache: {stats}")
+
+
+if __name__ == "__main__":
+    test_llm_cache()
@@ -0,0 +1,78 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+from openai import OpenAI
+from user_research_helper.campaign.config import config
+
+
+PROVIDERS = {
+    "openai": {"base_url": None, "api_key_env": "OPENAI_API_KEY"},
+    "openrouter": {"base_url": "https://openrouter.ai/api/v1", "api_key_env": "OPENROUTER_API_KEY"},
+}
+
+_clients: Dict[Tuple, OpenAI] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(provider: Optional[str] = None) -> OpenAI:
+    """
+    Get the OpenAI client shared by all the LLM calls of the run
+
+    The client is created once per provider and settings, so every call reuses the same
+    connection pool and keep-alive connections instead of opening new ones (and redoing the
+    TLS handshake). It is thread safe and used by all the worker threads. Settings (config `llm`):
+        - provider: `openai` (default, honors OPENAI_BASE_URL) or `openrouter`
+        - timeout, connect_timeout: seconds before a request or a connection attempt fails
+        - max_connections: connections open at the same time to the provider
+        - max_keepalive_connections, keepalive_expiry: idle connections kept for reuse and for how long
+    Retries are not done by the client but by `create_chat_completion`.
+
+    Args:
+        provider: Provider name (default: config `llm.provider`)
+
+    Returns:
+        OpenAI: The shared client
+
+    Raises:
+        ValueError: If the provider is unknown
+    """
+    provider = provider or config.get_config('llm.provider', 'openai')
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {provider} (expected one of {list(PROVIDERS)})")
+    base_url = PROVIDERS[provider]["base_url"] or os.environ.get("OPENAI_BASE_URL")
+    api_key = os.environ.get(PROVIDERS[provider]["api_key_env"])
+    timeout = config.get_config('llm.timeout', 120.0)
+    connect_timeout = config.get_config('llm.connect_timeout', 10.0)
+    max_connections = config.get_config('llm.max_connections', 20)
+    max_keepalive_connections = config.get_config('llm.max_keepalive_connections', max_connections)
+    keepalive_expiry = config.get_config('llm.keepalive_expiry', 30.0)
+
+    key = (provider, base_url, api_key, timeout, connect_timeout, max_connections, max_keepalive_connections, keepalive_expiry)
+    with _clients_lock:
+        if key not in _clients:
+            http_client = httpx.Client(
+                timeout=httpx.Timeout(timeout, connect=connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive_connections,
+                    keepalive_expiry=keepalive_expiry,
+                ),
+            )
+            _clients[key] = OpenAI(
+                base_url=base_url,
+                api_key=api_key,
+                http_client=http_client,
+                timeout=httpx.Timeout(timeout, connect=connect_timeout),
+                max_retries=0,
+            )
+        return _clients[key]
+
+
+def close_clients() -> None:
+    """Close the shared clients and their connections"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
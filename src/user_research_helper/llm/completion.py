@@ -0,0 +1,150 @@
+import random
+import threading
+import time
+from typing import Any, Callable, Optional
+from openai import OpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+from openai.types.chat import ChatCompletion
+from user_research_helper.campaign.config import config
+from user_research_helper.llm.cache import LLMCache, get_cache
+from user_research_helper.llm.rate_limit import estimate_request_tokens, get_rate_limiter
+
+
+class LLMCallError(Exception):
+    """
+    An LLM call failed after all its retries (rate limits, timeouts, server errors) or its
+    response could not be used. The work item is left unanswered and retried by the next run.
+    """
+
+
+_last_call = threading.local()
+
+
+def last_call_info() -> dict:
+    """
+    Retries and cache hit of the last create_chat_completion of the current thread
+    
+    Returns:
+        dict: {"retries": int, "from_cache": bool}
+    """
+    return {
+        "retries": getattr(_last_call, "retries", 0),
+        "from_cache": getattr(_last_call, "from_cache", False),
+    }
+
+
+def _retry_delay(error: Exception, attempt: int, base: float, cap: float) -> float:
+    """
+    Compute the wait before the next attempt: the server's Retry-After when provided,
+    otherwise a full-jitter exponential backoff
+    """
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), cap)
+            except ValueError:
+                pass
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def create_completion_with_backoff(client: OpenAI, **kwargs) -> ChatCompletion:
+    """
+    Call chat.completions.create, retrying rate limits and transient errors
+    
+    Every attempt first waits for the shared rate limiter (config `llm.requests_per_minute`,
+    `llm.tokens_per_minute`). A rate-limited attempt pauses all the callers for the
+    server's Retry-After, or a jittered exponential backoff.
+    
+    Args:
+        client: OpenAI client
+        **kwargs: Arguments passed to chat.completions.create
+        
+    Returns:
+        ChatCompletion: The API response
+        
+    Raises:
+        LLMCallError: Once llm.max_retries attempts are exhausted
+    """
+    max_retries = config.get_config('llm.max_retries', 5)
+    backoff_base = config.get_config('llm.backoff_base', 1.0)
+    backoff_max = config.get_config('llm.backoff_max', 60.0)
+    limiter = get_rate_limiter()
+    estimated_tokens = estimate_request_tokens(kwargs.get("messages"), kwargs.get("max_tokens"))
+    
+    for attempt in range(max_retries + 1):
+        _last_call.retries = attempt
+        limiter.acquire(estimated_tokens)
+        try:
+            response = client.chat.completions.create(**kwargs)
+        except (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError) as e:
+            if attempt == max_retries:
+                raise LLMCallError(f"{type(e).__name__} after {attempt + 1} attempts: {str(e)}") from e
+            delay = _retry_delay(e, attempt, backoff_base, backoff_max)
+            if config.should_debug('verbose'):
+                print(f"{type(e).__name__}, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+            if isinstance(e, RateLimitError):
+                # the next acquire waits for the pause, with every other caller
+                limiter.throttle(delay)
+            else:
+                time.sleep(delay)
+            continue
+        usage = getattr(response, "usage", None)
+        limiter.record_success(estimated_tokens, getattr(usage, "total_tokens", None))
+        return response
+
+
+def create_chat_completion(
+    client: OpenAI, validate: Optional[Callable[[ChatCompletion], Any]] = None, **kwargs
+) -> ChatCompletion:
+    """
+    Single entry point of all the LLM calls of the pipeline.
+    
+    Responses are looked up in the project response cache before calling the API
+    (with retries), and stored in it once `validate` accepted them: a response that
+    cannot be used is not cached, so the next run asks for it again.
+    
+    Args:
+        client: OpenAI client
+        validate: Checks the content of a response, raising LLMCallError if it cannot be used
+        **kwargs: Arguments passed to chat.completions.create
+        
+    Returns:
+        ChatCompletion: The API or cached response
+        
+    Raises:
+        LLMCallError: If the request failed or `validate` rejected the response
+    """
+    _last_call.retries = 0
+    _last_call.from_cache = False
+    cache = get_cache()
+    if cache is None:
+        response = create_completion_with_backoff(client, **kwargs)
+        if validate is not None:
+            validate(response)
+        return response
+    
+    key = LLMCache.make_key(
+        model=kwargs.get("model"),
+        temperature=kwargs.get("temperature"),
+        messages=kwargs.get("messages"),
+        response_format=kwargs.get("response_format"),
+        base_url=str(client.base_url),
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        response = ChatCompletion.model_validate(cached)
+        try:
+            if validate is not None:
+                validate(response)
+            _last_call.from_cache = True
+            return response
+        except LLMCallError:
+            # cached before its content was checked
+            cache.delete(key)
+    
+    response = create_completion_with_backoff(client, **kwargs)
+    if validate is not None:
+        validate(response)
+    cache.put(key, response.model_dump(mode="json"))
+    return response
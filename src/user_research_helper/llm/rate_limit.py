@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+from user_research_helper.campaign.config import config
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `per_minute` units per minute, holding at most
+    one minute of units. Reservations may overdraw the bucket: the caller then waits until
+    the debt is refilled, so concurrent callers are served in reservation order.
+    """
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self.available = per_minute
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float, rate_factor: float = 1.0) -> float:
+        """
+        Take `amount` units (capped to the capacity)
+
+        Args:
+            amount: Units taken
+            rate_factor: Share of the nominal refill rate currently allowed
+
+        Returns:
+            float: Seconds to wait before using them
+        """
+        now = time.monotonic()
+        rate = self.per_minute * rate_factor / 60
+        self.available = min(self.capacity, self.available + (now - self._updated) * rate)
+        self._updated = now
+        self.available -= min(amount, self.capacity)
+        return -self.available / rate if self.available < 0 else 0.0
+
+    def refund(self, amount: float) -> None:
+        """Give back units reserved in excess (e.g. estimated tokens that were not used)"""
+        self.available = min(self.capacity, self.available + amount)
+
+
+class RateLimiter:
+    """
+    Paces the LLM calls of all the threads of a run under the provider's limits.
+
+    Each call reserves one request from the requests-per-minute bucket and its estimated
+    tokens from the tokens-per-minute bucket, and waits until both are available. Once the
+    response is known, the token estimate is corrected with the actual usage.
+
+    A rate-limited response pauses every caller for the server's Retry-After (or the
+    backoff delay), not only the one that got it, and halves the allowed rate; the rate
+    then recovers by 5% of the limits after each successful call.
+    """
+
+    MIN_RATE_FACTOR = 0.25
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        """
+        Args:
+            requests_per_minute: Request limit (None or 0 for no limit)
+            tokens_per_minute: Token limit, prompt and completion (None or 0 for no limit)
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.rate_factor = 1.0
+        self.waited = 0.0
+        self.throttled = 0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Wait until a call of about `tokens` tokens can be sent
+
+        Returns:
+            float: Seconds waited
+        """
+        with self._lock:
+            wait = max(0.0, self._paused_until - time.monotonic())
+            if self.requests:
+                wait = max(wait, self.requests.reserve(1, self.rate_factor))
+            if self.tokens and tokens:
+                wait = max(wait, self.tokens.reserve(tokens, self.rate_factor))
+            self.waited += wait
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def record_success(self, estimated_tokens: int = 0, used_tokens: Optional[int] = None) -> None:
+        """Correct the token reservation with the actual usage and let the rate recover"""
+        with self._lock:
+            if self.tokens and used_tokens is not None:
+                if used_tokens < estimated_tokens:
+                    self.tokens.refund(estimated_tokens - used_tokens)
+                else:
+                    self.tokens.reserve(used_tokens - estimated_tokens, self.rate_factor)
+            self.rate_factor = min(1.0, self.rate_factor + 0.05)
+
+    def throttle(self, delay: float) -> None:
+        """Pause every caller for `delay` seconds after a rate-limited response and lower the rate"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self.rate_factor = max(self.MIN_RATE_FACTOR, self.rate_factor / 2)
+            self.throttled += 1
+
+
+def estimate_request_tokens(messages: Optional[List[dict]], max_tokens: Optional[int] = None) -> int:
+    """Rough tokens of a request: about 4 characters per prompt token, plus the expected completion"""
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in messages or [])
+    return prompt_chars // 4 + (max_tokens or config.get_config('llm.expected_completion_tokens', 500))
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the rate limiter shared by all the LLM calls of the current project
+    (config `llm.requests_per_minute` and `llm.tokens_per_minute`)
+    """
+    requests_per_minute = config.get_config('llm.requests_per_minute', 0)
+    tokens_per_minute = config.get_config('llm.tokens_per_minute', 0)
+    key = json.dumps([requests_per_minute, tokens_per_minute])
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = RateLimiter(requests_per_minute, tokens_per_minute)
+        return _limiters[key]
+
+
+def test_rate_limiter():
+    """Requests are paced at the configured rate and a rate-limited response pauses every caller"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60_000)
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: limiter.acquire(100), range(620)))
+    # one minute of requests is available at once, the 20 others come at 10 per second
+    assert 1.5 < time.monotonic() - start < 3, "Requests were not paced at the configured rate"
+
+    limiter = RateLimiter()
+    limiter.throttle(0.3)
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.25, "Callers did not wait for the Retry-After pause"
+    assert limiter.rate_factor == 0.5
+    print(f"Rate limiter OK ({limiter.throttled} pause)")
+
+
+if __name__ == "__main__":
+    test_rate_limiter()
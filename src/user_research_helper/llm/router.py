@@ -0,0 +1,242 @@
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from openai.types.chat import ChatCompletion
+from user_research_helper.campaign.config import config
+from user_research_helper.campaign.metrics import get_metrics
+from user_research_helper.llm.client import get_client
+from user_research_helper.llm.completion import create_chat_completion, last_call_info
+
+
+STAGES = ("extraction", "segment_synthesis", "cross_segment_synthesis")
+DEFAULT_MODEL = "gpt-4o"
+CONFIDENCE_LEVELS = ("low", "medium", "high")
+
+
+def lowest_confidence(content: str) -> Optional[str]:
+    """
+    Lowest `confidence` value found in a JSON response, at any depth
+    (batched extraction answers hold one confidence per question)
+
+    Returns:
+        Optional[str]: low, medium or high, None if the response has no confidence or is not JSON
+    """
+    try:
+        data = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    found = []
+
+    def collect(value):
+        if isinstance(value, dict):
+            if value.get("confidence") in CONFIDENCE_LEVELS:
+                found.append(value["confidence"])
+            for item in value.values():
+                collect(item)
+        elif isinstance(value, list):
+            for item in value:
+                collect(item)
+
+    collect(data)
+    return min(found, key=CONFIDENCE_LEVELS.index) if found else None
+
+
+class ModelRouter:
+    """
+    Chooses the model of each LLM call from its pipeline stage.
+
+    Each stage (`extraction`, `segment_synthesis`, `cross_segment_synthesis`) has a list of
+    model tiers in config `models.<stage>.tiers`, cheapest / fastest first, e.g.
+        {"tiers": [{"model": "gpt-4o-mini"}, {"model": "gpt-4o"}], "escalate_on": ["low"]}
+    A response whose confidence is in `escalate_on` (or that is not valid JSON) is asked
+    again to the next tier; the last tier's response is always kept. A tier may set its
+    `provider` (see llm.client), otherwise `llm.provider` is used.
+
+    Latency, tokens and cost (config `model_prices`, USD per million input / output tokens)
+    are recorded per stage and model to tune the tradeoff, and every call is added to the
+    run metrics (see campaign.metrics).
+    """
+
+    def __init__(self, models: Optional[dict] = None, prices: Optional[dict] = None):
+        """
+        Args:
+            models: Stage settings (config `models`)
+            prices: Prices per model (config `model_prices`), e.g. {"gpt-4o": {"input": 2.5, "output": 10}}
+        """
+        self.models = models or {}
+        self.prices = prices or {}
+        for stage in self.models:
+            if stage not in STAGES:
+                raise ValueError(f"Unknown model stage: {stage} (expected one of {STAGES})")
+        self._stats: Dict[str, Dict[str, dict]] = {}
+        self._lock = threading.Lock()
+
+    def tiers(self, stage: str) -> List[dict]:
+        """Model tiers of a stage, cheapest first"""
+        tiers = self.models.get(stage, {}).get("tiers")
+        return tiers or [{"model": DEFAULT_MODEL}]
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """Cost in USD of a call, 0 if the model has no configured price"""
+        price = self.prices.get(model, {})
+        return (prompt_tokens * price.get("input", 0) + completion_tokens * price.get("output", 0)) / 1_000_000
+
+    def _record(self, stage: str, model: str, latency: float, response: Optional[ChatCompletion], escalated: bool) -> None:
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0
+        get_metrics().llm_call(
+            stage, model, latency, prompt_tokens, completion_tokens, cached_tokens,
+            error=response is None, **last_call_info()
+        )
+        with self._lock:
+            stats = self._stats.setdefault(stage, {}).setdefault(model, {
+                "calls": 0, "errors": 0, "escalations": 0, "latencies": [],
+                "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0,
+            })
+            stats["calls"] += 1
+            stats["errors"] += response is None
+            stats["escalations"] += escalated
+            stats["latencies"].append(latency)
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["cost"] += self.cost(model, prompt_tokens, completion_tokens)
+
+    def complete(
+        self, stage: str, accept: Optional[Callable[[ChatCompletion], bool]] = None,
+        validate: Optional[Callable[[ChatCompletion], Any]] = None, **kwargs
+    ) -> ChatCompletion:
+        """
+        Call the models of a stage until a response is accepted
+
+        Args:
+            stage: Pipeline stage
+            accept: Decides if a response is good enough (default: its lowest confidence is
+                not in the stage's `escalate_on`)
+            validate: Checks that a response can be used, raising LLMCallError otherwise; a
+                rejected response is not cached and counts as a failure of its tier
+            **kwargs: Arguments passed to chat.completions.create, except the model
+
+        Returns:
+            ChatCompletion: The accepted response, or the response of the last tier
+
+        Raises:
+            The error of the last tier if it fails (errors of cheaper tiers escalate)
+        """
+        escalate_on = self.models.get(stage, {}).get("escalate_on", ["low"])
+        if accept is None:
+            def accept(response: ChatCompletion) -> bool:
+                confidence = lowest_confidence(response.choices[0].message.content)
+                return confidence is not None and confidence not in escalate_on
+
+        tiers = self.tiers(stage)
+        for i, tier in enumerate(tiers):
+            last_tier = i == len(tiers) - 1
+            start = time.perf_counter()
+            try:
+                response = create_chat_completion(
+                    get_client(tier.get("provider")), validate, model=tier["model"], **kwargs
+                )
+            except Exception as e:
+                self._record(stage, tier["model"], time.perf_counter() - start, None, not last_tier)
+                if last_tier:
+                    raise
+                print(f"{stage}: {tier['model']} failed ({str(e)}), escalating to {tiers[i + 1]['model']}")
+                continue
+            escalate = not last_tier and not accept(response)
+            self._record(stage, tier["model"], time.perf_counter() - start, response, escalate)
+            if not escalate:
+                return response
+            if config.should_debug('verbose'):
+                print(f"{stage}: low confidence answer from {tier['model']}, escalating to {tiers[i + 1]['model']}")
+
+    def stats(self) -> Dict[str, Dict[str, dict]]:
+        """
+        Per stage and model: calls, errors, escalations, tokens, cost and latency (mean, p50, p95 in seconds)
+        """
+        report = {}
+        with self._lock:
+            for stage, models in self._stats.items():
+                for model, stats in models.items():
+                    latencies = sorted(stats["latencies"])
+                    report.setdefault(stage, {})[model] = {
+                        **{key: value for key, value in stats.items() if key != "latencies"},
+                        "latency_mean": sum(latencies) / len(latencies),
+                        "latency_p50": latencies[len(latencies) // 2],
+                        "latency_p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+                    }
+        return report
+
+
+_routers: Dict[str, ModelRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_router() -> ModelRouter:
+    """Get the model router of the current project (config `models` and `model_prices`)"""
+    models = config.get_config('models', {}) or {}
+    prices = config.get_config('model_prices', {}) or {}
+    key = json.dumps([models, prices], sort_keys=True)
+    with _routers_lock:
+        if key not in _routers:
+            _routers[key] = ModelRouter(models, prices)
+        return _routers[key]
+
+
+def route_chat_completion(
+    stage: str, accept: Optional[Callable[[ChatCompletion], bool]] = None,
+    validate: Optional[Callable[[ChatCompletion], Any]] = None, **kwargs
+) -> ChatCompletion:
+    """
+    Run a chat completion with the models configured for a pipeline stage
+
+    Args:
+        stage: extraction, segment_synthesis or cross_segment_synthesis
+        accept: Decides if a response is good enough, see ModelRouter.complete
+        validate: Checks that a response can be used, see ModelRouter.complete
+        **kwargs: Arguments passed to chat.completions.create, except the model
+    """
+    return get_router().complete(stage, accept, validate, **kwargs)
+
+
+def print_router_stats() -> None:
+    """Print the latency, tokens and cost of every stage and model"""
+    for stage, models in get_router().stats().items():
+        for model, stats in models.items():
+            print(f"{stage} / {model}: {stats['calls']} calls ({stats['escalations']} escalated, {stats['errors']} failed), "
+                  f"latency mean {stats['latency_mean']:.2f}s p95 {stats['latency_p95']:.2f}s, "
+                  f"{stats['prompt_tokens']} + {stats['completion_tokens']} tokens, ${stats['cost']:.4f}")
+
+
+def test_model_escalation():
+    """Escalate low confidence answers of a cheap model to a stronger one against the local mock server"""
+    from user_research_helper.mock.openai_server import MockOpenAIServer
+    from user_research_helper.mock.project import mock_project
+
+    def responder(body):
+        confidence = "low" if body["model"] == "cheap-model" and "hard" in body["messages"][-1]["content"] else "high"
+        return json.dumps({"analysis": f"Answer of {body['model']}", "confidence": confidence})
+
+    with MockOpenAIServer(responder=responder) as mock_server, \
+            mock_project({
+                    "models": {"segment_synthesis": {"tiers": [{"model": "cheap-model"}, {"model": "strong-model"}]}},
+                    "model_prices": {"cheap-model": {"input": 0.15, "output": 0.6}, "strong-model": {"input": 2.5, "output": 10}},
+                    "llm_cache": {"enabled": False},
+                }, openai_server=mock_server):
+
+        answers = [
+            json.loads(route_chat_completion("segment_synthesis", messages=[{"role": "user", "content": prompt}]).choices[0].message.content)
+            for prompt in ["easy question", "hard question", "easy question"]
+        ]
+        assert [a["analysis"] for a in answers] == ["Answer of cheap-model", "Answer of strong-model", "Answer of cheap-model"]
+        stats = get_router().stats()["segment_synthesis"]
+        assert stats["cheap-model"]["calls"] == 3 and stats["cheap-model"]["escalations"] == 1
+        assert stats["strong-model"]["calls"] == 1 and stats["strong-model"]["cost"] > 0
+        print_router_stats()
+
+
+if __name__ == "__main__":
+    test_model_escalation()
@@ -0,0 +1,188 @@
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+
+def fake_utterances(audio: bytes, turn_ms: int = 5000) -> List[dict]:
+    """
+    Build the utterances of a fake transcription
+
+    Fake audio files may contain UTF-8 lines `Speaker X: text`, which become the utterances.
+    Any other content gives a short two-speaker exchange.
+
+    Args:
+        audio: Uploaded file content
+        turn_ms: Duration of each utterance
+
+    Returns:
+        List[dict]: Utterances in the AssemblyAI response format
+    """
+    try:
+        lines = re.findall(r"^Speaker (\w+): (.+)$", audio.decode("utf-8"), re.MULTILINE)
+    except UnicodeDecodeError:
+        lines = []
+    if not lines:
+        lines = [("A", "How many cups of coffee do you drink per day?"), ("B", "About two cups each morning.")]
+    return [
+        {
+            "speaker": speaker,
+            "text": text,
+            "start": i * turn_ms,
+            "end": (i + 1) * turn_ms - 200,
+            "confidence": 0.95,
+            "words": [],
+        }
+        for i, (speaker, text) in enumerate(lines)
+    ]
+
+
+class MockAssemblyAIServer:
+    """
+    Local fake of the AssemblyAI upload, submit and poll endpoints.
+
+    Set `assemblyai.settings.base_url` to `base_url` to transcribe without network access.
+    Jobs stay `processing` for `processing_seconds` after their submission.
+    """
+
+    def __init__(
+        self,
+        upload_latency: float = 0.0,
+        processing_seconds: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Args:
+            upload_latency: Seconds taken by each upload
+            processing_seconds: Seconds before a submitted job is completed
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+        """
+        self.upload_latency = upload_latency
+        self.processing_seconds = processing_seconds
+        self.upload_count = 0
+        self.submit_count = 0
+        self.poll_count = 0
+        self._files = {}
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        """Start serving in a background thread and return the base URL"""
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self) -> None:
+        """Stop the server"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _transcript(self, job_id: str) -> dict:
+        job = self._jobs[job_id]
+        response = {"id": job_id, "audio_url": job["audio_url"], "status": "queued"}
+        if time.time() - job["submitted"] >= self.processing_seconds:
+            audio = self._files.get(job["audio_url"].rsplit("/", 1)[-1], b"")
+            utterances = fake_utterances(audio)
+            response.update({
+                "status": "completed",
+                "text": " ".join(u["text"] for u in utterances),
+                "utterances": utterances,
+                "audio_duration": utterances[-1]["end"] // 1000 + 1,
+            })
+        elif time.time() - job["submitted"] > 0:
+            response["status"] = "processing"
+        return response
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep connections open between requests, like the real API
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _read_body(self) -> bytes:
+                if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                    body = b""
+                    while True:
+                        size = int(self.rfile.readline().strip(), 16)
+                        if size == 0:
+                            self.rfile.readline()
+                            return body
+                        body += self.rfile.read(size)
+                        self.rfile.readline()
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_POST(self):
+                body = self._read_body()
+                if self.path == "/v2/upload":
+                    if server.upload_latency:
+                        time.sleep(server.upload_latency)
+                    file_id = uuid.uuid4().hex
+                    with server._lock:
+                        server.upload_count += 1
+                        server._files[file_id] = body
+                    self._send_json(200, {"upload_url": f"{server.base_url}/files/{file_id}"})
+                elif self.path == "/v2/transcript":
+                    request = json.loads(body or b"{}")
+                    job_id = uuid.uuid4().hex
+                    with server._lock:
+                        server.submit_count += 1
+                        server._jobs[job_id] = {"audio_url": request.get("audio_url", ""), "submitted": time.time()}
+                        response = server._transcript(job_id)
+                    self._send_json(200, response)
+                else:
+                    self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+            def do_GET(self):
+                match = re.fullmatch(r"/v2/transcript/(\w+)", self.path)
+                with server._lock:
+                    if match and match.group(1) in server._jobs:
+                        server.poll_count += 1
+                        response = server._transcript(match.group(1))
+                    else:
+                        response = None
+                if response is None:
+                    self._send_json(404, {"error": f"Transcript not found: {self.path}"})
+                else:
+                    self._send_json(200, response)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    with MockAssemblyAIServer(upload_latency=0.2, processing_seconds=5) as mock_server:
+        print(f"Mock AssemblyAI server listening on {mock_server.base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
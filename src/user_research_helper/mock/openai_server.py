@@ -0,0 +1,199 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+
+BATCH_QUESTION_PATTERN = re.compile(r"^\s*Question (\S+): ", re.MULTILINE)
+
+
+def default_responder(body: dict) -> str:
+    """
+    Build a deterministic JSON answer compatible with every prompt of the pipeline
+    (single or batched answer extraction and segment / cross-segment synthesis)
+
+    Args:
+        body: Decoded chat completion request
+
+    Returns:
+        str: Content of the assistant message
+    """
+    last_message = body["messages"][-1]["content"] if body.get("messages") else ""
+    answer = {
+        "found": True,
+        "answer": f"Mock answer ({len(last_message)} chars of prompt)",
+        "confidence": "high",
+        "quote": "",
+        "analysis": "Mock synthesis",
+    }
+    batch_question_ids = BATCH_QUESTION_PATTERN.findall(last_message)
+    if batch_question_ids:
+        return json.dumps({question_id: answer for question_id in batch_question_ids})
+    return json.dumps(answer)
+
+
+class MockOpenAIServer:
+    """
+    Local OpenAI-compatible server answering /v1/chat/completions with canned responses.
+
+    Point an OpenAI client to `base_url` (or set OPENAI_BASE_URL) to run the pipeline
+    without network access. Latency and rate limiting can be simulated.
+    Prompt caching is simulated like OpenAI's: the longest prefix shared with a previous
+    request is reported as `cached_tokens`, by steps of 128 tokens above 1024 tokens.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rate_limit_every: int = 0,
+        retry_after: float = 0.1,
+        fail_every: int = 0,
+        responder: Optional[Callable[[dict], str]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Args:
+            latency: Seconds to wait before answering each request
+            rate_limit_every: Answer every Nth request with a 429 (0 to disable)
+            retry_after: Value of the Retry-After header sent with 429 responses
+            fail_every: Answer every Nth request with a 500 server error (0 to disable)
+            responder: Function building the assistant content from the request body
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+        """
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.fail_every = fail_every
+        self.responder = responder or default_responder
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self.failed_count = 0
+        self._prompts = []
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> str:
+        """Start serving in a background thread and return the base URL"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        """Stop the server"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep connections open between requests, like the real API
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+
+                with server._lock:
+                    server.request_count += 1
+                    count = server.request_count
+                    server._in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server._in_flight)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+
+                    if server.rate_limit_every and count % server.rate_limit_every == 0:
+                        with server._lock:
+                            server.rate_limited_count += 1
+                        self._send_json(
+                            429,
+                            {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                            headers={"Retry-After": str(server.retry_after)},
+                        )
+                        return
+
+                    if server.fail_every and count % server.fail_every == 0:
+                        with server._lock:
+                            server.failed_count += 1
+                        self._send_json(500, {"error": {"message": "Simulated server error", "type": "server_error"}})
+                        return
+
+                    content = server.responder(body)
+                    prompt = "".join(str(m.get("content", "")) for m in body.get("messages", []))
+                    prompt_tokens = max(1, len(prompt) // 4)
+                    with server._lock:
+                        cached_chars = max((len(os.path.commonprefix([prompt, p])) for p in server._prompts), default=0)
+                        server._prompts = server._prompts[-255:] + [prompt]
+                    cached_tokens = cached_chars // 4 // 128 * 128 if cached_chars // 4 >= 1024 else 0
+                    completion_tokens = max(1, len(content) // 4)
+                    self._send_json(200, {
+                        "id": f"chatcmpl-{uuid.uuid4().hex}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "mock"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {
+                            "prompt_tokens": prompt_tokens,
+                            "completion_tokens": completion_tokens,
+                            "total_tokens": prompt_tokens + completion_tokens,
+                            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                        },
+                    })
+                finally:
+                    with server._lock:
+                        server._in_flight -= 1
+
+        return Handler
+
+
+if __name__ == "__main__":
+    with MockOpenAIServer(latency=0.2) as mock_server:
+        print(f"Mock OpenAI server listening on {mock_server.base_url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
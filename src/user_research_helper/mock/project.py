@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from user_research_helper.campaign.config import config
+
+
+def write_config(root_dir: str, settings: dict) -> None:
+    """Write the config.json of a project and initialize the configuration on it"""
+    with open(os.path.join(root_dir, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump(settings, f)
+    config.initialize(root_dir)
+
+
+@contextmanager
+def mock_project(settings: dict, openai_server=None, assemblyai_server=None) -> Iterator[str]:
+    """
+    Temporary project of a test, wired to the local mock servers
+
+    The configuration is initialized on a temporary directory holding `settings` as its
+    config.json, and the OpenAI and AssemblyAI clients are pointed to the mock servers given.
+    On exit, the environment variables, the AssemblyAI base URL and the configuration of the
+    process are restored and the directory is removed, so the test leaves no global state.
+
+    Args:
+        settings: Content of config.json
+        openai_server: MockOpenAIServer used through OPENAI_BASE_URL
+        assemblyai_server: MockAssemblyAIServer used through the AssemblyAI settings
+
+    Yields:
+        str: Root directory of the project
+    """
+    previous_config = config.save_state()
+    previous_environ = {key: os.environ.get(key) for key in ("OPENAI_BASE_URL", "OPENAI_API_KEY", "ASSEMBLYAI_API_KEY")}
+    aai_settings: Optional[object] = None
+    previous_aai_base_url = None
+    try:
+        with tempfile.TemporaryDirectory() as root_dir:
+            write_config(root_dir, settings)
+            if openai_server is not None:
+                os.environ["OPENAI_BASE_URL"] = openai_server.base_url
+                os.environ.setdefault("OPENAI_API_KEY", "mock")
+            if assemblyai_server is not None:
+                import assemblyai as aai
+                aai_settings = aai.settings
+                previous_aai_base_url = aai_settings.base_url
+                aai_settings.base_url = assemblyai_server.base_url
+                os.environ.setdefault("ASSEMBLYAI_API_KEY", "mock")
+            yield root_dir
+    finally:
+        if aai_settings is not None:
+            aai_settings.base_url = previous_aai_base_url
+        for key, value in previous_environ.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        config.restore_state(previous_config)
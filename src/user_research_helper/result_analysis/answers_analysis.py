@@ -1,11 +1,31 @@
 from typing import List, Dict, Optional
 import json
-import openai
-import os
 from user_research_helper.campaign.config import config
+from user_research_helper.llm.completion import LLMCallError
+from user_research_helper.llm.router import route_chat_completion
 
 from user_research_helper.result_analysis.data import SegmentDataset, SegmentAnswer, Confidence
 
+def parse_synthesis(content: str) -> dict:
+    """
+    Parse a synthesis response: a JSON object with an analysis and a confidence
+    
+    Raises:
+        LLMCallError: If the response does not have this structure
+    """
+    try:
+        parsed = json.loads(content)
+    except (json.JSONDecodeError, TypeError) as e:
+        raise LLMCallError(f"Invalid synthesis: {str(e)}") from e
+    if not isinstance(parsed, dict) or "analysis" not in parsed \
+            or str(parsed.get("confidence")).upper() not in Confidence.__members__:
+        raise LLMCallError(f"Invalid synthesis: {str(content)[:200]}")
+    return parsed
+
+def validate_synthesis(response) -> None:
+    """Reject a synthesis response that parse_synthesis cannot read, before it is cached"""
+    parse_synthesis(response.choices[0].message.content)
+
 def generate_segment_synthesis(
     segment_name: str,
     question_text: str,
@@ -19,17 +39,10 @@ def generate_segment_synthesis(
         question_text: Text of the question
         answers: List of answers for this question
         llm_answer_analysis_context: Context for LLM analysis
+        
+    Raises:
+        LLMCallError: If the request failed or its response is not a valid synthesis
     """
-    openrouter = False
-    if openrouter:
-        client = openai.OpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=os.environ.get("OPENROUTER_API_KEY"),
-            )
-    else : 
-        client = openai.OpenAI()
-    
-    
     prompt = f"""
     You are a researcher analyzing user responses to a usage of a product.
     
@@ -61,23 +74,16 @@ def generate_segment_synthesis(
     }}
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            #model="google/gemini-flash-1.5-8b",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.4,
-            response_format={"type": "json_object"}
-        )
-        parsed_reponse = json.loads(response.choices[0].message.content)
-        print(parsed_reponse)
-        return parsed_reponse
-    except Exception as e:
-        print(f"Error generating synthesis: {str(e)}")
-        return {
-            "analysis": f"Error generating synthesis: {str(e)}",
-            "confidence": "low"
-        }
+    response = route_chat_completion(
+        "segment_synthesis",
+        messages=[{"role": "user", "content": prompt}],
+        validate=validate_synthesis,
+        temperature=0.4,
+        response_format={"type": "json_object"}
+    )
+    parsed_reponse = parse_synthesis(response.choices[0].message.content)
+    print(parsed_reponse)
+    return parsed_reponse
 
 def analyze_segment_answers(
     segment_answer: SegmentAnswer,
@@ -90,6 +96,9 @@ def analyze_segment_answers(
         segment_answer: SegmentAnswer object containing the answers and metadata
         question_text: The text of the question being analyzed
         llm_answer_analysis_context: Context for LLM analysis
+        
+    Raises:
+        LLMCallError: If the synthesis failed, the SegmentAnswer is then left unchanged
     """
     synthesis = generate_segment_synthesis(
         segment_name=segment_answer.segment_name,
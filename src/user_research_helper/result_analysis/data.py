@@ -198,6 +198,8 @@ class ResultAnalysis(BaseModel):
     analysis: str = Field(..., description="Analysis summary across all segments")
     quotes: Optional[str] = Field(default="", description="Quotes postfixed by segments name enclosed in square brackets and parenthesis")
     confidence: Optional[Confidence] = Field(None, description="Confidence in the summary")
+    status: str = Field(default="answered", description="answered, or failed when the synthesis failed and must be retried")
+    error: Optional[str] = Field(default=None, description="Error of a failed synthesis")
     
     @field_validator('confidence')
     @classmethod
@@ -1,18 +1,25 @@
 
 
+from user_research_helper.campaign.build_state import fingerprint, get_build_state, settings_fingerprint
 from user_research_helper.campaign.config import config
-from typing import List, Tuple
+from user_research_helper.campaign.journal import ResultJournal
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import shutil
 import os
+import time
+from user_research_helper.campaign.metrics import get_metrics, print_run_summary, start_run
 from user_research_helper.result_analysis.transcript_report_parsing import parse_transcript_report, create_segment_dataset_from_interview_dataset
-from user_research_helper.result_analysis.data import SegmentAnswer
+from user_research_helper.result_analysis.data import SegmentAnswer, SegmentDataset
 import json
 from user_research_helper.result_analysis.segment_report_builder import create_excel_report
 from user_research_helper.result_analysis.segment_report_parsing import parse_segment_report
-from user_research_helper.result_analysis.result_analysis import analyze_question_across_segments
+from user_research_helper.result_analysis.result_analysis import analyze_questions_across_segments
 from user_research_helper.result_analysis.result_report_builder import create_result_report
 from user_research_helper.result_analysis.quote_addition import add_quotes_from_excel
 from user_research_helper.result_analysis.result_analysis import ResultAnalysis
+from user_research_helper.llm.cache import print_cache_stats
+from user_research_helper.llm.router import print_router_stats
 from docx import Document
 from docx.shared import Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -20,6 +27,160 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH
 
 
 
+def load_segment_answers(segment_file: str) -> Dict[str, SegmentAnswer]:
+    """
+    Load the analyzed answers of a segment
+    
+    Args:
+        segment_file: Path to the segment JSON file
+        
+    Returns:
+        Dict[str, SegmentAnswer]: Answers keyed by question ID
+    """
+    with open(segment_file, 'r', encoding='utf-8') as f:
+        segment_summary = json.load(f)
+    return {
+        qid: SegmentAnswer.model_validate({
+            **answer_data,
+            # Handle case where answer_summary is an object
+            "answer_summary": "\n".join(answer_data["answer_summary"].values()) 
+            if isinstance(answer_data["answer_summary"], dict) 
+            else answer_data["answer_summary"]
+        }) 
+        for qid, answer_data in segment_summary['answers'].items()
+    }
+
+
+def analyze_segments(
+    segment_dataset: SegmentDataset,
+    segment_dir: str,
+    max_workers: Optional[int] = None,
+    retries: Optional[int] = None
+) -> None:
+    """
+    Synthesize the answers of every (segment, question) pair of the dataset
+    
+    Pairs are independent requests, so up to `max_workers` of them (config
+    `concurrency.synthesis_workers`, default 1) are in flight at the same time, across
+    segments. A failed pair is resubmitted up to `retries` times (config
+    `concurrency.synthesis_retries`, default 2) while the other pairs go on.
+    
+    Each segment is saved to `<segment_dir>/<segment>.json`, answers in question order,
+    as soon as all its pairs are done. Segments saved with the same answers, questions and
+    synthesis settings (see BuildState) are loaded instead of analyzed, and answers of an
+    interrupted run are recovered from the segment journal. A segment with a pair that
+    still fails is not saved, so the next run retries it.
+    
+    Every attempt of a pair is timed in the `segment_synthesis` run metrics, and the bytes
+    written per segment in `segment_files`.
+    
+    Args:
+        segment_dataset: Dataset updated in place with the syntheses
+        segment_dir: Directory of the segment files
+        max_workers: Maximum number of pairs analyzed at the same time
+        retries: Maximum number of retries of a failed pair
+    """
+    from user_research_helper.result_analysis.answers_analysis import analyze_segment_answers
+    if max_workers is None:
+        max_workers = config.get_config('concurrency.synthesis_workers', 1)
+    if retries is None:
+        retries = config.get_config('concurrency.synthesis_retries', 2)
+    question_texts = {q.id: q.text for q in segment_dataset.questions}
+    
+    journals: Dict[str, ResultJournal] = {}
+    state = get_build_state()
+    settings = settings_fingerprint("segment_synthesis")
+    segment_inputs: Dict[str, Dict[str, str]] = {}
+    remaining: Dict[str, int] = {}
+    failed: Dict[str, List[str]] = {}
+    pending_pairs: List[Tuple[str, str]] = []
+    
+    def save_segment(segment_name: str) -> None:
+        if segment_name in failed:
+            print(f"Segment {segment_name} not saved: synthesis failed for {', '.join(failed[segment_name])}, rerun to retry")
+            return
+        with get_metrics().timed("segment_files", segment_name) as record:
+            journals[segment_name].compact({
+                "segment_name": segment_name,
+                "answers": {
+                    qid: answer.model_dump() 
+                    for qid, answer in segment_dataset.segments[segment_name].items()
+                }
+            })
+            record["bytes_written"] = journals[segment_name].bytes_written
+        state.record(f"segment/{segment_name}", segment_inputs[segment_name], [journals[segment_name].output_path])
+        if config.should_debug('verbose'):
+            print(f"Segment {segment_name} analyzed and saved to {journals[segment_name].output_path}")
+    
+    for segment_name, segment_answers in segment_dataset.segments.items():
+        segment_file = os.path.join(segment_dir, f"{segment_name}.json")
+        node = f"segment/{segment_name}"
+        segment_inputs[segment_name] = {
+            "answers": fingerprint([
+                (question_id, question_texts[question_id], answer.rough_answers)
+                for question_id, answer in segment_answers.items()
+            ]),
+            "settings": settings,
+        }
+        if state.is_up_to_date(node, segment_inputs[segment_name], [segment_file]):
+            if config.should_debug('verbose'):
+                print(f"Segment {segment_name} already analyzed")
+            segment_dataset.segments[segment_name] = load_segment_answers(segment_file)
+            continue
+        
+        # Answers analyzed by an interrupted run are recovered from the journal,
+        # unless they were analyzed from other answers or settings
+        journals[segment_name] = ResultJournal(segment_file)
+        changes = state.changes(node, segment_inputs[segment_name], [segment_file])
+        if changes and changes & set(segment_inputs[segment_name]):
+            journals[segment_name].discard()
+            state.record(node, segment_inputs[segment_name], complete=False)
+        journaled_answers = journals[segment_name].load()
+        remaining[segment_name] = 0
+        for question_id in segment_answers:
+            if question_id in journaled_answers:
+                segment_answers[question_id] = SegmentAnswer.model_validate(journaled_answers[question_id])
+            else:
+                pending_pairs.append((segment_name, question_id))
+                remaining[segment_name] += 1
+        if remaining[segment_name] == 0:
+            save_segment(segment_name)
+    
+    def analyze_pair(segment_name: str, question_id: str, queued_at: float) -> bool:
+        with get_metrics().timed("segment_synthesis", f"{segment_name}/{question_id}", queued_at) as record:
+            try:
+                analyze_segment_answers(segment_dataset.segments[segment_name][question_id], question_texts[question_id])
+                record["ok"] = True
+            except Exception as e:
+                print(f"Error analyzing {question_id} for segment {segment_name}: {str(e)}")
+                record["ok"] = False
+            return record["ok"]
+    
+    if pending_pairs:
+        print(f"Analyzing {len(pending_pairs)} segment answers ({max(1, max_workers)} at a time)...")
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures: Dict[Future, Tuple[str, str, int]] = {}
+        for segment_name, question_id in pending_pairs:
+            futures[executor.submit(analyze_pair, segment_name, question_id, time.perf_counter())] = (segment_name, question_id, 0)
+        
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                segment_name, question_id, attempt = futures.pop(future)
+                if not future.result():
+                    if attempt < retries:
+                        print(f"Retrying {question_id} for segment {segment_name} ({attempt + 1}/{retries})")
+                        futures[executor.submit(analyze_pair, segment_name, question_id, time.perf_counter())] = (segment_name, question_id, attempt + 1)
+                        continue
+                    failed.setdefault(segment_name, []).append(question_id)
+                else:
+                    # Save progress after each answer
+                    journals[segment_name].append(question_id, segment_dataset.segments[segment_name][question_id].model_dump())
+                remaining[segment_name] -= 1
+                if remaining[segment_name] == 0:
+                    save_segment(segment_name)
+
+
 def process_analysis(
     root_dir: str = "data"
 ) -> None:
@@ -32,6 +193,7 @@ def process_analysis(
     try:
         # Initialize configuration
         config.initialize(root_dir)
+        metrics = start_run("process_analysis")
         if config.should_debug('verbose'):
             print(f"Initialized configuration:")
             print(f"  Root directory: {config.root_dir}")
@@ -45,6 +207,8 @@ def process_analysis(
         # files used between steps
         segment_report_file = os.path.join(segment_dir, "segment_analysis_report.xlsx")
         question_synthesis_json_file = os.path.join(analysis_dir, "results.json")
+        # build records of the files, to skip the steps whose inputs did not change
+        state = get_build_state()
         
         #########
         ## step 1 - segment summaries
@@ -52,74 +216,58 @@ def process_analysis(
         if (config.get_config('do_segment_summaries', False)):
             transcript_report_file = os.path.join(analysis_dir, "transcript_analysis_report.xlsx")  
             
-            interview_dataset = parse_transcript_report(transcript_report_file)
+            with get_metrics().timed("transcript_report_parsing", os.path.basename(transcript_report_file)):
+                interview_dataset = parse_transcript_report(transcript_report_file)
             
-            # dump interview dataset to json
-            interview_dataset_json_file = os.path.join(segment_dir, "interview_dataset.json")
-            with open(interview_dataset_json_file, 'w', encoding='utf-8') as f:
-                json.dump(interview_dataset.model_dump(), f, ensure_ascii=False, indent=2)
-                
             segment_dataset = create_segment_dataset_from_interview_dataset(interview_dataset)
-            # dump segment dataset to json
-            segment_dataset_json_file = os.path.join(segment_dir, "segment_dataset.json")
-            with open(segment_dataset_json_file, 'w', encoding='utf-8') as f:
-                json.dump(segment_dataset.model_dump(), f, ensure_ascii=False, indent=2)
-            
-            # For each segment, analyze answers if not already done
-            from user_research_helper.result_analysis.answers_analysis import analyze_segment_answers
-            for segment_name, segment_answers in segment_dataset.segments.items():
-                segment_file = os.path.join(segment_dir, f"{segment_name}.json")
-                if not os.path.exists(segment_file):
-                    # Get question texts
-                    question_texts = {q.id: q.text for q in segment_dataset.questions}
-                    
-                    # Analyze each answer in the segment
-                    for question_id, answer in segment_answers.items():
-                        analyze_segment_answers(answer, question_texts[question_id])
-                        # Save progress after each answer
-                        with open(segment_file, 'w', encoding='utf-8') as f:
-                            json.dump({
-                                "segment_name": segment_name,
-                                "answers": {
-                                    qid: answer.model_dump() 
-                                    for qid, answer in segment_answers.items()
-                                }
-                            }, f, ensure_ascii=False, indent=2)
-                        if config.should_debug('verbose'):
-                            print(f"Segment {segment_name} analyzed and saved to {segment_file}")
-                    else :
-                        if config.should_debug('verbose'):
-                            print(f"Segment {segment_name} already analyzed")
-                        #load segment summary from json
-                        with open(segment_file, 'r', encoding='utf-8') as f:
-                            segment_summary = json.load(f)
-                            segment_dataset.segments[segment_name] = {
-                            qid: SegmentAnswer.model_validate({
-                                **answer_data,
-                                # Handle case where answer_summary is an object
-                                "answer_summary": "\n".join(answer_data["answer_summary"].values()) 
-                                if isinstance(answer_data["answer_summary"], dict) 
-                                else answer_data["answer_summary"]
-                            }) 
-                            for qid, answer_data in segment_summary['answers'].items()
-                        }
-            
-            # dump segment dataset to excel
-            create_excel_report(segment_dataset, segment_report_file)
-            if config.should_debug('verbose'):
-                print(f"Segment report saved to {segment_report_file} ")
+            if config.should_debug('dump_datasets'):
+                # the datasets are never read back, dump them only to inspect the parsing
+                for name, dataset in (("interview_dataset", interview_dataset), ("segment_dataset", segment_dataset)):
+                    with open(os.path.join(segment_dir, f"{name}.json"), 'w', encoding='utf-8') as f:
+                        json.dump(dataset.model_dump(), f, ensure_ascii=False, indent=2)
+            
+            # Analyze the answers of each (segment, question) pair not already done
+            analyze_segments(segment_dataset, segment_dir)
+            
+            # dump segment dataset to excel, unless the segment answers did not change
+            inputs = {"segments": fingerprint(segment_dataset.model_dump(mode="json"))}
+            if not state.is_up_to_date("segment_report", inputs, [segment_report_file]):
+                if state.output_modified("segment_report", segment_report_file):
+                    # keep the edits made by hand before overwriting the report
+                    edited_file = segment_report_file.replace('.xlsx', '_edited.xlsx')
+                    shutil.copy2(segment_report_file, edited_file)
+                    print(f"Segment report was edited, previous version saved to {edited_file}")
+                with get_metrics().timed("segment_report", os.path.basename(segment_report_file)) as record:
+                    create_excel_report(segment_dataset, segment_report_file)
+                    record["bytes_written"] = os.path.getsize(segment_report_file)
+                state.record("segment_report", inputs, [segment_report_file])
+                if config.should_debug('verbose'):
+                    print(f"Segment report saved to {segment_report_file} ")
+            elif config.should_debug('verbose'):
+                print(f"Segment report up to date: {segment_report_file}")
         
         ######
         ## step 2 - result analysis
         #######
         
-        if (config.get_config('do_result_analysis', False)):
+        result_report_file = os.path.join(analysis_dir, "result_report.xlsx")
+        result_inputs = {
+            "segment_report": state.file_fingerprint(segment_report_file),
+            "settings": settings_fingerprint("cross_segment_synthesis"),
+        }
+        result_outputs = [question_synthesis_json_file, result_report_file]
+        if config.get_config('do_result_analysis', False) \
+                and state.is_up_to_date("result_analysis", result_inputs, result_outputs):
+            if config.should_debug('verbose'):
+                print(f"Result analysis up to date: {question_synthesis_json_file}")
+        elif (config.get_config('do_result_analysis', False)):
             if config.should_debug('verbose'):
                 print(f"Make result analysis ")
-            segment_dataset = parse_segment_report(segment_report_file)
+            with get_metrics().timed("segment_report_parsing", os.path.basename(segment_report_file)):
+                segment_dataset = parse_segment_report(segment_report_file)
             
             #dump segment dataset to json
-            if (False):
+            if config.should_debug('dump_datasets'):
                 segment_dataset_json_file = os.path.join(analysis_dir, "segment_dataset_check.json")
                 with open(segment_dataset_json_file, 'w', encoding='utf-8') as f:
                     json.dump(segment_dataset.model_dump(), f, ensure_ascii=False, indent=2)
@@ -128,19 +276,48 @@ def process_analysis(
             # for each question in the segment dataset, generate a synthesis of all segment summaries
 
         
+            # Questions are synthesized concurrently; each result is journaled and added to the
+            # report in question order as soon as it is available, and results.json is written once
+            journal = ResultJournal(question_synthesis_json_file)
+            result_changes = state.changes("result_analysis", result_inputs, result_outputs)
+            if result_changes and result_changes & set(result_inputs):
+                # results of an interrupted run made from another segment report or settings
+                journal.discard()
+                state.record("result_analysis", result_inputs, complete=False)
+            previous_results = {}
+            if result_changes is not None and not result_changes & set(result_inputs) \
+                    and os.path.exists(question_synthesis_json_file):
+                # results of the last run with the same inputs, only its failed questions are synthesized again
+                with open(question_synthesis_json_file, 'r', encoding='utf-8') as f:
+                    previous_results = {data["question_id"]: ResultAnalysis.model_validate(data) for data in json.load(f)}
+            previous_results.update({
+                qid: ResultAnalysis.model_validate(data) for qid, data in journal.load().items()
+            })
             result_analysis_list = []
-            for question in segment_dataset.questions:
-                result_analysis = analyze_question_across_segments(segment_dataset, question.text, question.id)
-                result_analysis_list.append(result_analysis)
+            
+            def record_results(results):
+                for result_analysis in results:
+                    result_analysis_list.append(result_analysis)
+                    journal.append(result_analysis.question_id, result_analysis.model_dump())
+                    yield result_analysis
+            
+            with get_metrics().timed("result_report", os.path.basename(result_report_file)) as record:
+                create_result_report(
+                    record_results(analyze_questions_across_segments(segment_dataset, previous_results=previous_results)),
+                    result_report_file
+                )
                 # Convert list of ResultAnalysis to list of dicts before JSON dump
-                with open(question_synthesis_json_file, 'w', encoding='utf-8') as f:
-                    json.dump([ra.model_dump() for ra in result_analysis_list], f, ensure_ascii=False, indent=2)       
+                journal.compact([ra.model_dump() for ra in result_analysis_list])
+                record["questions"] = len(result_analysis_list)
+                record["bytes_written"] = os.path.getsize(result_report_file) + journal.bytes_written
 
+            failed_questions = [ra.question_id for ra in result_analysis_list if ra.status == "failed"]
+            # failed questions are retried by the next run
+            state.record("result_analysis", result_inputs, result_outputs, complete=not failed_questions)
+            if failed_questions:
+                print(f"Synthesis failed for questions {', '.join(failed_questions)}, rerun the result analysis to retry them")
             if config.should_debug('verbose'):
                 print(f"Result analysis was saved to {question_synthesis_json_file}")
-                
-            result_report_file = os.path.join(analysis_dir, "result_report.xlsx")
-            create_result_report(result_analysis_list, result_report_file)
          
             if config.should_debug('verbose'):
                 print(f"Result report was saved to {result_report_file}")
@@ -150,11 +327,20 @@ def process_analysis(
         ## step 3 - add quotes
         #######
         
-        if (config.get_config('do_add_quotes', False)):
+        transcript_report_file_quotes = os.path.join(analysis_dir, "transcript_analysis_report_quotes.xlsx") 
+        question_synthesis_json_file_quotes = os.path.join(analysis_dir, "results_with_quotes.json")
+        docx_file = os.path.join(analysis_dir, "results_with_quotes.docx")
+        quotes_inputs = {
+            "results": state.file_fingerprint(question_synthesis_json_file),
+            "quotes_report": state.file_fingerprint(transcript_report_file_quotes),
+        }
+        if config.get_config('do_add_quotes', False) \
+                and state.is_up_to_date("quotes", quotes_inputs, [question_synthesis_json_file_quotes, docx_file]):
+            if config.should_debug('verbose'):
+                print(f"Quotes up to date: {docx_file}")
+        elif (config.get_config('do_add_quotes', False)):
             if config.should_debug('verbose'):
                 print(f"Add quotes to results")
-            transcript_report_file_quotes = os.path.join(analysis_dir, "transcript_analysis_report_quotes.xlsx") 
-            question_synthesis_json_file_quotes = os.path.join(analysis_dir, "results_with_quotes.json")
             result_analysis_list = []
             with open(question_synthesis_json_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
@@ -162,13 +348,13 @@ def process_analysis(
             
 
             
-            result_analysis_list = add_quotes_from_excel(result_analysis_list, transcript_report_file_quotes)
+            with get_metrics().timed("quotes", os.path.basename(transcript_report_file_quotes)):
+                result_analysis_list = add_quotes_from_excel(result_analysis_list, transcript_report_file_quotes)
             
             with open(question_synthesis_json_file_quotes, 'w', encoding='utf-8') as f:
                 json.dump([ra.model_dump() for ra in result_analysis_list], f, ensure_ascii=False, indent=2)
             
             # Create Word document
-            docx_file = os.path.join(analysis_dir, "results_with_quotes.docx")
             doc = Document()
             
             # Add title
@@ -179,6 +365,12 @@ def process_analysis(
                 # Add question as heading level 2
                 doc.add_heading(f"Q{ra.question_id} - {ra.question_text}", level=2)
                 doc.add_paragraph()
+                if ra.status == "failed":
+                    # not an answer: flag it until a rerun of the result analysis synthesizes it
+                    failed_run = doc.add_paragraph().add_run(f"Synthesis failed ({ra.error}), rerun the result analysis to retry it.")
+                    failed_run.bold = True
+                    doc.add_paragraph()
+                    continue
                 # Add analysis as normal paragraph
                 doc.add_paragraph(ra.analysis)
                 
@@ -193,10 +385,25 @@ def process_analysis(
             
             # Save the document
             doc.save(docx_file)
+            get_metrics().update(
+                "quotes", os.path.basename(transcript_report_file_quotes),
+                bytes_written=os.path.getsize(question_synthesis_json_file_quotes) + os.path.getsize(docx_file)
+            )
+            state.record("quotes", quotes_inputs, [question_synthesis_json_file_quotes, docx_file])
                 
             if config.should_debug('verbose'):
                 print(f"Updated result_analysis_list with quotes was saved to {question_synthesis_json_file_quotes}")
                 print(f"Word document was saved to {docx_file}")
+        
+        if config.should_debug('verbose'):
+            print_cache_stats()
+            print_router_stats()
+        
+        if config.get_config('metrics.enabled', True):
+            report_file = metrics.write_report(config.get_path('run_report_dir'))
+            if config.should_debug('verbose'):
+                print_run_summary(metrics.summary())
+                print(f"Run metrics saved to {report_file}")
             
     except (ValueError, FileNotFoundError, RuntimeError) as e:
         print(f"Error: {str(e)}")
@@ -204,6 +411,89 @@ def process_analysis(
         print(traceback.format_exc())
         return
 
+def test_concurrent_segment_synthesis():
+    """Synthesize segments concurrently against the local mock OpenAI server, with failing requests"""
+    import time
+    from user_research_helper.mock.openai_server import MockOpenAIServer
+    from user_research_helper.mock.project import mock_project
+    from user_research_helper.result_analysis.data import Question
+    
+    with MockOpenAIServer(latency=0.1, fail_every=5) as mock_server, \
+            mock_project({
+                    "concurrency": {"synthesis_workers": 6, "synthesis_retries": 2},
+                    "llm": {"max_retries": 0},
+                    "llm_cache": {"enabled": False},
+                    "debug": {"verbose": False}
+                }, openai_server=mock_server) as root_dir:
+        
+        questions = [Question(id=f"Q{i}", text=f"Question {i}?", column_index=i) for i in range(8)]
+        segment_dataset = SegmentDataset(questions=questions, segments={
+            segment_name: {
+                q.id: SegmentAnswer(segment_name=segment_name, question_id=q.id, answer_summary="", rough_answers=["Yes", "No"])
+                for q in questions
+            }
+            for segment_name in ["adult", "child", "senior"]
+        })
+        
+        start = time.perf_counter()
+        analyze_segments(segment_dataset, root_dir)
+        elapsed = time.perf_counter() - start
+        
+        for segment_name in segment_dataset.segments:
+            answers = load_segment_answers(os.path.join(root_dir, f"{segment_name}.json"))
+            assert list(answers) == [q.id for q in questions], "Segment answers are not in question order"
+            assert all(a.answer_summary.startswith("Mock synthesis") for a in answers.values()), "Failed pairs were not retried"
+        assert 1 < mock_server.max_in_flight <= 6, "Pairs were not analyzed concurrently within the limit"
+        print(f"24 segment answers in {elapsed:.2f}s, {mock_server.failed_count} failed requests retried")
+
+
+def test_failed_results_retried():
+    """Check that a rerun only synthesizes the failed questions, which are not rendered as answers meanwhile"""
+    import pandas as pd
+    from user_research_helper.mock.openai_server import MockOpenAIServer, default_responder
+    from user_research_helper.mock.project import mock_project
+    from user_research_helper.result_analysis.data import Question
+    
+    def invalid_responder(body):
+        return "not json" if "Question 1?" in body["messages"][-1]["content"] else default_responder(body)
+    
+    with MockOpenAIServer(responder=invalid_responder) as mock_server, \
+            mock_project({
+                    "do_segment_summaries": False, "do_result_analysis": True, "do_add_quotes": True,
+                    "llm": {"max_retries": 0}, "llm_cache": {"enabled": False}, "metrics": {"enabled": False},
+                    "debug": {"verbose": False}
+                }, openai_server=mock_server) as root_dir:
+        
+        questions = [Question(id=str(i + 2), text=f"Question {i}?", column_index=i + 1) for i in range(3)]
+        segment_dataset = SegmentDataset(questions=questions, segments={
+            segment_name: {
+                q.id: SegmentAnswer(segment_name=segment_name, question_id=q.id, answer_summary=f"Summary of {segment_name}")
+                for q in questions
+            }
+            for segment_name in ["adult", "student"]
+        })
+        os.makedirs(config.get_path('segment_analysis_dir'), exist_ok=True)
+        create_excel_report(segment_dataset, os.path.join(config.get_path('segment_analysis_dir'), "segment_analysis_report.xlsx"))
+        analysis_dir = config.get_path('analysis_dir')
+        pd.DataFrame({"File Name": ["interview-1"], "Segments": ["adult"], **{q.text: ["A quote"] for q in questions}}) \
+            .to_excel(os.path.join(analysis_dir, "transcript_analysis_report_quotes.xlsx"), index=False)
+        
+        process_analysis(root_dir)
+        with open(os.path.join(analysis_dir, "results_with_quotes.json"), 'r', encoding='utf-8') as f:
+            results = {ra["question_id"]: ra for ra in json.load(f)}
+        assert results["3"]["status"] == "failed" and not results["3"]["quotes"], "Failed synthesis got quotes"
+        paragraphs = [p.text for p in Document(os.path.join(analysis_dir, "results_with_quotes.docx")).paragraphs]
+        assert any(text.startswith("Synthesis failed") for text in paragraphs), "Failed synthesis rendered as an answer"
+        assert mock_server.request_count == 3
+        
+        mock_server.responder = default_responder
+        process_analysis(root_dir)
+        with open(os.path.join(analysis_dir, "results_with_quotes.json"), 'r', encoding='utf-8') as f:
+            results = json.load(f)
+        assert all(ra["status"] == "answered" and ra["quotes"] for ra in results), "Failed question was not retried"
+        assert mock_server.request_count == 4, f"Expected 1 new request, got {mock_server.request_count - 3}"
+        print("Only the failed question was synthesized again")
+
 if __name__ == "__main__":
     import argparse
     import os
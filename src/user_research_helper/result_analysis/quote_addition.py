@@ -1,10 +1,13 @@
 import pandas as pd
-from typing import List
+from typing import Dict, List
+from user_research_helper.campaign.report_cache import read_report
 from user_research_helper.result_analysis.data import ResultAnalysis
+from user_research_helper.result_analysis.transcript_report_parsing import split_segments
 
 def add_quotes_from_excel(result_analyses: List[ResultAnalysis], excel_file_path: str) -> List[ResultAnalysis]:
     """
     Add quotes to a list of ResultAnalysis objects from an Excel file.
+    Failed syntheses are left without quotes.
     
     Args:
         result_analyses: List of ResultAnalysis objects to update with quotes
@@ -13,39 +16,45 @@ def add_quotes_from_excel(result_analyses: List[ResultAnalysis], excel_file_path
     Returns:
         List[ResultAnalysis]: Updated list of ResultAnalysis objects with quotes added
     """
-    # Read the Excel file
-    df = pd.read_excel(excel_file_path)
-    
-    # Create a mapping of question_id to quotes
-    quotes_by_question = {}
-    
-    # Process each row in the dataframe
-    for _, row in df.iterrows():
-        # Get the segments for this interview
-        segments_str = str(row.iloc[1]) if pd.notna(row.iloc[1]) else ""
-        segments = [s.strip() for s in segments_str.split(',') if s.strip()]
-        
-        # Process each question (starting from column index 2)
-        for col_idx, answer in enumerate(row.iloc[2:], start=2):
-            if pd.notna(answer):
-                question_id = str(col_idx)  # Convert to 1-based question ID
-                quote = str(answer).strip()
-                
-                # Format quote with segments
-                formatted_quote = f"{quote}"
-                if segments:
-                    segment_str = "(" + ", ".join(segments) + ")"
-                    formatted_quote += f" {segment_str}"
-                
-                # Add to quotes dictionary
-                if question_id not in quotes_by_question:
-                    quotes_by_question[question_id] = []
-                quotes_by_question[question_id].append(formatted_quote)
+    # Read the Excel file (or its cache if it did not change)
+    quotes_by_question = quotes_from_dataframe(read_report(excel_file_path))
     
     # Update ResultAnalysis objects with quotes
     for result in result_analyses:
-        if result.question_id in quotes_by_question:
+        if result.status != "failed" and result.question_id in quotes_by_question:
             quotes = quotes_by_question[result.question_id]
             result.quotes = "\n".join(quotes)
     
     return result_analyses
+
+
+def quotes_from_dataframe(df: pd.DataFrame) -> Dict[str, List[str]]:
+    """
+    Map each question ID to its quotes, postfixed by the segments of the interview
+    
+    Works column by column: the segments column is split once and the quotes of a question
+    are formatted together for all the interviews.
+    
+    Args:
+        df: Quotes report (name, segments, then one column per question)
+        
+    Returns:
+        Dict[str, List[str]]: Quotes in interview order, for the questions with at least one quote
+    """
+    # Segments postfix of each interview
+    segment_postfixes = pd.Series([
+        " (" + ", ".join(segments) + ")" if segments else ""
+        for segments in split_segments(df.iloc[:, 1])
+    ], index=df.index, dtype=object)
+    
+    # Process each question (starting from column index 2)
+    quotes_by_question = {}
+    for col_idx in range(2, len(df.columns)):
+        answers = df.iloc[:, col_idx]
+        present = answers.notna()
+        if present.any():
+            question_id = str(col_idx)  # Convert to 1-based question ID
+            quotes = answers[present].astype(str).str.strip() + segment_postfixes[present]
+            quotes_by_question[question_id] = quotes.tolist()
+    
+    return quotes_by_question
@@ -1,8 +1,10 @@
-from typing import List, Dict, Optional
-import json
-import openai
-import os
+from typing import Iterator, List, Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+import time
 from user_research_helper.campaign.config import config
+from user_research_helper.campaign.metrics import get_metrics
+from user_research_helper.llm.router import route_chat_completion
+from user_research_helper.result_analysis.answers_analysis import parse_synthesis, validate_synthesis
 from user_research_helper.result_analysis.data import SegmentDataset, SegmentAnswer, Confidence, ResultAnalysis
 
 def generate_question_synthesis(
@@ -16,16 +18,10 @@ def generate_question_synthesis(
         question_text: The text of the question being analyzed
         segment_summaries: Dictionary mapping segment names to their summaries
         question_id: The ID of the question being analyzed
+        
+    Raises:
+        LLMCallError: If the request failed or its response is not a valid synthesis
     """
-    openrouter = False
-    if openrouter:
-        client = openai.OpenAI(
-                base_url="https://openrouter.ai/api/v1",
-                api_key=os.environ.get("OPENROUTER_API_KEY"),
-            )
-    else : 
-        client = openai.OpenAI()
-    
     summaries_text = "\n".join([f"- {segment}: {summary}" for segment, summary in segment_summaries.items()])
     
     prompt = f"""
@@ -59,23 +55,14 @@ def generate_question_synthesis(
     }}
     """
     
-    try:
-        response = client.chat.completions.create(
-            #model="google/gemini-flash-1.5-8b",
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.6,
-            response_format={"type": "json_object"}
-        )
-        parsed_response = json.loads(response.choices[0].message.content)
-        
-        return parsed_response
-    except Exception as e:
-        print(f"Error generating synthesis: {str(e)}")
-        return {
-            "analysis": f"Error generating synthesis : {str(e)}",
-            "confidence": "low"
-        }
+    response = route_chat_completion(
+        "cross_segment_synthesis",
+        messages=[{"role": "user", "content": prompt}],
+        validate=validate_synthesis,
+        temperature=0.6,
+        response_format={"type": "json_object"}
+    )
+    return parse_synthesis(response.choices[0].message.content)
 
 
 def analyze_question_across_segments(
@@ -125,3 +112,61 @@ def analyze_question_across_segments(
     return analysis
 
 
+
+
+def analyze_questions_across_segments(
+    segment_dataset: SegmentDataset,
+    max_workers: Optional[int] = None,
+    previous_results: Optional[Dict[str, ResultAnalysis]] = None
+) -> Iterator[ResultAnalysis]:
+    """
+    Analyzes all the questions of the dataset across segments, concurrently.
+    
+    Questions are independent requests, so up to `max_workers` of them (config
+    `concurrency.synthesis_workers`, default 1) are in flight at the same time.
+    Results are yielded in question order, each one as soon as it and all the questions
+    before it are done, so consumers can write them while later questions are still running.
+    A question whose synthesis fails is yielded with `status` failed and its error, without
+    analysis; failed previous results are synthesized again.
+    
+    Args:
+        segment_dataset: The dataset containing all segment answers
+        max_workers: Maximum number of questions analyzed at the same time
+        previous_results: Results of an interrupted run by question ID, reused when
+            the question text is unchanged
+    """
+    if max_workers is None:
+        max_workers = config.get_config('concurrency.synthesis_workers', 1)
+    previous_results = previous_results or {}
+    questions = segment_dataset.questions
+    
+    def analyze_question(question_text: str, question_id: str, queued_at: float) -> ResultAnalysis:
+        with get_metrics().timed("cross_segment_synthesis", question_id, queued_at) as record:
+            try:
+                return analyze_question_across_segments(segment_dataset, question_text, question_id)
+            except Exception as e:
+                print(f"Error generating synthesis for question {question_id}: {str(e)}")
+                record["ok"] = False
+                return ResultAnalysis(
+                    question_id=question_id,
+                    question_text=question_text,
+                    analysis="",
+                    status="failed",
+                    error=str(e)
+                )
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = []
+        for question in questions:
+            previous = previous_results.get(question.id)
+            if previous is not None and previous.question_text == question.text and previous.status != "failed":
+                future = Future()
+                future.set_result(previous)
+            else:
+                future = executor.submit(analyze_question, question.text, question.id, time.perf_counter())
+            futures.append(future)
+        
+        for index, future in enumerate(futures):
+            result = future.result()
+            print(f"Question {questions[index].id} synthesized ({index + 1}/{len(questions)})")
+            yield result
@@ -1,58 +1,53 @@
 import os
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Alignment
-from typing import List
+from typing import Iterable
+from user_research_helper.campaign.excel_writer import StreamingSheetWriter, solid_fill
 from user_research_helper.result_analysis.data import ResultAnalysis
 
-def create_result_report(results: List[ResultAnalysis], output_file: str):
+def create_result_report(results: Iterable[ResultAnalysis], output_file: str):
     """
     Create an Excel report from result analysis
     
+    Rows are written as results are consumed (see StreamingSheetWriter), so a generator
+    of results still being computed can be passed.
+    
     Args:
-        results: List of ResultAnalysis containing questions and their analysis
+        results: ResultAnalysis containing questions and their analysis, in question order
         output_file: Path to save the Excel report
     """
-    # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Result Analysis"
+    # Create workbook (Question and Analysis columns)
+    sheet = StreamingSheetWriter("Result Analysis", [70, 100])
 
     # Write headers
-    ws.cell(row=1, column=1, value="Question")
-    ws.cell(row=1, column=2, value="Analysis")
-    ws.cell(row=1, column=1).alignment = Alignment(wrap_text=True)
-    ws.cell(row=1, column=2).alignment = Alignment(wrap_text=True)
+    sheet.append([sheet.cell("Question"), sheet.cell("Analysis")])
 
     # Define fill colors based on confidence
     
-    medium_fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")  # Orange
-    low_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")    # Red
+    medium_fill = solid_fill("FFA500")  # Orange
+    low_fill = solid_fill("FF0000")    # Red
+    failed_fill = solid_fill("C0C0C0")  # Grey
 
     # Process each result
-    for row, result in enumerate(results, start=2):
-        # Write question text
-        ws.cell(row=row, column=1, value=result.question_text)
-        ws.cell(row=row, column=1).alignment = Alignment(wrap_text=True)
-        
-        # Write analysis with confidence-based color
-        cell = ws.cell(row=row, column=2, value=result.analysis)
-        cell.alignment = Alignment(wrap_text=True)
+    for result in results:
+        analysis = result.analysis
+        fill = None
         
         # Set cell color based on confidence
-        if result.confidence:
+        if result.status == "failed":
+            analysis = f"Synthesis failed, rerun the result analysis ({result.error})"
+            fill = failed_fill
+        elif result.confidence:
             if result.confidence == 'high':
                 pass
             elif result.confidence == 'medium':
-                cell.fill = medium_fill
+                fill = medium_fill
             else:  # low confidence
-                cell.fill = low_fill
-
-    # Set column widths
-    ws.column_dimensions['A'].width = 70  # Question column
-    ws.column_dimensions['B'].width = 100  # Analysis column
+                fill = low_fill
+        
+        # Write question text and analysis with confidence-based color
+        sheet.append([sheet.cell(result.question_text), sheet.cell(analysis, fill=fill)])
 
     # Save workbook
-    wb.save(output_file)
+    sheet.save(output_file)
 
 def test_result_report():
     from user_research_helper.result_analysis.data import ResultAnalysis
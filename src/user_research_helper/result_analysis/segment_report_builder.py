@@ -1,64 +1,55 @@
 import os
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Alignment
 from typing import Dict, List
+from user_research_helper.campaign.excel_writer import StreamingSheetWriter, solid_fill
 from user_research_helper.result_analysis.data import SegmentDataset
 
 def create_excel_report(dataset: SegmentDataset, output_file: str):
     """
     Create an Excel report from segment dataset analysis results
     
+    The report is written row by row (one row per segment), see StreamingSheetWriter.
+    
     Args:
         dataset: SegmentDataset containing questions and segment answers
         output_file: Path to save the Excel report
     """
     # Create workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Segment Analysis Results"
+    sheet = StreamingSheetWriter("Segment Analysis Results", [70] * (len(dataset.questions) + 1))
 
     # Write headers
-    ws.cell(row=1, column=1, value="Segment Name")
-    for col, question in enumerate(dataset.questions, start=2):
-        ws.cell(row=1, column=col, value=question.text)
-        ws.cell(row=1, column=col).alignment = Alignment(wrap_text=True)
+    sheet.append([sheet.cell("Segment Name", wrap=False)] + [sheet.cell(question.text) for question in dataset.questions])
 
     # Define fill colors based on confidence
-    high_fill = PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid")  # Light green
-    medium_fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")  # Orange
-    low_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")    # Red
+    high_fill = solid_fill("90EE90")  # Light green
+    medium_fill = solid_fill("FFA500")  # Orange
+    low_fill = solid_fill("FF0000")    # Red
 
     # Process each segment in the dataset
-    for row, (segment_name, segment_answers) in enumerate(dataset.segments.items(), start=2):
+    for segment_name, segment_answers in dataset.segments.items():
         # Write segment name
-        ws.cell(row=row, column=1, value=segment_name)
-        ws.cell(row=row, column=1).alignment = Alignment(wrap_text=True)
+        cells = [sheet.cell(segment_name)]
         
         # Write analysis results for each question
-        for col, question in enumerate(dataset.questions, start=2):
-            cell = ws.cell(row=row, column=col)
-            
+        for question in dataset.questions:
             if question.id in segment_answers:
                 answer = segment_answers[question.id]
-                cell.value = answer.answer_summary
                 
                 # Set cell color based on confidence if available
                 confidence = getattr(answer, 'confidence', 'low')
                 if confidence == 'high':
-                    cell.fill = high_fill
+                    fill = high_fill
                 elif confidence == 'medium':
-                    cell.fill = medium_fill
+                    fill = medium_fill
                 else:  # low confidence
-                    cell.fill = low_fill
+                    fill = low_fill
                 
-                cell.alignment = Alignment(wrap_text=True)
-
-    # Set column widths
-    for col in ws.columns:
-        ws.column_dimensions[col[0].column_letter].width = 70
+                cells.append(sheet.cell(answer.answer_summary, fill=fill))
+            else:
+                cells.append(sheet.cell(wrap=False))
+        sheet.append(cells)
 
     # Save workbook
-    wb.save(output_file)
+    sheet.save(output_file)
 
 def test_report_builder():
     from user_research_helper.result_analysis.data import Question, SegmentAnswer, SegmentDataset
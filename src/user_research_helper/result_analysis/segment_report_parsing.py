@@ -1,9 +1,8 @@
 import pandas as pd
 import re
-from user_research_helper.result_analysis.data import (
-     Question, 
-    SegmentDataset, SegmentAnswer
-)
+from user_research_helper.campaign.report_cache import read_report
+from user_research_helper.result_analysis.data import SegmentDataset
+from user_research_helper.result_analysis.transcript_report_parsing import answers_by_row
 
 
 def parse_segment_report(file_path: str) -> SegmentDataset:
@@ -16,37 +15,38 @@ def parse_segment_report(file_path: str) -> SegmentDataset:
     Returns:
         SegmentDataset: Données structurées de l'interview par segment 
     """
-    # Charger le fichier Excel
-    df = pd.read_excel(file_path)
+    # Charger le fichier Excel (ou son cache s'il n'a pas changé)
+    return segment_dataset_from_dataframe(read_report(file_path))
+
+
+def segment_dataset_from_dataframe(df: pd.DataFrame) -> SegmentDataset:
+    """
+    Construit le SegmentDataset d'un rapport par segment déjà chargé
     
+    Les cellules vides sont repérées en masse et tous les modèles sont validés en un seul appel.
+    
+    Args:
+        df: Rapport (col1=nom du segment, puis une colonne par question)
+        
+    Returns:
+        SegmentDataset: Données structurées de l'interview par segment 
+    """
     # Extraire les questions depuis les en-têtes (toutes les colonnes sauf la première)
+    # Numéro de colonne comme ID (commence à 2 car col1=nom)
     questions = [
-        Question(
-            id=str(i+2),  # Numéro de colonne comme ID (commence à 2 car col1=nom)
-            text=str(col_name),
-            column_index=i+1
-        )
+        {"id": str(i+2), "text": str(col_name), "column_index": i+1}
         for i, col_name in enumerate(df.columns[1:])
     ]
     
-    # Extraire les segments 
-    segments = {}
-    
-    # Parcourir chaque ligne du DataFrame
-    for _, row in df.iterrows():
-        segment_name = row.iloc[0]  # Première colonne contient le nom du segment
-        segment_answers = {}
-        
-        # Pour chaque question, créer un SegmentAnswer
-        for i, question in enumerate(questions):
-            answer_text = row.iloc[i+1]  # +1 car on commence à la 2ème colonne
-            if pd.notna(answer_text):  # Vérifier que la réponse n'est pas vide
-                segment_answers[question.id] = SegmentAnswer(
-                    segment_name=segment_name,
-                    question_id=question.id,
-                    answer_summary=str(answer_text)
-                )
-        
-        segments[segment_name] = segment_answers
+    # Extraire les segments : une réponse par question non vide de chaque ligne
+    segment_names = df.iloc[:, 0].tolist()  # Première colonne contient le nom du segment
+    answers = answers_by_row(df.iloc[:, 1:], [q["id"] for q in questions])
+    segments = {
+        segment_name: {
+            question_id: {"segment_name": segment_name, "question_id": question_id, "answer_summary": answer_text}
+            for question_id, answer_text in segment_answers.items()
+        }
+        for segment_name, segment_answers in zip(segment_names, answers)
+    }
     
-    return SegmentDataset(questions=questions, segments=segments)
\ No newline at end of file
+    return SegmentDataset(questions=questions, segments=segments)
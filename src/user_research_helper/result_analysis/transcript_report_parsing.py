@@ -1,11 +1,44 @@
 import pandas as pd
 import re
+from typing import Dict, List
+from user_research_helper.campaign.report_cache import read_report
 from user_research_helper.result_analysis.data import (
-    InterviewDataset, Question, Interview,
+    InterviewDataset,
     SegmentDataset, SegmentAnswer
 )
 
 
+def split_segments(segments_column: pd.Series) -> List[List[str]]:
+    """
+    Découpe en une seule fois la colonne des segments ("seg1, seg2") de toutes les lignes
+    
+    Args:
+        segments_column: Colonne des segments (cellules vides possibles)
+        
+    Returns:
+        List[List[str]]: Segments nettoyés de chaque ligne, dans l'ordre de la cellule
+    """
+    segments_column = segments_column.reset_index(drop=True)
+    parts = segments_column.where(segments_column.notna(), "").astype(str).str.split(',').explode().str.strip()
+    parts = parts[parts != ""]
+    segments_by_row = parts.groupby(level=0).agg(list)
+    return [segments_by_row.get(row, []) for row in range(len(segments_column))]
+
+
+def answers_by_row(answer_columns: pd.DataFrame, question_ids: List[str]) -> List[Dict[str, str]]:
+    """
+    Réponses non vides de chaque ligne, par ID de question
+    
+    Les cellules vides sont repérées et les valeurs converties en texte colonne par colonne.
+    """
+    present = answer_columns.notna().to_numpy()
+    values = answer_columns.astype(str).to_numpy()
+    return [
+        {question_id: value for question_id, value, is_present in zip(question_ids, row_values, row_present) if is_present}
+        for row_values, row_present in zip(values, present)
+    ]
+
+
 def parse_transcript_report(file_path: str) -> InterviewDataset:
     """
     Charge les données d'un fichier Excel dans la structure InterviewDataset
@@ -16,40 +49,39 @@ def parse_transcript_report(file_path: str) -> InterviewDataset:
     Returns:
         InterviewDataset: Données structurées de l'interview
     """
-    # Charger le fichier Excel
-    df = pd.read_excel(file_path)
+    # Charger le fichier Excel (ou son cache s'il n'a pas changé)
+    return interview_dataset_from_dataframe(read_report(file_path))
+
+
+def interview_dataset_from_dataframe(df: pd.DataFrame) -> InterviewDataset:
+    """
+    Construit l'InterviewDataset d'un rapport de transcriptions déjà chargé
+    
+    Les colonnes sont traitées d'un bloc (segments découpés une seule fois, cellules vides
+    repérées en masse) et tous les modèles sont validés en un seul appel.
     
+    Args:
+        df: Rapport (col1=nom, col2=segments, puis une colonne par question)
+        
+    Returns:
+        InterviewDataset: Données structurées de l'interview
+    """
     # Extraire les questions depuis les en-têtes (toutes les colonnes sauf les 2 premières)
+    # Numéro de colonne comme ID (commence à 3 car col1=nom, col2=segments)
     questions = [
-        Question(
-            id=str(i+3),  # Numéro de colonne comme ID (commence à 3 car col1=nom, col2=segments)
-            text=str(col_name),
-            column_index=i+2
-        )
+        {"id": str(i+3), "text": str(col_name), "column_index": i+2}
         for i, col_name in enumerate(df.columns[2:])
     ]
     
     # Extraire les interviews (toutes les lignes car les interviews commencent à la ligne 0)
-    interviews = []
-    for _, row in df.iterrows():  # Supprimé le iloc[1:] pour commencer à la ligne 0
-        # Extraire et nettoyer les segments
-        segments_str = str(row.iloc[1]) if pd.notna(row.iloc[1]) else ""
-        segments = list({s.strip() for s in segments_str.split(',') if s.strip()})
-        
-        # Créer le dictionnaire des réponses
-        answers = {
-            q.id: str(row.iloc[q.column_index]) 
-            for q in questions
-            if pd.notna(row.iloc[q.column_index])
-        }
-        
-        interview = Interview(
-            name=str(row.iloc[0]),
-            segments=segments,
-            answers=answers
-        )
-        interviews.append(interview)
-    
+    names = df.iloc[:, 0].astype(str).tolist()
+    segments = split_segments(df.iloc[:, 1])
+    answers = answers_by_row(df.iloc[:, 2:], [q["id"] for q in questions])
+    interviews = [
+        # segments sans doublons, dans l'ordre de la cellule
+        {"name": name, "segments": list(dict.fromkeys(interview_segments)), "answers": interview_answers}
+        for name, interview_segments, interview_answers in zip(names, segments, answers)
+    ]
 
     dataset = InterviewDataset(
         questions=questions,
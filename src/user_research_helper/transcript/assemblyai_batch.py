@@ -0,0 +1,236 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from user_research_helper.campaign.build_state import settings_fingerprint
+from user_research_helper.campaign.config import config
+from user_research_helper.transcript.audio_chunking import Utterance
+from user_research_helper.transcript.transcription_backends import AssemblyAIBackend
+
+
+class AssemblyAIJobStore:
+    """
+    Transcript IDs of the AssemblyAI jobs submitted for each audio file, saved on disk.
+
+    An interrupted run polls the jobs already submitted instead of uploading and paying for
+    the same recording twice. A job is only reused if the audio file (same size and
+    modification time) and the transcription settings have not changed since its submission.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.jobs: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.jobs = json.load(f)
+
+    @staticmethod
+    def fingerprint(audio_file: str) -> str:
+        stat = os.stat(audio_file)
+        return f"{stat.st_size}-{stat.st_mtime_ns}-{settings_fingerprint('transcription')[:16]}"
+
+    def get(self, audio_file: str) -> Optional[str]:
+        """Transcript ID of the job submitted for the current version of the audio file"""
+        with self._lock:
+            job = self.jobs.get(os.path.basename(audio_file))
+        if job and job["fingerprint"] == self.fingerprint(audio_file):
+            return job["transcript_id"]
+        return None
+
+    def set(self, audio_file: str, transcript_id: str) -> None:
+        with self._lock:
+            self.jobs[os.path.basename(audio_file)] = {
+                "transcript_id": transcript_id,
+                "fingerprint": self.fingerprint(audio_file),
+                "submitted_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            self._save()
+
+    def remove(self, audio_file: str) -> None:
+        with self._lock:
+            if self.jobs.pop(os.path.basename(audio_file), None) is not None:
+                self._save()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.jobs, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def transcribe_batch(
+    audio_files: List[str],
+    on_complete: Callable[[str, List[Utterance]], None],
+    backend: AssemblyAIBackend,
+    language_code: str = "fr",
+    word_boost: Optional[List[str]] = None,
+    jobs_file: Optional[str] = None,
+    upload_workers: int = 4,
+    poll_interval: float = 3.0,
+) -> Dict[str, str]:
+    """
+    Transcribe audio files with AssemblyAI in submit-all-then-poll mode
+
+    All the files are uploaded and submitted up front (`upload_workers` uploads at a time), then
+    every pending job is polled until it is done. Polling starts while uploads are still in
+    flight and `on_complete` is called as soon as a transcript is available, in completion order.
+    Submitted job IDs are kept in `jobs_file` until their transcript has been handed to
+    `on_complete`, so that a rerun only polls them again.
+
+    Args:
+        audio_files: Paths of the audio files
+        on_complete: Called with the audio file and its utterances when a transcription is done
+        backend: AssemblyAI backend (API key and diarization settings)
+        language_code: Language of the recordings
+        word_boost: Words to boost
+        jobs_file: File keeping the submitted job IDs (default: config path `transcription_jobs_file`)
+        upload_workers: Concurrent uploads
+        poll_interval: Seconds between two polling rounds
+
+    Returns:
+        Dict[str, str]: Error message of each audio file that could not be transcribed
+    """
+    import assemblyai as aai
+
+    store = AssemblyAIJobStore(jobs_file or config.get_path('transcription_jobs_file'))
+    transcription_config = aai.TranscriptionConfig(
+        speaker_labels=True,
+        speakers_expected=backend.speakers_expected,
+        language_code=language_code,
+        word_boost=word_boost,
+        boost_param="high",
+    )
+    verbose = config.should_debug('verbose')
+
+    def submit(audio_file: str) -> str:
+        transcript = aai.Transcriber().submit(audio_file, config=transcription_config)
+        if transcript.status == aai.TranscriptStatus.error:
+            raise RuntimeError(f"AssemblyAI submission failed: {transcript.error}")
+        store.set(audio_file, transcript.id)
+        if verbose:
+            print(f"Submitted {os.path.basename(audio_file)} (job {transcript.id})")
+        return transcript.id
+
+    failures: Dict[str, str] = {}
+    pending: Dict[str, str] = {}  # audio file -> transcript ID
+    submissions: Dict[str, Future] = {}
+    submitted_at: Dict[str, float] = {}
+    for audio_file in audio_files:
+        transcript_id = store.get(audio_file)
+        if transcript_id:
+            if verbose:
+                print(f"Resuming AssemblyAI job {transcript_id} for {os.path.basename(audio_file)}")
+            pending[audio_file] = transcript_id
+            submitted_at[audio_file] = time.perf_counter()
+
+    http_client = aai.Client.get_default().http_client
+    with ThreadPoolExecutor(max_workers=max(1, upload_workers), thread_name_prefix="upload") as upload_pool:
+        for audio_file in audio_files:
+            if audio_file not in pending:
+                submissions[audio_file] = upload_pool.submit(submit, audio_file)
+                submitted_at[audio_file] = time.perf_counter()
+
+        while pending or submissions:
+            for audio_file, future in list(submissions.items()):
+                if future.done():
+                    del submissions[audio_file]
+                    try:
+                        pending[audio_file] = future.result()
+                    except Exception as e:
+                        failures[audio_file] = str(e)
+                        print(f"Error during submission of {os.path.basename(audio_file)}: {str(e)}")
+
+            for audio_file, transcript_id in list(pending.items()):
+                try:
+                    response = aai.api.get_transcript(http_client, transcript_id)
+                except Exception as e:
+                    # Network hiccup: the job is polled again in the next round
+                    if verbose:
+                        print(f"Error polling job {transcript_id}: {str(e)}")
+                    continue
+                if response.status == aai.TranscriptStatus.error:
+                    del pending[audio_file]
+                    store.remove(audio_file)
+                    failures[audio_file] = f"AssemblyAI transcription failed: {response.error}"
+                    print(f"Error during transcription of {os.path.basename(audio_file)}: {response.error}")
+                elif response.status == aai.TranscriptStatus.completed:
+                    del pending[audio_file]
+                    utterances = [
+                        Utterance(speaker=utterance.speaker, start=utterance.start, end=utterance.end, text=utterance.text)
+                        for utterance in response.utterances or []
+                    ]
+                    backend.record_timing(
+                        audio_file, float(response.audio_duration or 0), time.perf_counter() - submitted_at[audio_file]
+                    )
+                    try:
+                        on_complete(audio_file, utterances)
+                    except Exception as e:
+                        # The job is kept so that the next run fetches the transcript again
+                        failures[audio_file] = str(e)
+                        print(f"Error saving transcript of {os.path.basename(audio_file)}: {str(e)}")
+                        continue
+                    store.remove(audio_file)
+
+            if pending or submissions:
+                time.sleep(poll_interval)
+
+    return failures
+
+
+def test_transcribe_batch():
+    """Submit fake recordings to the mock server, interrupt the run and resume it"""
+    from user_research_helper.mock.assemblyai_server import MockAssemblyAIServer
+    from user_research_helper.mock.project import mock_project, write_config
+
+    with MockAssemblyAIServer(upload_latency=0.2, processing_seconds=0.3) as server, \
+            mock_project({"debug": {"verbose": False}}, assemblyai_server=server) as tmp_dir:
+        audio_files = []
+        for i in range(6):
+            audio_file = os.path.join(tmp_dir, f"interview_{i}.mp3")
+            with open(audio_file, "w", encoding="utf-8") as f:
+                f.write(f"Speaker A: Question {i}?\nSpeaker B: Answer {i}.\n")
+            audio_files.append(audio_file)
+        jobs_file = config.get_path('transcription_jobs_file')
+        backend = AssemblyAIBackend()
+        completed = {}
+
+        def save(audio_file, utterances):
+            if audio_file == audio_files[0] and audio_file not in completed:
+                completed[audio_file] = None
+                raise IOError("disk full")
+            completed[audio_file] = utterances
+
+        start = time.perf_counter()
+        failures = transcribe_batch(audio_files, save, backend, upload_workers=3, poll_interval=0.05)
+        elapsed = time.perf_counter() - start
+        # 6 uploads of 0.2s on 3 workers overlap with the 0.3s processing of the first jobs
+        assert elapsed < 6 * (0.2 + 0.3), elapsed
+        assert list(failures) == [audio_files[0]], failures
+        assert server.submit_count == 6
+        assert [u.text for u in completed[audio_files[3]]] == ["Question 3?", "Answer 3."]
+        assert list(AssemblyAIJobStore(jobs_file).jobs) == ["interview_0.mp3"]
+
+        # The rerun polls the job kept on disk instead of submitting the file again
+        failures = transcribe_batch(audio_files[:1], save, backend, poll_interval=0.05)
+        assert not failures and server.submit_count == 6
+        assert completed[audio_files[0]][1].speaker == "B"
+        assert AssemblyAIJobStore(jobs_file).jobs == {}
+
+        # A job submitted with other transcription settings is not reused
+        store = AssemblyAIJobStore(jobs_file)
+        store.set(audio_files[0], "former-job")
+        assert store.get(audio_files[0]) == "former-job"
+        write_config(tmp_dir, {"language_id": "en", "debug": {"verbose": False}})
+        assert store.get(audio_files[0]) is None, "Job of other transcription settings was reused"
+    print(f"Batch transcription OK ({elapsed:.2f}s, real-time factor {backend.real_time_factor():.3f})")
+
+
+if __name__ == "__main__":
+    test_transcribe_batch()
@@ -0,0 +1,331 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import wave
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+SAMPLE_RATE = 16000
+
+
+class Utterance(BaseModel):
+    """One speaker turn of a transcript, times in milliseconds"""
+    speaker: str = Field(..., description="Speaker label (A, B, ...)")
+    start: float = Field(..., description="Start time in milliseconds")
+    end: float = Field(..., description="End time in milliseconds")
+    text: str = Field(..., description="Transcribed text")
+
+
+# (audio_file_path, language_code, word_boost) -> utterances with times relative to the file
+TranscribeFunction = Callable[[str, str, Optional[List[str]]], List[Utterance]]
+
+
+def load_pcm(audio_file_path: str) -> np.ndarray:
+    """
+    Decode an audio file to 16 kHz mono 16-bit samples
+
+    WAV files are read directly, other formats are decoded with ffmpeg.
+
+    Args:
+        audio_file_path: Path to the audio file
+
+    Returns:
+        np.ndarray: int16 samples at SAMPLE_RATE
+
+    Raises:
+        RuntimeError: If ffmpeg is needed but not installed
+    """
+    if audio_file_path.lower().endswith('.wav'):
+        with wave.open(audio_file_path, 'rb') as wav_file:
+            if (wav_file.getframerate(), wav_file.getnchannels(), wav_file.getsampwidth()) == (SAMPLE_RATE, 1, 2):
+                return np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+
+    if shutil.which('ffmpeg') is None:
+        raise RuntimeError("ffmpeg is required to split audio files into chunks. Please install it.")
+    decoded = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-i', audio_file_path, '-f', 's16le', '-ac', '1', '-ar', str(SAMPLE_RATE), '-'],
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    return np.frombuffer(decoded.stdout, dtype=np.int16)
+
+
+def get_audio_duration(audio_file_path: str) -> float:
+    """
+    Get the duration of an audio file in seconds, without decoding it when possible
+    (WAV header or ffprobe)
+    """
+    if audio_file_path.lower().endswith('.wav'):
+        with wave.open(audio_file_path, 'rb') as wav_file:
+            return wav_file.getnframes() / wav_file.getframerate()
+    if shutil.which('ffprobe') is not None:
+        probe = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', audio_file_path],
+            stdout=subprocess.PIPE, check=True, text=True,
+        )
+        return float(probe.stdout.strip())
+    return len(load_pcm(audio_file_path)) / SAMPLE_RATE
+
+
+def detect_silences(
+    samples: np.ndarray, silence_db: float = -35.0, min_silence_seconds: float = 0.4, window_seconds: float = 0.02
+) -> List[Tuple[float, float]]:
+    """
+    Find the silent parts of an audio signal
+
+    Args:
+        samples: int16 samples at SAMPLE_RATE
+        silence_db: Level (dBFS) below which a window is silent
+        min_silence_seconds: Minimum duration of a silence
+        window_seconds: Duration of the analysis windows
+
+    Returns:
+        List[Tuple[float, float]]: (start, end) of each silence in seconds
+    """
+    window = max(1, int(SAMPLE_RATE * window_seconds))
+    n_windows = len(samples) // window
+    if n_windows == 0:
+        return []
+    frames = samples[:n_windows * window].astype(np.float32).reshape(n_windows, window) / 32768.0
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    levels = 20 * np.log10(np.maximum(rms, 1e-10))
+    silent = levels < silence_db
+
+    silences = []
+    # boundaries of the runs of silent windows
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+        if (end - start) * window_seconds >= min_silence_seconds:
+            silences.append((float(start * window_seconds), float(end * window_seconds)))
+    return silences
+
+
+def plan_chunks(
+    duration: float,
+    silences: List[Tuple[float, float]],
+    chunk_seconds: float = 600.0,
+    overlap_seconds: float = 5.0,
+    search_seconds: Optional[float] = None,
+) -> List[Tuple[float, float, float, float]]:
+    """
+    Choose where to cut a recording
+
+    Each cut is placed in the middle of the silence closest to the target chunk length,
+    or at the target itself when there is no silence nearby. Chunks are then extended
+    by `overlap_seconds` on both sides.
+
+    Args:
+        duration: Duration of the recording in seconds
+        silences: Silences of the recording
+        chunk_seconds: Target chunk duration
+        overlap_seconds: Audio shared by two consecutive chunks on each side of a cut
+        search_seconds: Maximum distance between a cut and its target (default: a tenth of chunk_seconds)
+
+    Returns:
+        List[Tuple[float, float, float, float]]: (chunk_start, chunk_end, owned_start, owned_end)
+        in seconds. Utterances are kept by the chunk owning their middle.
+    """
+    if search_seconds is None:
+        search_seconds = chunk_seconds / 10
+    silence_midpoints = [(start + end) / 2 for start, end in silences]
+    cuts = [0.0]
+    while duration - cuts[-1] > chunk_seconds + search_seconds:
+        target = cuts[-1] + chunk_seconds
+        candidates = [m for m in silence_midpoints if abs(m - target) <= search_seconds and m > cuts[-1]]
+        cuts.append(min(candidates, key=lambda m: abs(m - target)) if candidates else target)
+    cuts.append(duration)
+
+    return [
+        (max(0.0, owned_start - overlap_seconds), min(duration, owned_end + overlap_seconds), owned_start, owned_end)
+        for owned_start, owned_end in zip(cuts[:-1], cuts[1:])
+    ]
+
+
+def write_wav(samples: np.ndarray, output_path: str) -> None:
+    """Write 16 kHz mono int16 samples to a WAV file"""
+    with wave.open(output_path, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(samples.tobytes())
+
+
+def _overlap(a_start: float, a_end: float, b_start: float, b_end: float) -> float:
+    return max(0.0, min(a_end, b_end) - max(a_start, b_start))
+
+
+def map_speakers(previous: List[Utterance], current: List[Utterance]) -> Dict[str, str]:
+    """
+    Map the speaker labels of a chunk to the labels of the previous chunk
+
+    Each transcription job names its speakers independently. Utterances transcribed twice
+    in the overlap of two chunks tell which labels are the same person.
+
+    Args:
+        previous: Utterances of the previous chunks (global times, final labels)
+        current: Utterances of the current chunk (global times, chunk labels)
+
+    Returns:
+        Dict[str, str]: Chunk label -> final label
+    """
+    weights = defaultdict(float)
+    for utterance in current:
+        for other in previous:
+            shared = _overlap(utterance.start, utterance.end, other.start, other.end)
+            if shared > 0:
+                weights[(utterance.speaker, other.speaker)] += shared
+
+    mapping = {}
+    used = set()
+    for (label, previous_label), _ in sorted(weights.items(), key=lambda item: -item[1]):
+        if label not in mapping and previous_label not in used:
+            mapping[label] = previous_label
+            used.add(previous_label)
+
+    # labels without evidence take the known speakers left, then new labels
+    known_labels = sorted({u.speaker for u in previous})
+    available = [known for known in known_labels if known not in used]
+    for label in sorted({u.speaker for u in current}):
+        if label in mapping:
+            continue
+        if available:
+            new_label = available.pop(0)
+        else:
+            new_label = label
+            while new_label in used or new_label in known_labels:
+                new_label = chr(ord(new_label[-1]) + 1) if len(new_label) == 1 else new_label + "'"
+        mapping[label] = new_label
+        used.add(new_label)
+    return mapping
+
+
+def stitch_chunks(chunks: List[Tuple[Tuple[float, float, float, float], List[Utterance]]]) -> List[Utterance]:
+    """
+    Merge the transcriptions of overlapping chunks into one list of utterances
+
+    Args:
+        chunks: ((chunk_start, chunk_end, owned_start, owned_end), utterances relative to the chunk)
+
+    Returns:
+        List[Utterance]: Utterances with global times and consistent speaker labels
+    """
+    stitched: List[Utterance] = []
+    for (chunk_start, _, owned_start, owned_end), utterances in chunks:
+        offset = chunk_start * 1000
+        shifted = [
+            u.model_copy(update={"start": u.start + offset, "end": u.end + offset})
+            for u in utterances
+        ]
+        mapping = map_speakers(stitched, shifted) if stitched else {u.speaker: u.speaker for u in shifted}
+        for u in shifted:
+            middle = (u.start + u.end) / 2
+            if owned_start * 1000 <= middle < owned_end * 1000:
+                stitched.append(u.model_copy(update={"speaker": mapping[u.speaker]}))
+    return stitched
+
+
+def transcribe_in_chunks(
+    audio_file_path: str,
+    transcribe: TranscribeFunction,
+    language_code: str = "fr",
+    word_boost: Optional[List[str]] = None,
+    chunk_seconds: float = 600.0,
+    overlap_seconds: float = 5.0,
+    workers: int = 4,
+    silence_db: float = -35.0,
+    min_silence_seconds: float = 0.4,
+) -> List[Utterance]:
+    """
+    Split a long recording on silences and transcribe the chunks concurrently
+
+    Args:
+        audio_file_path: Path to the audio file
+        transcribe: Function transcribing one chunk file
+        language_code: Language of the recording
+        word_boost: Words to boost
+        chunk_seconds: Target chunk duration
+        overlap_seconds: Audio shared by consecutive chunks
+        workers: Number of chunks transcribed at the same time
+        silence_db: Level (dBFS) below which audio is silent
+        min_silence_seconds: Minimum duration of a silence to cut on
+
+    Returns:
+        List[Utterance]: Utterances of the whole recording
+    """
+    samples = load_pcm(audio_file_path)
+    duration = len(samples) / SAMPLE_RATE
+    silences = detect_silences(samples, silence_db=silence_db, min_silence_seconds=min_silence_seconds)
+    plan = plan_chunks(duration, silences, chunk_seconds=chunk_seconds, overlap_seconds=overlap_seconds)
+
+    with tempfile.TemporaryDirectory() as chunk_dir:
+        chunk_files = []
+        for i, (chunk_start, chunk_end, _, _) in enumerate(plan):
+            chunk_file = os.path.join(chunk_dir, f"chunk_{i:04d}.wav")
+            write_wav(samples[int(chunk_start * SAMPLE_RATE):int(chunk_end * SAMPLE_RATE)], chunk_file)
+            chunk_files.append(chunk_file)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            chunk_utterances = list(executor.map(
+                lambda chunk_file: transcribe(chunk_file, language_code, word_boost), chunk_files
+            ))
+
+    return stitch_chunks(list(zip(plan, chunk_utterances)))
+
+
+def test_transcribe_in_chunks():
+    """Split a synthetic two-speaker recording and stitch the transcription of a stub backend"""
+    # 30 turns of 4s speech separated by 1s silences; speaker A is loud, speaker B is quiet
+    turns = []
+    t = np.arange(4 * SAMPLE_RATE) / SAMPLE_RATE
+    for i in range(30):
+        amplitude = 0.5 if i % 2 == 0 else 0.1
+        turns.append((amplitude * 32767 * np.sin(2 * np.pi * 220 * t)).astype(np.int16))
+        turns.append(np.zeros(SAMPLE_RATE, dtype=np.int16))
+    samples = np.concatenate(turns)
+
+    def stub_transcribe(chunk_file: str, language_code: str, word_boost: Optional[List[str]]) -> List[Utterance]:
+        """Stub backend: one utterance per non-silent part, labels depend on the chunk"""
+        chunk_samples = load_pcm(chunk_file)
+        chunk_duration = len(chunk_samples) / SAMPLE_RATE
+        silences = [(0.0, 0.0)] + detect_silences(chunk_samples) + [(chunk_duration, chunk_duration)]
+        # name speakers in order of appearance, like a real diarization job
+        names = {}
+        utterances = []
+        for (_, speech_start), (speech_end, _) in zip(silences[:-1], silences[1:]):
+            if speech_end - speech_start < 0.5:
+                continue
+            segment = chunk_samples[int(speech_start * SAMPLE_RATE):int(speech_end * SAMPLE_RATE)]
+            loud = np.abs(segment.astype(np.int32)).max() > 10000
+            if loud not in names:
+                names[loud] = "AB"[len(names)]
+            label = names[loud]
+            utterances.append(Utterance(
+                speaker=label, start=speech_start * 1000, end=speech_end * 1000,
+                text="loud" if loud else "quiet"
+            ))
+        return utterances
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        audio_file = os.path.join(tmp_dir, "workshop.wav")
+        write_wav(samples, audio_file)
+        utterances = transcribe_in_chunks(
+            audio_file, stub_transcribe, chunk_seconds=27, overlap_seconds=3, workers=4
+        )
+
+    assert len(utterances) == 30, f"Expected 30 utterances, got {len(utterances)}"
+    assert all(a.end <= b.start for a, b in zip(utterances, utterances[1:])), "Utterances overlap"
+    loud_speakers = {u.speaker for u in utterances if u.text == "loud"}
+    quiet_speakers = {u.speaker for u in utterances if u.text == "quiet"}
+    assert len(loud_speakers) == 1 and len(quiet_speakers) == 1 and loud_speakers != quiet_speakers, \
+        f"Speaker labels are not consistent across chunks: {loud_speakers} {quiet_speakers}"
+    assert abs(utterances[-1].start - 29 * 5000) < 100, "Timestamps were not shifted to the recording time"
+
+
+if __name__ == "__main__":
+    test_transcribe_in_chunks()
+    print("All tests passed!")
@@ -0,0 +1,309 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from user_research_helper.campaign.config import config
+from user_research_helper.transcript.transcript_retrieval import TranscriptBlock, split_transcript_blocks
+
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+
+class EmbeddingModel:
+    """
+    Sentence embeddings computed locally on CPU with a transformers model
+    (mean pooling of the last hidden states, L2 normalized)
+    """
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, batch_size: int = 32, max_length: int = 256, threads: int = 0):
+        """
+        Args:
+            model_name: Hugging Face model name or local path (a sentence-transformers model)
+            batch_size: Texts encoded per forward pass
+            max_length: Maximum tokens per text, longer texts are truncated
+            threads: CPU threads used by torch (0 keeps the torch default)
+
+        Raises:
+            ImportError: If transformers or torch is not installed
+        """
+        try:
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+        except ImportError:
+            raise ImportError(
+                "The embedding index requires transformers and torch. "
+                "Install them with: pip install transformers torch"
+            )
+        if threads:
+            torch.set_num_threads(threads)
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name)
+        self.model.eval()
+        self._lock = threading.Lock()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts
+
+        Returns:
+            np.ndarray: float32 matrix with one normalized row per text
+        """
+        import torch
+
+        vectors = []
+        with self._lock, torch.inference_mode():
+            for i in range(0, len(texts), self.batch_size):
+                inputs = self.tokenizer(
+                    texts[i:i + self.batch_size],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors="pt",
+                )
+                hidden = self.model(**inputs).last_hidden_state
+                mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                vectors.append(torch.nn.functional.normalize(pooled, p=2, dim=1).numpy())
+        if not vectors:
+            return np.zeros((0, self.model.config.hidden_size), dtype=np.float32)
+        return np.concatenate(vectors).astype(np.float32)
+
+
+class EmbeddingIndex:
+    """
+    Persistent vector index of the speaker blocks of the raw transcripts, one per interview.
+
+    For each transcript `<name>_raw.txt`, the directory holds `<name>.npy` (block embeddings,
+    opened memory-mapped) and `<name>.json` (blocks, transcript hash and model). `update` only
+    embeds the transcripts that are new or changed since they were indexed, so searching
+    a campaign never re-reads or re-embeds the other interviews.
+    """
+
+    def __init__(self, index_dir: str, model: Optional[EmbeddingModel] = None, model_name: str = DEFAULT_EMBEDDING_MODEL):
+        """
+        Args:
+            index_dir: Directory of the index files
+            model: Embedding model, loaded on first use when not provided
+            model_name: Name of the model to load
+        """
+        self.index_dir = index_dir
+        self.model_name = model.model_name if model else model_name
+        self._model = model
+        self._loaded: Dict[str, Tuple[np.ndarray, List[TranscriptBlock]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def model(self) -> EmbeddingModel:
+        with self._lock:
+            if self._model is None:
+                self._model = EmbeddingModel(self.model_name)
+            return self._model
+
+    @staticmethod
+    def interview_name(transcript_path: str) -> str:
+        return os.path.splitext(os.path.basename(transcript_path))[0].replace('_raw', '')
+
+    def _paths(self, name: str) -> Tuple[str, str]:
+        return os.path.join(self.index_dir, f"{name}.npy"), os.path.join(self.index_dir, f"{name}.json")
+
+    def _metadata(self, name: str) -> Optional[dict]:
+        _, metadata_path = self._paths(name)
+        if not os.path.exists(metadata_path):
+            return None
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def is_current(self, name: str, transcript: str) -> bool:
+        """Check if the interview is indexed for this transcript content and model"""
+        metadata = self._metadata(name)
+        return (
+            metadata is not None
+            and metadata["transcript_hash"] == hashlib.sha256(transcript.encode('utf-8')).hexdigest()
+            and metadata["model"] == self.model_name
+            and os.path.exists(self._paths(name)[0])
+        )
+
+    def add(self, transcript_path: str, transcript: Optional[str] = None) -> bool:
+        """
+        Index a transcript unless it is already indexed with the same content
+
+        Args:
+            transcript_path: Path to the raw transcript
+            transcript: Content of the transcript, read from the file when not provided
+
+        Returns:
+            bool: True if the transcript was (re)embedded
+        """
+        if transcript is None:
+            with open(transcript_path, 'r', encoding='utf-8') as f:
+                transcript = f.read()
+        name = self.interview_name(transcript_path)
+        if self.is_current(name, transcript):
+            return False
+
+        blocks = split_transcript_blocks(transcript)
+        vectors = self.model.encode([block.text for block in blocks])
+        os.makedirs(self.index_dir, exist_ok=True)
+        vectors_path, metadata_path = self._paths(name)
+        # np.save appends .npy to names without it
+        tmp_vectors_path = vectors_path[:-len(".npy")] + ".tmp.npy"
+        np.save(tmp_vectors_path, vectors)
+        os.replace(tmp_vectors_path, vectors_path)
+        with open(metadata_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump({
+                "source": os.path.basename(transcript_path),
+                "transcript_hash": hashlib.sha256(transcript.encode('utf-8')).hexdigest(),
+                "model": self.model_name,
+                "dimension": int(vectors.shape[1]),
+                "blocks": [block.model_dump() for block in blocks],
+            }, f, ensure_ascii=False)
+        os.replace(metadata_path + ".tmp", metadata_path)
+        with self._lock:
+            self._loaded.pop(name, None)
+        return True
+
+    def update(self, transcript_paths: List[str]) -> List[str]:
+        """
+        Index the new or changed transcripts and drop the interviews whose transcript is gone
+
+        Args:
+            transcript_paths: Paths of all the raw transcripts of the campaign
+
+        Returns:
+            List[str]: Names of the interviews (re)embedded
+        """
+        updated = [
+            self.interview_name(path) for path in transcript_paths if self.add(path)
+        ]
+        names = {self.interview_name(path) for path in transcript_paths}
+        if os.path.isdir(self.index_dir):
+            for f in os.listdir(self.index_dir):
+                name, extension = os.path.splitext(f)
+                if extension in (".npy", ".json") and name not in names:
+                    os.remove(os.path.join(self.index_dir, f))
+        return updated
+
+    def load(self, name: str) -> Tuple[np.ndarray, List[TranscriptBlock]]:
+        """
+        Memory-map the embeddings of an interview
+
+        Returns:
+            Tuple[np.ndarray, List[TranscriptBlock]]: Embedding matrix (one row per block) and blocks
+
+        Raises:
+            FileNotFoundError: If the interview is not indexed
+        """
+        with self._lock:
+            if name not in self._loaded:
+                metadata = self._metadata(name)
+                if metadata is None:
+                    raise FileNotFoundError(f"Interview {name} is not in the embedding index {self.index_dir}")
+                vectors = np.load(self._paths(name)[0], mmap_mode='r')
+                self._loaded[name] = (vectors, [TranscriptBlock.model_validate(b) for b in metadata["blocks"]])
+            return self._loaded[name]
+
+    def scorer(self, transcript_path: str, transcript: Optional[str] = None) -> Callable[[str], List[float]]:
+        """
+        Cosine similarity scorer of the blocks of a transcript, indexing it first if needed.
+        Blocks are in the order of `split_transcript_blocks`, so the scorer can replace
+        the lexical scores of a TranscriptIndex built on the same transcript.
+
+        Args:
+            transcript_path: Path to the raw transcript
+            transcript: Content of the transcript, read from the file when not provided
+        """
+        self.add(transcript_path, transcript)
+        vectors, _ = self.load(self.interview_name(transcript_path))
+
+        def scores(query: str) -> List[float]:
+            return (vectors @ self.model.encode([query])[0]).tolist()
+
+        return scores
+
+    def search(self, query: str, top_k: int = 5, names: Optional[List[str]] = None) -> List[Tuple[str, TranscriptBlock, float]]:
+        """
+        Find the blocks closest to a query across the indexed interviews (e.g. to look up quotes)
+
+        Args:
+            query: Text to look for
+            top_k: Number of blocks returned
+            names: Interviews searched (default: all the indexed interviews)
+
+        Returns:
+            List[Tuple[str, TranscriptBlock, float]]: (interview, block, similarity), best first
+        """
+        if names is None:
+            names = sorted(
+                os.path.splitext(f)[0] for f in os.listdir(self.index_dir) if f.endswith(".json")
+            ) if os.path.isdir(self.index_dir) else []
+        query_vector = self.model.encode([query])[0]
+        matches = []
+        for name in names:
+            vectors, blocks = self.load(name)
+            similarities = vectors @ query_vector
+            for i in np.argsort(-similarities)[:top_k]:
+                matches.append((name, blocks[int(i)], float(similarities[i])))
+        return sorted(matches, key=lambda match: -match[2])[:top_k]
+
+
+_indexes: Dict[str, EmbeddingIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_embedding_index() -> EmbeddingIndex:
+    """
+    Get the embedding index of the current project (config path `embedding_index_dir`,
+    model `embedding_index.model`)
+    """
+    index_dir = config.get_path('embedding_index_dir')
+    model_name = config.get_config('embedding_index.model', DEFAULT_EMBEDDING_MODEL)
+    with _indexes_lock:
+        key = f"{index_dir}|{model_name}"
+        if key not in _indexes:
+            _indexes[key] = EmbeddingIndex(index_dir, model_name=model_name)
+        return _indexes[key]
+
+
+def update_embedding_index() -> List[str]:
+    """
+    Index the raw transcripts of the project that are new or changed
+
+    Returns:
+        List[str]: Names of the interviews (re)embedded
+    """
+    raw_transcript_dir = config.get_path('raw_transcript_dir')
+    ignored_files = config.get_config('ignored_files', ['.DS_Store', '.gitkeep', 'Thumbs.db', '.gitignore'])
+    transcript_paths = [
+        os.path.join(raw_transcript_dir, f)
+        for f in sorted(os.listdir(raw_transcript_dir))
+        if f.endswith('.txt') and f not in ignored_files
+    ] if os.path.isdir(raw_transcript_dir) else []
+    return get_embedding_index().update(transcript_paths)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Update the embedding index of the raw transcripts and search it')
+    parser.add_argument('root_dir', default="demo", nargs='?', help='Root directory containing all project files')
+    parser.add_argument('--query', help='Text to look for in the transcripts')
+    parser.add_argument('--top-k', type=int, default=5, help='Number of passages returned')
+    args = parser.parse_args()
+
+    config.initialize(args.root_dir)
+    start = time.perf_counter()
+    updated = update_embedding_index()
+    print(f"{len(updated)} transcripts embedded in {time.perf_counter() - start:.1f}s")
+    if args.query:
+        start = time.perf_counter()
+        matches = get_embedding_index().search(args.query, args.top_k)
+        print(f"Search in {(time.perf_counter() - start) * 1000:.0f} ms:")
+        for name, block, similarity in matches:
+            print(f"[{similarity:.2f}] {name}: {block.text}")
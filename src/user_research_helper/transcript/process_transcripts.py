@@ -1,14 +1,24 @@
 import os
 import shutil
-from typing import List, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import Dict, List, Optional, Tuple
 
 
 # Import other modules after loading environment variables
 from user_research_helper.campaign.question_parsing import parse_questions
-from user_research_helper.transcript.transcript_builder import process_interview_transcript
+from user_research_helper.transcript.transcript_builder import process_interview_transcript, format_utterances
+from user_research_helper.transcript.transcription_backends import AssemblyAIBackend, get_backend
+from user_research_helper.transcript.assemblyai_batch import transcribe_batch
 from user_research_helper.transcript.transcript_analysis import analyze_transcript_with_questions
 from user_research_helper.transcript.transcript_report_builder import create_excel_report
+from user_research_helper.campaign.build_state import fingerprint, get_build_state, settings_fingerprint
 from user_research_helper.campaign.config import config
+from user_research_helper.campaign.journal import ResultJournal
+from user_research_helper.campaign.metrics import get_metrics, print_run_summary, start_run
+from user_research_helper.llm.cache import print_cache_stats
+from user_research_helper.llm.router import print_router_stats
 
 def process_audio(audio_file: str, questions: List[Tuple[str, str]]) -> str:
     """
@@ -31,25 +41,62 @@ def process_audio(audio_file: str, questions: List[Tuple[str, str]]) -> str:
     # Define output file
     raw_transcript_file = os.path.join(raw_transcript_dir, f"{interview_name}_raw.txt")
     
-    # Check if transcript already exists
-    if os.path.exists(raw_transcript_file):
+    # Check if transcript is up to date with the recording and the transcription settings
+    if transcript_up_to_date(audio_file):
         if config.should_debug('verbose'):
-            print(f"Skipping transcription for {interview_name} - transcript already exists")
+            print(f"Skipping transcription for {interview_name} - transcript up to date")
         return raw_transcript_file
     
     # Generate transcript
     if config.should_debug('verbose'):
         print(f"Transcribing {interview_name}...")
+    backend = get_backend(config.get_config('transcription', {}))
     transcript = process_interview_transcript(
         audio_file,
         language_code=config.get_config('language_id'),
-        word_boost=config.word_boost
+        word_boost=config.word_boost,
+        chunking=config.get_config('transcription.chunking', {}),
+        backend=backend
     )
+    # chunked recordings are timed per chunk, only their wall time is recorded
+    if audio_file in backend.timings:
+        audio_seconds, processing_seconds = backend.timings[audio_file]
+        get_metrics().update(
+            "transcription", interview_name,
+            audio_seconds=round(audio_seconds, 1), processing_seconds=round(processing_seconds, 3)
+        )
+    return save_raw_transcript(audio_file, transcript)
+
+def save_raw_transcript(audio_file: str, transcript: str) -> str:
+    """
+    Save the raw transcript of an audio file
+    
+    Args:
+        audio_file: Path to the audio file
+        transcript: Formatted transcript
+    
+    Returns:
+        str: Path to the transcript file
+    """
+    raw_transcript_file = raw_transcript_path(audio_file)
+    os.makedirs(os.path.dirname(raw_transcript_file), exist_ok=True)
+    state = get_build_state()
+    node = f"transcription/{os.path.splitext(os.path.basename(audio_file))[0]}"
+    if state.output_modified(node, raw_transcript_file):
+        # keep the corrections made by hand before overwriting the transcript
+        edited_file = raw_transcript_file.replace('_raw.txt', '_raw_edited.txt')
+        shutil.copy2(raw_transcript_file, edited_file)
+        print(f"Raw transcript was edited, previous version saved to {edited_file}")
     with open(raw_transcript_file, "w", encoding="utf-8") as f:
         f.write(transcript)
+    state.record(node, transcription_inputs(audio_file), [raw_transcript_file])
+    get_metrics().update(
+        "transcription", os.path.splitext(os.path.basename(audio_file))[0],
+        bytes_written=len(transcript.encode("utf-8"))
+    )
         
     if config.should_debug('print_transcripts'):
-        print(f"\nTranscript for {interview_name}:")
+        print(f"\nTranscript for {os.path.splitext(os.path.basename(audio_file))[0]}:")
         print(transcript)
     
     return raw_transcript_file
@@ -76,79 +123,243 @@ def process_transcript(transcript_file: str, questions: List[Tuple[str, str]]) -
         print(f"Error: Cannot analyze {interview_name} - raw transcript not found at {transcript_file}")
         return
     
-    # Skip analysis if structured transcript already exists
-    if os.path.exists(structured_transcript_file):
+    # Skip the analysis if the transcript, questions and extraction settings did not change
+    state = get_build_state()
+    node = f"extraction/{interview_name}"
+    inputs = {
+        "transcript": state.file_fingerprint(transcript_file),
+        "settings": settings_fingerprint("extraction"),
+        "questions": fingerprint(questions),
+    }
+    changes = state.changes(node, inputs, [structured_transcript_file])
+    if changes == set():
         if config.should_debug('verbose'):
-            print(f"Skipping analysis for {interview_name} - structured transcript already exists")
+            print(f"Skipping analysis of {interview_name} - structured transcript up to date")
         return
+    if changes and changes & {"transcript", "settings"}:
+        # answers of the former transcript or settings can not be reused
+        ResultJournal(structured_transcript_file).discard()
+        state.record(node, inputs, complete=False)
     
+    # Questions already analyzed in the structured transcript are reused
     print(f"Analyzing {interview_name}...")
     results = analyze_transcript_with_questions(
         transcript_path=transcript_file,
         questions=questions,
         output_path=structured_transcript_file
     )
+    # failed questions are retried by the next run
+    complete = not any(result.get('status') == 'failed' for result in results.values())
+    state.record(node, inputs, [structured_transcript_file], complete=complete)
     if config.should_debug('print_analysis'):
         print(f"\nAnalysis results for {interview_name}:")
         print(results)
 
 
 
+def list_audio_files() -> List[str]:
+    """
+    List the audio files of the audio directory
+    
+    Returns:
+        List[str]: Paths of the audio files to transcribe
+    """
+    audio_dir = config.get_path('audio_dir')
+    audio_extensions = {'.m4a', '.mp3', '.wav', '.aac'}
+    ignored_files = config.get_config('ignored_files', ['.DS_Store', '.gitkeep', 'Thumbs.db', '.gitignore'])
+    return [
+        os.path.join(audio_dir, f) 
+        for f in sorted(os.listdir(audio_dir)) 
+        if os.path.splitext(f)[1].lower() in audio_extensions
+        and f not in ignored_files
+    ]
+
+def raw_transcript_path(audio_file: str) -> str:
+    """Path of the raw transcript produced for an audio file"""
+    interview_name = os.path.splitext(os.path.basename(audio_file))[0]
+    return os.path.join(config.get_path('raw_transcript_dir'), f"{interview_name}_raw.txt")
+
+def transcription_inputs(audio_file: str) -> Dict[str, str]:
+    """Fingerprints of what the raw transcript of an audio file depends on"""
+    return {
+        "audio": get_build_state().file_fingerprint(audio_file),
+        "settings": settings_fingerprint("transcription"),
+    }
+
+def transcript_up_to_date(audio_file: str) -> bool:
+    """Check if the raw transcript of an audio file was made from the same recording with the same settings"""
+    return get_build_state().is_up_to_date(
+        f"transcription/{os.path.splitext(os.path.basename(audio_file))[0]}",
+        transcription_inputs(audio_file), [raw_transcript_path(audio_file)]
+    )
+
+def existing_transcript(audio_file: str) -> Optional[str]:
+    """
+    Raw transcript left by a previous run for an audio file whose transcription failed,
+    so that its interview is still analyzed and kept in the report
+    """
+    transcript_file = raw_transcript_path(audio_file)
+    if not os.path.exists(transcript_file):
+        return None
+    print(f"Transcription of {os.path.basename(audio_file)} failed, its existing transcript is used")
+    return transcript_file
+
+def _run_with_slot(slots: threading.BoundedSemaphore, stage: str, name: str, queued_at: float, func, *args) -> Optional[str]:
+    """
+    Run one stage of an interview while holding a global worker slot.
+    Errors are reported and swallowed so that one interview never stops the others.
+    The queue wait (since `queued_at`, slot wait included) and wall time go to the run metrics.
+    """
+    interview_name = os.path.splitext(name)[0].replace('_raw', '')
+    with slots, get_metrics().timed(stage, interview_name, queued_at) as record:
+        try:
+            return func(*args)
+        except Exception as e:
+            record["ok"] = False
+            print(f"Error during {stage} of {name}: {str(e)}")
+            if config.should_debug('verbose'):
+                import traceback
+                print(traceback.format_exc())
+            return None
+
+def transcribe_audio_batch(audio_files: List[str], batch_settings: dict, on_transcript) -> None:
+    """
+    Transcribe audio files with AssemblyAI in submit-all-then-poll mode
+    
+    Every recording without an up to date raw transcript is submitted up front; transcripts are saved
+    and passed to `on_transcript` (e.g. to start their analysis) as soon as each job is done.
+    
+    Args:
+        audio_files: Paths of the audio files
+        batch_settings: Config section `transcription.batch`
+        on_transcript: Called with the transcript file and the audio file name
+    """
+    to_transcribe = []
+    for audio_file in audio_files:
+        if transcript_up_to_date(audio_file):
+            if config.should_debug('verbose'):
+                print(f"Skipping transcription for {os.path.basename(audio_file)} - transcript up to date")
+            on_transcript(raw_transcript_path(audio_file), os.path.basename(audio_file))
+        else:
+            to_transcribe.append(audio_file)
+    if not to_transcribe:
+        return
+    
+    def on_complete(audio_file, utterances):
+        audio_seconds, processing_seconds = backend.timings.get(audio_file, (0.0, 0.0))
+        get_metrics().update(
+            "transcription", os.path.splitext(os.path.basename(audio_file))[0],
+            audio_seconds=round(audio_seconds, 1), processing_seconds=round(processing_seconds, 3)
+        )
+        transcript_file = save_raw_transcript(audio_file, format_utterances(utterances))
+        on_transcript(transcript_file, os.path.basename(audio_file))
+    
+    backend = get_backend(config.get_config('transcription', {}))
+    print(f"Submitting {len(to_transcribe)} audio files to AssemblyAI...")
+    with get_metrics().timed("transcription_batch", "assemblyai") as record:
+        failures = transcribe_batch(
+            to_transcribe,
+            on_complete,
+            backend,
+            language_code=config.get_config('language_id'),
+            word_boost=config.word_boost,
+            upload_workers=batch_settings.get('upload_workers', 4),
+            poll_interval=batch_settings.get('poll_interval_seconds', 3.0),
+        )
+        record["audio_files"] = len(to_transcribe)
+        record["failures"] = len(failures)
+    if failures:
+        print(f"{len(failures)} audio files could not be transcribed, rerun to retry them")
+        for audio_file in failures:
+            transcript_file = existing_transcript(audio_file)
+            if transcript_file:
+                on_transcript(transcript_file, os.path.basename(audio_file))
+    elif config.should_debug('verbose') and backend.real_time_factor():
+        print(f"Batch transcription done (real-time factor {backend.real_time_factor():.2f})")
+
 def process_interview_directory(
     questions: List[Tuple[str, str]],
 ) -> None:
     """
     Process all audio interviews in a directory
     
+    Transcription and analysis run as a pipeline: the analysis of an interview starts
+    as soon as its transcript is available, while other transcriptions are still in flight.
+    Concurrency is bounded per stage (`concurrency.transcription_workers`,
+    `concurrency.analysis_workers`) and globally (`concurrency.max_workers`).
+    
     Args:
         questions: List of (question_id, question_text) tuples
     """
 
     raw_transcript_dir = config.get_path('raw_transcript_dir')
     structured_transcript_dir = config.get_path('structured_transcript_dir')
-
-    if (config.get_config('do_transcribe_audio', True)) :
-        # Get audio directory
-        audio_dir = config.get_path('audio_dir')
-        
-        # Get all audio files
-        audio_extensions = {'.m4a', '.mp3', '.wav', '.aac'}
-        ignored_files = config.get_config('ignored_files', ['.DS_Store', '.gitkeep', 'Thumbs.db', '.gitignore'])
-        audio_files = [
-            os.path.join(audio_dir, f) 
-            for f in os.listdir(audio_dir) 
-            if os.path.splitext(f)[1].lower() in audio_extensions
-            and f not in ignored_files
-        ]
-        
+    
+    do_transcribe = config.get_config('do_transcribe_audio', True)
+    do_analyze = config.get_config('do_analyze_audio_transcript', True)
+    
+    transcription_workers = max(1, config.get_config('concurrency.transcription_workers', 1))
+    analysis_workers = max(1, config.get_config('concurrency.analysis_workers', 1))
+    max_workers = max(1, config.get_config('concurrency.max_workers', transcription_workers + analysis_workers))
+    slots = threading.BoundedSemaphore(max_workers)
+    
+    audio_files = []
+    if do_transcribe:
+        audio_files = list_audio_files()
         if config.should_debug('verbose'):
-            print(f"\nFound {len(audio_files)} audio files in {audio_dir}:")
+            print(f"\nFound {len(audio_files)} audio files in {config.get_path('audio_dir')}:")
             for f in audio_files:
                 print(f"  - {os.path.basename(f)}")
         else:
             print(f"Found {len(audio_files)} audio files to process")
+    
+    with ThreadPoolExecutor(max_workers=transcription_workers, thread_name_prefix="transcription") as transcription_pool, \
+            ThreadPoolExecutor(max_workers=analysis_workers, thread_name_prefix="analysis") as analysis_pool:
+        analysis_futures: List[Future] = []
         
-        # Process each audio file
+        def schedule_analysis(transcript_file: Optional[str], name: str) -> None:
+            if do_analyze and transcript_file:
+                analysis_futures.append(analysis_pool.submit(
+                    _run_with_slot, slots, "analysis", name, time.perf_counter(), process_transcript, transcript_file, questions
+                ))
+        
+        # Transcripts already on disk and not produced by this run are analyzed right away
+        if do_analyze and os.path.isdir(raw_transcript_dir):
+            pending_raw_files = {raw_transcript_path(audio_file) for audio_file in audio_files}
+            ignored_files = config.get_config('ignored_files', ['.DS_Store', '.gitkeep', 'Thumbs.db', '.gitignore'])
+            for f in sorted(os.listdir(raw_transcript_dir)):
+                transcript_file = os.path.join(raw_transcript_dir, f)
+                if f not in ignored_files and transcript_file not in pending_raw_files:
+                    schedule_analysis(transcript_file, f)
+        
+        # Each finished transcription immediately feeds the analysis stage
+        batch_settings = config.get_config('transcription.batch', {})
+        if audio_files and batch_settings.get('enabled', False) \
+                and config.get_config('transcription.backend', AssemblyAIBackend.name) == AssemblyAIBackend.name:
+            transcribe_audio_batch(audio_files, batch_settings, schedule_analysis)
+            audio_files = []
         for audio_file in audio_files:
-            try:
-                transcript_file = None
-                transcript_file = process_audio(audio_file, questions)
-            except Exception as e:
-                print(f"Error processing {audio_file}: {str(e)}")
-                if config.should_debug('verbose'):
-                    import traceback
-                    print(traceback.format_exc())
-    
-    if (config.get_config('do_analyze_audio_transcript', True)):
-        # structure transcript if necessary
-        ignored_files = config.get_config('ignored_files', ['.DS_Store', '.gitkeep', 'Thumbs.db', '.gitignore'])
-        transcript_files = [
-            os.path.join(raw_transcript_dir, f) 
-            for f in os.listdir(raw_transcript_dir) 
-            if f not in ignored_files
-        ]
-        for transcript_file in transcript_files:
-            process_transcript(transcript_file, questions)
+            name = os.path.basename(audio_file)
+            transcription_future = transcription_pool.submit(
+                _run_with_slot, slots, "transcription", name, time.perf_counter(), process_audio, audio_file, questions
+            )
+            transcription_future.add_done_callback(
+                lambda future, audio_file=audio_file, name=name: schedule_analysis(
+                    future.result() or existing_transcript(audio_file), name
+                )
+            )
+        
+        transcription_pool.shutdown(wait=True)
+        wait(analysis_futures)
+    
+    # Index the new or changed transcripts for passage search
+    if config.get_config('embedding_index.enabled', False):
+        from user_research_helper.transcript.embedding_index import update_embedding_index
+        with get_metrics().timed("embedding_index", "update") as record:
+            updated = update_embedding_index()
+            record["transcripts"] = len(updated)
+        if config.should_debug('verbose'):
+            print(f"Embedding index updated for {len(updated)} transcripts")
     
     
     # Generate report if requested
@@ -173,22 +384,51 @@ def process_interview_directory(
         ]
         
         if results_files:
-            # Create report
-            create_excel_report(questions, results_files, report_file)
-            if config.should_debug('verbose'):
-                print(f"Report generated: {report_file}")
-            if not os.path.exists(analysis_report_file):
-                # copy report file if not already existing
-                shutil.copy2(report_file, analysis_report_file)
-                #copy report quotres if not already existing 
-                shutil.copy2(report_file.replace('.xlsx', '_quotes.xlsx'), analysis_report_file.replace('.xlsx', '_quotes.xlsx'))
+            # Create report, unless the structured transcripts and questions did not change
+            state = get_build_state()
+            report_files = [report_file, report_file.replace('.xlsx', '_quotes.xlsx')]
+            inputs = {"structured": state.files_fingerprint(results_files), "questions": fingerprint(questions)}
+            rebuilt = not state.is_up_to_date("transcript_report", inputs, report_files)
+            if rebuilt:
+                with get_metrics().timed("transcript_report", os.path.basename(report_file)) as record:
+                    create_excel_report(questions, results_files, report_file)
+                    record["interviews"] = len(results_files)
+                    record["bytes_written"] = os.path.getsize(report_file)
+                state.record("transcript_report", inputs, report_files)
                 if config.should_debug('verbose'):
-                    print(f"Copied report file to analysis directory: {analysis_report_file}")
+                    print(f"Report generated: {report_file}")
+            elif config.should_debug('verbose'):
+                print(f"Report up to date: {report_file}")
+            if rebuilt or not os.path.exists(analysis_report_file):
+                copy_report_to_analysis(report_file, analysis_report_file)
             # Create segment dataset if requested
         else:
             print("No structured transcripts found to generate report")
         
 
+def copy_report_to_analysis(report_file: str, analysis_report_file: str) -> None:
+    """
+    Copy the transcript report (and its quotes) to the analysis directory, where it is
+    edited by hand. A copy that was edited since it was made is never overwritten.
+    """
+    state = get_build_state()
+    node = "analysis_transcript_report"
+    sources = [report_file, report_file.replace('.xlsx', '_quotes.xlsx')]
+    copies = [analysis_report_file, analysis_report_file.replace('.xlsx', '_quotes.xlsx')]
+    inputs = {"report": state.files_fingerprint(sources)}
+    if os.path.exists(analysis_report_file):
+        # copies made before the build records may have been edited
+        edited = state.changes(node, inputs) is None or any(state.output_modified(node, copy) for copy in copies)
+        if edited:
+            print(f"The transcript report changed but {analysis_report_file} was edited and is kept: "
+                  f"report the changes of {report_file} into it or delete it to get the new report")
+            return
+    for source, copy in zip(sources, copies):
+        shutil.copy2(source, copy)
+    state.record(node, inputs, copies)
+    if config.should_debug('verbose'):
+        print(f"Copied report file to analysis directory: {analysis_report_file}")
+
 def process_transcripts(
     root_dir: str = "data"
 ) -> None:
@@ -201,6 +441,7 @@ def process_transcripts(
     try:
         # Initialize configuration
         config.initialize(root_dir)
+        metrics = start_run("process_transcripts")
         if config.should_debug('verbose'):
             print(f"Initialized configuration:")
             print(f"  Root directory: {config.root_dir}")
@@ -221,6 +462,16 @@ def process_transcripts(
         process_interview_directory(
             questions=questions,
         )
+        
+        if config.should_debug('verbose'):
+            print_cache_stats()
+            print_router_stats()
+        
+        if config.get_config('metrics.enabled', True):
+            report_file = metrics.write_report(config.get_path('run_report_dir'))
+            if config.should_debug('verbose'):
+                print_run_summary(metrics.summary())
+                print(f"Run metrics saved to {report_file}")
             
     except (ValueError, FileNotFoundError, RuntimeError) as e:
         print(f"Error: {str(e)}")
@@ -1,10 +1,19 @@
 from pydantic import BaseModel, Field
-from typing import List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from enum import Enum
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
 import json
 import os
-from openai import OpenAI
+import threading
+import time
+from pydantic import ValidationError
 from user_research_helper.campaign.config import config
+from user_research_helper.campaign.journal import ResultJournal
+from user_research_helper.campaign.metrics import get_metrics
+from user_research_helper.llm.completion import LLMCallError
+from user_research_helper.llm.router import route_chat_completion
+from user_research_helper.transcript.transcript_retrieval import TranscriptIndex, estimate_tokens
 
 class Confidence(str, Enum):
     low = "low"
@@ -17,119 +26,685 @@ class AnalysisResult(BaseModel):
     confidence: Confidence = Field(..., description="Niveau de confiance dans la réponse")
     quote: str = Field(..., description="Citation extraite")
 
+
+def parse_answer(response) -> AnalysisResult:
+    """
+    Parse the answer of a single question request
+
+    Raises:
+        LLMCallError: If the response is not a valid answer (it is then not cached)
+    """
+    try:
+        return AnalysisResult(**json.loads(response.choices[0].message.content.strip()))
+    except (json.JSONDecodeError, TypeError, ValidationError) as e:
+        raise LLMCallError(f"Invalid answer: {str(e)}") from e
+
+
+def validate_answers(response) -> None:
+    """Reject a batch response that is not a JSON object, before it is cached"""
+    try:
+        parsed = json.loads(response.choices[0].message.content)
+    except (json.JSONDecodeError, TypeError) as e:
+        raise LLMCallError(f"Invalid answers: {str(e)}") from e
+    if not isinstance(parsed, dict):
+        raise LLMCallError(f"Invalid answers: {str(parsed)[:200]}")
+
+
+HISTORY_POLICIES = ("stateless", "window", "summary")
+CONTEXT_MODES = ("full", "retrieval")
+
 class TranscriptAnalyzer:
-    def __init__(self, transcript: str):
-        """Initialize OpenAI client"""
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=os.environ.get("OPENROUTER_API_KEY"),
-        )
-        self.client=OpenAI()
-        
+    """
+    Answers questions about one transcript.
+    
+    The chat history sent with each request follows `extraction.history`:
+        - stateless (default): only the transcript and the current question
+        - window: also the last `extraction.history_window` question/answer pairs
+        - summary: also a compact list of the answers already found, bounded by
+          `extraction.history_summary_chars` characters
+    With concurrent questions, window and summary only see the answers already returned.
+    
+    The transcript sent with each request follows `extraction.context_mode`:
+        - full (default): the whole transcript
+        - retrieval: only the speaker blocks most relevant to the question(s), the
+          `extraction.retrieval_top_k` best blocks per question (plus the following block)
+          within `extraction.retrieval_token_budget` tokens. Blocks are ranked by BM25, or by
+          `scorer` (e.g. embedding similarity) when given
+    """
+    def __init__(self, transcript: str, scorer: Optional[Callable[[str], List[float]]] = None):
+        """Prepare the prompts of the transcript (models are chosen by the `extraction` stage of the router)"""
         self.transcript = transcript
-         # Initialize chat history with system prompt
-        self.messages = [
-            {
-                "role": "system",
-                "content": f"""You are a user research specialist analyzing user interviews. Consider the following transcript of an interview:
-                {self.transcript}
-
-                Consider also the following keywords that are important and might be mispelled in the transcript : {config.get_config('word_boost', "")}
+        self.context_mode = config.get_config('extraction.context_mode', 'full')
+        if self.context_mode not in CONTEXT_MODES:
+            raise ValueError(f"Unknown extraction.context_mode: {self.context_mode} (expected one of {CONTEXT_MODES})")
+        self.retrieval_top_k = config.get_config('extraction.retrieval_top_k', 4)
+        self.retrieval_token_budget = config.get_config('extraction.retrieval_token_budget', 1500)
+        self.index = TranscriptIndex(transcript, scorer=scorer)
+         # Initialize chat history with system prompt (in retrieval mode, built for each request)
+        self.messages = [self._system_message(self.transcript)] if self.context_mode == 'full' else []
+
+        self.history_policy = config.get_config('extraction.history', 'stateless')
+        if self.history_policy not in HISTORY_POLICIES:
+            raise ValueError(f"Unknown extraction.history policy: {self.history_policy} (expected one of {HISTORY_POLICIES})")
+        self.history_window = config.get_config('extraction.history_window', 3)
+        self.history_summary_chars = config.get_config('extraction.history_summary_chars', 2000)
+        # (question_text, response_text, analysis_result) of the questions already answered
+        self.history: List[Tuple[str, str, AnalysisResult]] = []
+        # prompt tokens of every request, to check that prompt size stays flat
+        self.prompt_sizes: List[int] = []
+        # estimated tokens of the transcript part of every request
+        self.context_sizes: List[int] = []
+        # prompt tokens of every request served from the provider's prompt cache
+        self.cached_sizes: List[int] = []
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def _system_message(self, transcript: str) -> dict:
+        """
+        System prompt: everything that does not depend on the question, so that the prompt
+        prefix is identical for every question and cached by the provider. Instructions and
+        context shared by all the interviews come first, then the transcript of the interview.
+        The question is always sent last, in the user message.
+        """
+        language = config.get_config('language', 'English')
+        return {
+            "role": "system",
+            "content": f"""You are a user research specialist analyzing user interviews.
+                You will be asked questions which are in {language}. For each question, analyze the transcript to find from the person who is interviewed the answer he gave to this question.
+
+                Extract the relevant information that answers the question. Do not invent anything : check that the answer is done by the person who is interviewed. Summarize the answer to contain the important insights in the context of this interview and the question. Be sure that you do not invent anything by checking that the extrated information is in the interview. Check that the extrated information answers the question. Reformulate and do this process again if necessary until you have something perfect. The answer must be in {language}.
+
+                Take into account the following context instructions:
+                {config.get_config('llm_common_context', "")}
+                {config.get_config('llm_answer_extraction_context', "")}
+
+                Each answer has this exact JSON structure:
+                {{
+                    "found": boolean,
+                    "answer": "string with the extracted answer in {language} or empty string if not found",
+                    "confidence": "low" or "medium" or "high"
+                    "quote": "if there is a very representative and compact quote (few words), include it here. If there is not such a very interesting quote that could be reused later, leave the field empty"
+                }}
+
+                Consider the following keywords that are important and might be mispelled in the transcript : {config.get_config('word_boost', "")}
+
+                Consider the following transcript of an interview:
+                {transcript}
                 """
-            }
-        ]
+        }
+
+    def _build_messages(self, prompt: str, question_texts: List[str]) -> List[dict]:
+        """Build the messages of a request according to the context mode and the history policy"""
+        if self.context_mode == 'retrieval':
+            context = self.index.context(question_texts, self.retrieval_top_k, self.retrieval_token_budget)
+            messages = [self._system_message(context)]
+        else:
+            context = self.transcript
+            messages = list(self.messages)
+        context_size = estimate_tokens(context)
+        with self._lock:
+            self.context_sizes.append(context_size)
+            history = list(self.history)
+        
+        if self.history_policy == 'window' and self.history_window > 0:
+            for question_text, response_text, _ in history[-self.history_window:]:
+                messages.append({"role": "user", "content": f"Question: {question_text}"})
+                messages.append({"role": "assistant", "content": response_text})
+        elif self.history_policy == 'summary' and history:
+            lines = []
+            budget = self.history_summary_chars
+            # keep the most recent answers that fit in the budget
+            for question_text, _, result in reversed(history):
+                if not result.found:
+                    continue
+                line = f"- {question_text} -> {result.answer}"
+                if len(line) > budget:
+                    break
+                budget -= len(line)
+                lines.insert(0, line)
+            if lines:
+                messages.append({
+                    "role": "system",
+                    "content": "Answers already extracted from this interview:\n" + "\n".join(lines)
+                })
+        
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def _record(self, response, messages: List[dict], answers: List[Tuple[str, str, AnalysisResult]]) -> None:
+        """Record the prompt size of a request and the answers it produced"""
+        usage = getattr(response, 'usage', None)
+        if usage is not None and usage.prompt_tokens:
+            prompt_size = usage.prompt_tokens
+        else:
+            # rough estimate when the provider does not report usage
+            prompt_size = sum(len(m["content"]) for m in messages) // 4
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached_size = getattr(details, 'cached_tokens', None) or 0
+        with self._lock:
+            self.prompt_sizes.append(prompt_size)
+            self.cached_sizes.append(cached_size)
+            self.completion_tokens += getattr(usage, 'completion_tokens', None) or 0
+            if self.history_policy != 'stateless':
+                self.history.extend(answers)
+
+    def prompt_size_report(self) -> dict:
+        """
+        Summarize the prompt tokens sent per request
+        
+        Returns:
+            dict: requests, first, last, min, max and mean prompt tokens, the mean
+            estimated tokens of transcript sent per request against the whole transcript,
+            and the share of prompt tokens served from the provider's prompt cache
+        """
+        with self._lock:
+            sizes = list(self.prompt_sizes)
+            context_sizes = list(self.context_sizes)
+            cached_sizes = list(self.cached_sizes)
+        if not sizes:
+            return {"requests": 0}
+        return {
+            "requests": len(sizes),
+            "first": sizes[0],
+            "last": sizes[-1],
+            "min": min(sizes),
+            "max": max(sizes),
+            "mean": round(sum(sizes) / len(sizes), 1),
+            "transcript_tokens": self.index.transcript_tokens,
+            "context_mean": round(sum(context_sizes) / len(context_sizes), 1) if context_sizes else 0,
+            "cached_tokens": sum(cached_sizes),
+            "cached_ratio": round(sum(cached_sizes) / sum(sizes), 3) if sum(sizes) else 0,
+        }
 
     
     def analyze_question(self, question_text: str) -> AnalysisResult:
         """
-        Analyze the transcript to find the answer to a specific question using the maintained chat history.
+        Analyze the transcript to find the answer to a specific question, with the chat history
+        selected by the history policy.
+        
+        Raises:
+            LLMCallError: If the request failed or its response is not a valid answer
         """
-        question_prompt = f"""
-        Analyze the transcript to find from the person who is interviewed the answer he gave to some specific question which is in {config.get_config('language', 'English')}:
-        Question: {question_text}
+        question_prompt = f"""Question: {question_text}
 
-        Extract the relevant information that answers this question. Do not invent anything : check that the answer is done by the person who is interviewed. Summarize the answer to contain the important insights in the context of this interview and the question. Be sure that you do not invent anything by checking that the extrated information is in the interview. Check that the extrated information answers the question. Reformulate and do this process again if necessary until you have something perfect. The answer must be in {config.get_config('language', 'English')}.
+        You must respond with the JSON structure of an answer."""
 
-        Take into account the following context instructions:
-        {config.get_config('llm_common_context', "")}
-        {config.get_config('llm_answer_extraction_context', "")}
+        local_messages = self._build_messages(question_prompt, [question_text])
 
+        response = route_chat_completion(
+            "extraction",
+            validate=parse_answer,
+            messages=local_messages,
+            temperature=0.2,
+            response_format={"type": "json_object"}  # Force JSON response
+        )
+        
+        response_text = response.choices[0].message.content.strip()
+        
+        if config.should_debug('print_analysis'):
+            print(f"Question: {question_text}\nResponse: {response_text}\nUsage: {response.usage}")
+        
+        analysis_result = parse_answer(response)
+        
+        self._record(response, local_messages, [(question_text, response_text, analysis_result)])
+        
+        return analysis_result
 
+    def analyze_questions(self, questions: List[Tuple[str, str]]) -> Dict[str, AnalysisResult]:
+        """
+        Answer a batch of questions with a single request.
+        
+        The model returns a JSON object keyed by question ID. Every entry is validated
+        against AnalysisResult, and only the IDs that are missing or invalid fall back
+        to one analyze_question call each.
+        
+        Args:
+            questions: List of (question_id, question_text) tuples
+            
+        Returns:
+            Dict[str, AnalysisResult]: Results keyed by question ID
+            
+        Raises:
+            LLMCallError: If the single request of a question fails
+        """
+        questions_list = "\n".join(f"Question {question_id}: {question_text}" for question_id, question_text in questions)
+        batch_prompt = f"""Answer each of the following questions:
+        {questions_list}
 
-        You must respond with this exact JSON structure:
-        {{
-            "found": boolean,
-            "answer": "string with the extracted answer in {config.get_config('language', 'English')} or empty string if not found",
-            "confidence": "low" or "medium" or "high"
-            "quote": "if there is a very representative and compact quote (few words), include it here. If there is not such a very interesting quote that could be reused later, leave the field empty"
-        }}"""
+        You must respond with a JSON object with one key per question ID ({", ".join(question_id for question_id, _ in questions)}), each value having the JSON structure of an answer."""
 
-        # Append the user question to the chat history
-        local_messages = self.messages.copy()
-        local_messages.append({"role": "user", "content": question_prompt})
+        local_messages = self._build_messages(batch_prompt, [question_text for _, question_text in questions])
 
+        results = {}
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                #model="google/gemini-flash-1.5-8b",
-                # model="meta-llama/llama-3-70b-instruct",
-                # model="openai/gpt-4o-mini",
+            response = route_chat_completion(
+                "extraction",
+                validate=validate_answers,
                 messages=local_messages,
                 temperature=0.2,
-                response_format={"type": "json_object"}  # Force JSON response
+                response_format={"type": "json_object"}
             )
-            
             response_text = response.choices[0].message.content.strip()
             
-            # Debug logging
-            print(f"Question: {question_text}\nResponse: {response_text}")
-            print(f"caching: {response.usage}")
-            
-            try:
-                result = json.loads(response_text)
-                analysis_result = AnalysisResult(**result)
-            except json.JSONDecodeError as je:
-                analysis_result = AnalysisResult(
-                    found=False,
-                    answer=f"Error parsing JSON response: {str(je)}",
-                    confidence=Confidence.low
-                )
-            
-            # Append the assistant's response to the chat history
-            self.messages.append({"role": "assistant", "content": response_text})
+            if config.should_debug('print_analysis'):
+                print(f"Questions: {[question_id for question_id, _ in questions]}\nResponse: {response_text}\nUsage: {response.usage}")
             
-            return analysis_result
-                
+            parsed = json.loads(response_text)
+            if isinstance(parsed, dict):
+                for question_id, _ in questions:
+                    try:
+                        results[question_id] = AnalysisResult.model_validate(parsed.get(question_id))
+                    except ValidationError:
+                        pass
+            self._record(response, local_messages, [
+                (question_text, json.dumps(parsed[question_id], ensure_ascii=False), results[question_id])
+                for question_id, question_text in questions
+                if question_id in results
+            ])
         except Exception as e:
-            return AnalysisResult(
-                found=False,
-                answer=f"API Error: {str(e)}",
-                confidence=Confidence.low
-            )   
+            print(f"Batch analysis failed for {[question_id for question_id, _ in questions]}: {str(e)}")
+
+        # Answer separately the questions that did not get a valid result
+        for question_id, question_text in questions:
+            if question_id not in results:
+                if config.should_debug('verbose'):
+                    print(f"Falling back to a single request for {question_id}")
+                results[question_id] = self.analyze_question(question_text)
+        
+        return results
 
    
+def question_hash(question_text: str) -> str:
+    """Content hash identifying a question independently of its ID"""
+    return hashlib.sha256(question_text.strip().encode('utf-8')).hexdigest()[:16]
+
+
+def load_structured_results(output_path: str) -> dict:
+    """
+    Load the results already stored in a structured transcript
+    
+    Returns:
+        dict: Stored results keyed by question ID, empty if the file is missing or unreadable
+    """
+    if not os.path.exists(output_path):
+        return {}
+    try:
+        with open(output_path, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    except json.JSONDecodeError:
+        print(f"Warning: {output_path} is not valid JSON, its questions will be analyzed again")
+        return {}
+    return stored if isinstance(stored, dict) else {}
+
+
 def analyze_transcript_with_questions(
     transcript_path: str,
     questions: List[Tuple[str, str]],
-    output_path: str = "analysis_results.json"
+    output_path: str = "analysis_results.json",
+    max_workers: Optional[int] = None,
+    batch_size: Optional[int] = None
 ) -> dict:
-    """Process transcript and analyze with questions"""
+    """
+    Process transcript and analyze with questions
     
-    with open(transcript_path, 'r', encoding='utf-8') as f:
-        transcript = f.read()
+    Questions are independent requests, so they are sent concurrently by a pool of
+    `max_workers` threads (config `concurrency.question_workers`, default 1).
+    Results are always written and returned in question order.
+    With `batch_size` (config `extraction.batch_size`) above 1, questions are grouped
+    and each group is answered by a single request.
+    
+    Results already stored in `output_path` are reused: questions are matched by content
+    hash, so only new or edited questions are analyzed, even if their IDs changed.
+    A question whose request failed (after the retries of the LLM calls) is stored with
+    `"status": "failed"` and its error instead of an answer, and is analyzed again by the next run.
+    Each new result is appended to a journal next to `output_path`, which is compacted
+    into `output_path` once all questions are answered.
+    Requests, tokens and bytes written are added to the `analysis` run metrics of the interview.
     
-    analyzer = TranscriptAnalyzer(transcript)
+    Args:
+        transcript_path: Path to the raw transcript
+        questions: List of (question_id, question_text) tuples
+        output_path: Path of the structured transcript JSON file
+        max_workers: Number of requests sent at the same time
+        batch_size: Number of questions answered per request
+        
+    Returns:
+        dict: Results keyed by question ID, in question order
+    """
+    if max_workers is None:
+        max_workers = config.get_config('concurrency.question_workers', 1)
+    if batch_size is None:
+        batch_size = config.get_config('extraction.batch_size', 1)
+    batch_size = max(1, batch_size)
     
     results = {}
+    lock = threading.Lock()
+    
+    def ordered_results() -> dict:
+        return {qid: results[qid] for qid, _ in questions if qid in results}
+    
+    journal = ResultJournal(output_path)
+    stored_results = load_structured_results(output_path)
+    interview_name = os.path.splitext(os.path.basename(transcript_path))[0].replace('_raw', '')
+    
+    # Reuse the stored answers of unchanged questions, including the ones of an interrupted run
+    stored_by_hash = {
+        entry.get('question_hash') or question_hash(entry['question']): entry
+        for entry in list(stored_results.values()) + list(journal.load().values())
+        if isinstance(entry, dict) and 'question' in entry and 'analysis' in entry
+    }
+    pending_questions = []
     for question_id, question_text in questions:
-        result = analyzer.analyze_question(question_text)
-        results[question_id] = {
-            "question": question_text,
-            "analysis": result.model_dump()
-        }
+        stored = stored_by_hash.get(question_hash(question_text))
+        if stored is not None:
+            results[question_id] = {**stored, "question": question_text, "question_hash": question_hash(question_text)}
+        else:
+            pending_questions.append((question_id, question_text))
+    
+    get_metrics().update("analysis", interview_name, questions=len(questions), questions_reused=len(results))
+    if not pending_questions:
+        if journal.exists() or list(stored_results.keys()) != list(ordered_results().keys()):
+            journal.compact(ordered_results())
+            get_metrics().update("analysis", interview_name, bytes_written=journal.bytes_written)
+        if config.should_debug('verbose'):
+            print(f"Skipping analysis for {os.path.basename(output_path)} - all questions already analyzed")
+        return ordered_results()
+    if results and config.should_debug('verbose'):
+        print(f"Resuming {os.path.basename(output_path)}: {len(results)} questions already analyzed, {len(pending_questions)} to analyze")
+    
+    with open(transcript_path, 'r', encoding='utf-8') as f:
+        transcript = f.read()
+    
+    scorer = None
+    if config.get_config('extraction.context_mode', 'full') == 'retrieval' \
+            and config.get_config('extraction.retrieval_scorer', 'bm25') == 'embedding':
+        from user_research_helper.transcript.embedding_index import get_embedding_index
+        # transcripts not indexed yet (or changed) are embedded first
+        scorer = get_embedding_index().scorer(transcript_path, transcript)
+    analyzer = TranscriptAnalyzer(transcript, scorer=scorer)
+    
+    def analyze_batch(batch: List[Tuple[str, str]]) -> Dict[str, AnalysisResult]:
+        if len(batch) == 1:
+            question_id, question_text = batch[0]
+            return {question_id: analyzer.analyze_question(question_text)}
+        return analyzer.analyze_questions(batch)
+    
+    batches = [pending_questions[i:i + batch_size] for i in range(0, len(pending_questions), batch_size)]
+    
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(analyze_batch, batch): batch for batch in batches}
+        for future in as_completed(futures):
+            try:
+                batch_results, error = future.result(), None
+            except Exception as e:
+                batch_results, error = {}, e
+            with lock:
+                for question_id, question_text in futures[future]:
+                    if error is None:
+                        results[question_id] = {
+                            "question": question_text,
+                            "question_hash": question_hash(question_text),
+                            "analysis": batch_results[question_id].model_dump()
+                        }
+                    else:
+                        # No answer is stored, so the question is analyzed again by the next run
+                        results[question_id] = {
+                            "question": question_text,
+                            "question_hash": question_hash(question_text),
+                            "status": "failed",
+                            "error": str(error)
+                        }
+                        failed.append(question_id)
+                    # Save intermediate results
+                    journal.append(question_id, results[question_id])
+    
+    journal.compact(ordered_results())
+    if failed:
+        print(f"Analysis of {len(failed)} questions failed for {interview_name} "
+              f"({results[failed[0]]['error']}), rerun to retry them")
+    get_metrics().update(
+        "analysis", interview_name,
+        llm_requests=len(analyzer.prompt_sizes),
+        prompt_tokens=sum(analyzer.prompt_sizes),
+        completion_tokens=analyzer.completion_tokens,
+        cached_tokens=sum(analyzer.cached_sizes),
+        bytes_written=journal.bytes_written,
+        failed_questions=len(failed),
+    )
+    
+    if config.should_debug('verbose'):
+        report = analyzer.prompt_size_report()
+        if report["requests"]:
+            print(f"Prompt tokens per request for {os.path.basename(transcript_path)} ({analyzer.history_policy} history): "
+                  f"first {report['first']}, last {report['last']}, min {report['min']}, max {report['max']}, mean {report['mean']}")
+            print(f"Cached prompt tokens for {os.path.basename(transcript_path)}: {report['cached_tokens']} "
+                  f"({report['cached_ratio']:.0%} of {sum(analyzer.prompt_sizes)})")
+            if analyzer.context_mode == 'retrieval':
+                print(f"Transcript tokens per request ({analyzer.context_mode} context): mean {report['context_mean']} "
+                      f"instead of {report['transcript_tokens']} for the whole transcript "
+                      f"({1 - report['context_mean'] / report['transcript_tokens']:.0%} less)")
+    
+    return ordered_results()
+
+
+def test_concurrent_extraction():
+    """Run a concurrent extraction against the local mock OpenAI server"""
+    from user_research_helper.mock.openai_server import MockOpenAIServer
+    from user_research_helper.mock.project import mock_project
+    
+    with MockOpenAIServer(latency=0.2, rate_limit_every=7, retry_after=0.05) as mock_server, \
+            mock_project({"concurrency": {"question_workers": 4}, "debug": {"verbose": False}}, openai_server=mock_server) as root_dir:
+        
+        transcript_path = os.path.join(root_dir, 'interview_raw.txt')
+        with open(transcript_path, 'w', encoding='utf-8') as f:
+            f.write("Speaker A [0.00 - 1000.00]:\n    How many cups?\n\nSpeaker B [1000.00 - 2000.00]:\n    Two.")
+        questions = [(f"Q{i}", f"Question {i}?") for i in range(12)]
+        output_path = os.path.join(root_dir, 'interview_structured.json')
+        
+        start = time.perf_counter()
+        results = analyze_transcript_with_questions(transcript_path, questions, output_path)
+        elapsed = time.perf_counter() - start
+        
+        assert list(results.keys()) == [qid for qid, _ in questions], "Results are not in question order"
+        with open(output_path, 'r', encoding='utf-8') as f:
+            assert list(json.load(f).keys()) == list(results.keys()), "Saved results are not in question order"
+        assert all(r["analysis"]["found"] for r in results.values()), "Rate limited questions were not retried"
+        assert mock_server.max_in_flight <= 4, "Concurrency limit exceeded"
+        assert elapsed < 12 * 0.2, "Questions were not analyzed concurrently"
+        print(f"{len(questions)} questions in {elapsed:.2f}s, {mock_server.rate_limited_count} rate limited requests retried")
+
+
+
+def test_batched_extraction():
+    """Run a batched extraction against the local mock OpenAI server, one ID being dropped by the model"""
+    from user_research_helper.mock.openai_server import MockOpenAIServer, default_responder
+    from user_research_helper.mock.project import mock_project
+    
+    def responder(body: dict) -> str:
+        answers = json.loads(default_responder(body))
+        # Simulate a model forgetting one question of the batch
+        answers.pop("Q1", None)
+        return json.dumps(answers)
+    
+    with MockOpenAIServer(responder=responder) as mock_server, \
+            mock_project({"extraction": {"batch_size": 4}, "debug": {"verbose": False}}, openai_server=mock_server) as root_dir:
+        
+        transcript_path = os.path.join(root_dir, 'interview_raw.txt')
+        with open(transcript_path, 'w', encoding='utf-8') as f:
+            f.write("Speaker A [0.00 - 1000.00]:\n    How many cups?\n\nSpeaker B [1000.00 - 2000.00]:\n    Two.")
+        questions = [(f"Q{i}", f"Question {i}?") for i in range(8)]
+        output_path = os.path.join(root_dir, 'interview_structured.json')
+        
+        results = analyze_transcript_with_questions(transcript_path, questions, output_path)
+        
+        assert list(results.keys()) == [qid for qid, _ in questions], "Results are not in question order"
+        assert all(r["analysis"]["found"] for r in results.values()), "Missing question was not answered"
+        # 2 batches + 1 fallback for Q1
+        assert mock_server.request_count == 3, f"Expected 3 requests, got {mock_server.request_count}"
+        print(f"{len(questions)} questions answered with {mock_server.request_count} requests")
+
+
+
+def test_history_policies():
+    """Check that the prompt size stays flat across a 50-question guide for every history policy"""
+    from user_research_helper.mock.openai_server import MockOpenAIServer
+    from user_research_helper.mock.project import mock_project, write_config
+    
+    with MockOpenAIServer() as mock_server, mock_project({}, openai_server=mock_server) as root_dir:
+        transcript = "Speaker A [0.00 - 1000.00]:\n    How many cups?\n\nSpeaker B [1000.00 - 2000.00]:\n    Two." * 20
+        
+        for policy in HISTORY_POLICIES:
+            write_config(root_dir, {"extraction": {"history": policy, "history_summary_chars": 500}, "debug": {"verbose": False}})
+            
+            analyzer = TranscriptAnalyzer(transcript)
+            for i in range(50):
+                analyzer.analyze_question(f"Question {i}?")
+            report = analyzer.prompt_size_report()
+            # stateless is flat, window and summary are bounded by their settings
+            assert report["max"] - report["first"] < 250, f"Prompt size grows with {policy} history: {report}"
+            print(f"{policy}: {report}")
+
+
+
+def test_retrieval_context():
+    """Check that retrieval mode sends fewer prompt tokens and keeps the block answering the question"""
+    from user_research_helper.mock.openai_server import MockOpenAIServer
+    from user_research_helper.mock.project import mock_project, write_config
+    
+    topics = ["coffee", "tea", "breakfast", "commute", "office", "meetings", "sport", "holidays", "music", "cooking"]
+    blocks = []
+    for i in range(200):
+        topic = topics[i % len(topics)]
+        blocks.append(f"Speaker A [{i * 2000:.2f} - {i * 2000 + 900:.2f}]:\n    What about {topic} number {i}?")
+        blocks.append(f"Speaker B [{i * 2000 + 1000:.2f} - {i * 2000 + 1900:.2f}]:\n    I like {topic}, answer {i}, it is quite important to me.")
+    transcript = "\n\n".join(blocks)
+    questions = [f"What about {topic} number {i}?" for i, topic in [(3, "commute"), (58, "music"), (121, "tea")]]
+    
+    with MockOpenAIServer() as mock_server, mock_project({}, openai_server=mock_server) as root_dir:
+        reports = {}
+        for mode in CONTEXT_MODES:
+            write_config(root_dir, {"extraction": {"context_mode": mode, "retrieval_token_budget": 400}, "llm_cache": {"enabled": False}, "debug": {"verbose": False}})
+            analyzer = TranscriptAnalyzer(transcript)
+            for question_text in questions:
+                analyzer.analyze_question(question_text)
+            reports[mode] = analyzer.prompt_size_report()
+        
+        context = analyzer.index.context(["What about music number 58?"], token_budget=400)
+        assert "I like music, answer 58," in context, "The answering block was not retrieved"
+        assert reports["retrieval"]["mean"] < reports["full"]["mean"] / 5, f"Prompt tokens not reduced: {reports}"
+        print(f"Prompt tokens per question: {reports['full']['mean']} full, {reports['retrieval']['mean']} retrieval")
+
+
+def test_prompt_caching():
+    """Check that the questions of an interview share a cached prompt prefix (simulated by the mock server)"""
+    from user_research_helper.mock.openai_server import MockOpenAIServer
+    from user_research_helper.mock.project import mock_project
+    
+    transcript = "\n\n".join(
+        f"Speaker {'AB'[i % 2]} [{i * 1000:.2f} - {i * 1000 + 900:.2f}]:\n    Turn {i} of a long interview about coffee habits."
+        for i in range(300)
+    )
+    with MockOpenAIServer() as mock_server, \
+            mock_project({"llm_cache": {"enabled": False}, "debug": {"verbose": False}}, openai_server=mock_server):
         
-        # Save intermediate results
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        analyzer = TranscriptAnalyzer(transcript)
+        for i in range(10):
+            analyzer.analyze_question(f"How many cups per day, variant {i}?")
+        report = analyzer.prompt_size_report()
+        # only the first request pays the full prompt
+        assert report["cached_ratio"] > 0.8, f"Prompt prefix is not cached: {report}"
+        print(f"Cached prompt tokens: {report['cached_tokens']} ({report['cached_ratio']:.0%})")
+
+
+def test_question_resume():
+    """Check that only new or edited questions are analyzed again"""
+    from user_research_helper.mock.openai_server import MockOpenAIServer
+    from user_research_helper.mock.project import mock_project
     
-    return results
\ No newline at end of file
+    with MockOpenAIServer() as mock_server, \
+            mock_project({"llm_cache": {"enabled": False}, "debug": {"verbose": False}}, openai_server=mock_server) as root_dir:
+        
+        transcript_path = os.path.join(root_dir, 'interview_raw.txt')
+        with open(transcript_path, 'w', encoding='utf-8') as f:
+            f.write("Speaker A [0.00 - 1000.00]:\n    How many cups?\n\nSpeaker B [1000.00 - 2000.00]:\n    Two.")
+        output_path = os.path.join(root_dir, 'interview_structured.json')
+        
+        questions = [(f"Q{i}", f"Question {i}?") for i in range(5)]
+        analyze_transcript_with_questions(transcript_path, questions, output_path)
+        assert mock_server.request_count == 5
+        
+        # Nothing changed
+        analyze_transcript_with_questions(transcript_path, questions, output_path)
+        assert mock_server.request_count == 5, "Unchanged questions were analyzed again"
+        
+        # A question inserted at the start shifts every ID, and one question is edited
+        questions = [("Q0", "New question?")] + [(f"Q{i + 1}", text) for i, (_, text) in enumerate(questions)]
+        questions[3] = ("Q3", "Question 2, edited?")
+        results = analyze_transcript_with_questions(transcript_path, questions, output_path)
+        assert mock_server.request_count == 7, f"Expected 2 new requests, got {mock_server.request_count - 5}"
+        assert [entry["question"] for entry in results.values()] == [text for _, text in questions]
+        print(f"Resume: {mock_server.request_count - 5} questions analyzed again out of {len(questions)}")
+
+
+def test_failed_questions():
+    """Check that failed requests are stored as failed questions, not answers, and retried by the next run"""
+    from user_research_helper.mock.openai_server import MockOpenAIServer
+    from user_research_helper.mock.project import mock_project
+    
+    with MockOpenAIServer(fail_every=3) as mock_server, \
+            mock_project({"llm": {"max_retries": 0}, "llm_cache": {"enabled": False}, "debug": {"verbose": False}}, openai_server=mock_server) as root_dir:
+        
+        transcript_path = os.path.join(root_dir, 'interview_raw.txt')
+        with open(transcript_path, 'w', encoding='utf-8') as f:
+            f.write("Speaker A [0.00 - 1000.00]:\n    How many cups?\n\nSpeaker B [1000.00 - 2000.00]:\n    Two.")
+        output_path = os.path.join(root_dir, 'interview_structured.json')
+        questions = [(f"Q{i}", f"Question {i}?") for i in range(6)]
+        
+        results = analyze_transcript_with_questions(transcript_path, questions, output_path)
+        failed = [qid for qid, entry in results.items() if entry.get("status") == "failed"]
+        assert len(failed) == 2 and all("analysis" not in results[qid] for qid in failed), "Failures were stored as answers"
+        
+        mock_server.fail_every = 0
+        results = analyze_transcript_with_questions(transcript_path, questions, output_path)
+        assert all("analysis" in entry for entry in results.values()), "Failed questions were not retried"
+        assert mock_server.request_count == 8, "Answered questions were analyzed again"
+        print(f"{len(failed)} failed questions retried by the next run")
+
+
+def test_invalid_answers_not_cached():
+    """Check that an invalid answer is not cached, so the failed question succeeds on the next run"""
+    from user_research_helper.mock.openai_server import MockOpenAIServer, default_responder
+    from user_research_helper.mock.project import mock_project
+    
+    def invalid_responder(body):
+        return "not json" if "Question 1?" in body["messages"][-1]["content"] else default_responder(body)
+    
+    with MockOpenAIServer(responder=invalid_responder) as mock_server, \
+            mock_project({"llm": {"max_retries": 0}, "debug": {"verbose": False}}, openai_server=mock_server) as root_dir:
+        
+        transcript_path = os.path.join(root_dir, 'interview_raw.txt')
+        with open(transcript_path, 'w', encoding='utf-8') as f:
+            f.write("Speaker A [0.00 - 1000.00]:\n    How many cups?\n\nSpeaker B [1000.00 - 2000.00]:\n    Two.")
+        output_path = os.path.join(root_dir, 'interview_structured.json')
+        questions = [(f"Q{i}", f"Question {i}?") for i in range(3)]
+        
+        results = analyze_transcript_with_questions(transcript_path, questions, output_path)
+        assert results["Q1"].get("status") == "failed", "Invalid answer was stored"
+        
+        mock_server.responder = default_responder
+        results = analyze_transcript_with_questions(transcript_path, questions, output_path)
+        assert "analysis" in results["Q1"], "Invalid answer was served from the LLM cache"
+        assert mock_server.request_count == 4, f"Expected 1 new request, got {mock_server.request_count - 3}"
+        print("Invalid answer not cached, failed question answered by the next run")
+
+
+if __name__ == "__main__":
+    test_concurrent_extraction()
+    test_batched_extraction()
+    test_history_policies()
+    test_retrieval_context()
+    test_prompt_caching()
+    test_question_resume()
+    test_failed_questions()
+    test_invalid_answers_not_cached()
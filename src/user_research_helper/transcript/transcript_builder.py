@@ -1,53 +1,73 @@
-import assemblyai as aai
-import os
+import time
 from typing import List, Optional
+from user_research_helper.campaign.config import config
+from user_research_helper.transcript.audio_chunking import Utterance, get_audio_duration, transcribe_in_chunks
+from user_research_helper.transcript.transcription_backends import TranscriptionBackend, get_backend
 
-# Initialize AssemblyAI client
-api_key = os.environ.get("ASSEMBLYAI_API_KEY")
-if not api_key:
-    raise ValueError("ASSEMBLYAI_API_KEY not found in environment variables. Please check your .env file.")
-
-aai.settings.api_key = api_key
-
-def process_interview_transcript(
-    audio_file_path: str, language_code: str = "fr", word_boost: Optional[List[str]] = ["Chatbot",]
-) -> str:
+def format_utterances(utterances: List[Utterance]) -> str:
     """
-    Process the interview audio using AssemblyAI with speaker diarization
-    
+    Format utterances as speaker blocks: `Speaker X [start - end]:` followed by the text
+
     Args:
-        audio_file_path: Path to the audio file
-        question_context: Optional list of expected questions
+        utterances: Utterances in time order
     """
-    # Configure transcription with speaker diarization
-    # define speaker numbers
-    config = aai.TranscriptionConfig(
-        speaker_labels=True,
-        speakers_expected=2,
-        language_code=language_code,
-        word_boost=word_boost,
-        boost_param="high",
-    )
-    
-    # Create transcriber and process file
-    transcriber = aai.Transcriber()
-    transcript = transcriber.transcribe(
-        audio_file_path,
-        config=config
-    )
-    
-    # Format the transcript with speaker labels
     formatted_transcript = []
     current_speaker = None
-    
-    for utterance in transcript.utterances:
+
+    for utterance in utterances:
         speaker = f"Speaker {utterance.speaker}"  # ou utilisez utterance.speaker_name si défini
         timestamp = f"[{utterance.start:.2f} - {utterance.end:.2f}]"
-        
+
         if current_speaker != speaker:
             formatted_transcript.append(f"\n{speaker} {timestamp}:")
             current_speaker = speaker
-            
+
         formatted_transcript.append(f"    {utterance.text}")
-    
+
     return "\n".join(formatted_transcript)
+
+def process_interview_transcript(
+    audio_file_path: str, language_code: str = "fr", word_boost: Optional[List[str]] = ["Chatbot",],
+    chunking: Optional[dict] = None, backend: Optional[TranscriptionBackend] = None
+) -> str:
+    """
+    Transcribe the interview audio with speaker diarization
+    
+    Args:
+        audio_file_path: Path to the audio file
+        language_code: Language of the recording
+        word_boost: Words to boost
+        chunking: Chunking settings (config `transcription.chunking`). When enabled, recordings
+            longer than `min_duration_seconds` are split on silences into overlapping chunks
+            transcribed concurrently.
+        backend: Transcription engine (default: AssemblyAI)
+    """
+    backend = backend or get_backend()
+    chunking = chunking or {}
+    start = time.perf_counter()
+    
+    audio_seconds = None
+    if chunking.get('enabled', False):
+        audio_seconds = get_audio_duration(audio_file_path)
+    if audio_seconds is not None and audio_seconds >= chunking.get('min_duration_seconds', 1200):
+        utterances = transcribe_in_chunks(
+            audio_file_path,
+            backend.transcribe,
+            language_code=language_code,
+            word_boost=word_boost,
+            chunk_seconds=chunking.get('chunk_seconds', 600),
+            overlap_seconds=chunking.get('overlap_seconds', 5),
+            workers=chunking.get('workers', 4),
+            silence_db=chunking.get('silence_db', -35),
+            min_silence_seconds=chunking.get('min_silence_seconds', 0.4),
+        )
+    else:
+        utterances = backend.transcribe(audio_file_path, language_code, word_boost)
+        audio_seconds = backend.timings[audio_file_path][0]
+    
+    if config.should_debug('verbose') and audio_seconds:
+        elapsed = time.perf_counter() - start
+        print(f"Transcribed {audio_file_path} with {backend.name} in {elapsed:.1f}s "
+              f"(real-time factor {elapsed / audio_seconds:.2f})")
+    
+    return format_utterances(utterances)
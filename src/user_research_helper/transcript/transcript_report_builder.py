@@ -1,10 +1,8 @@
 import re
 import json
 import os
-from openpyxl import Workbook
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.styles import PatternFill, Alignment
 from typing import Dict, List, Tuple
+from user_research_helper.campaign.excel_writer import StreamingSheetWriter, solid_fill
 from user_research_helper.campaign.question_parsing import parse_questions
 
 
@@ -17,74 +15,49 @@ def create_excel_report(questions: List[Tuple[str, str]], results_files: List[st
     """
     Create an Excel report from segment dataset analysis results
     
+    The answers workbook (`output_file`) and the quotes workbook (`<output_file>_quotes.xlsx`)
+    are written together in a single pass over the results files, row by row, so the
+    memory used does not grow with the number of interviews.
+    
     Args:
         questions: List of questions with IDs and texts
         results_files: List of files containing segment answers
         output_file: Path to save the Excel report
     """
-    def init_worksheet(workbook: Workbook, title: str, questions: List[Tuple[str, str]]) -> Worksheet:
-        """Initialize a worksheet with headers"""
-        ws = workbook.active
-        ws.title = title
-        
-        # Write headers
-        ws.cell(row=1, column=1, value="File Name")
-        ws.cell(row=1, column=2, value="Segments")
-        for col, (_, question_text) in enumerate(questions, start=3):
-            ws.cell(row=1, column=col, value=question_text)
-        
-        return ws 
+    column_widths = [30, 30] + [80] * len(questions)
+    answers_sheet = StreamingSheetWriter("Analysis Results", column_widths)
+    quotes_sheet = StreamingSheetWriter("Quotes", column_widths)
 
-    # Create workbooks and initialize worksheets
-    wb = Workbook()
-    ws = init_worksheet(wb, "Analysis Results", questions)
-    wb_quotes = Workbook()
-    ws_quotes = init_worksheet(wb_quotes, "Quotes", questions)
+    # Write headers
+    for sheet in (answers_sheet, quotes_sheet):
+        sheet.append([sheet.cell("File Name"), sheet.cell("Segments")]
+                     + [sheet.cell(question_text) for _, question_text in questions])
 
     # Define fill colors
-    orange_fill = PatternFill(start_color="FFA500", end_color="FFA500", fill_type="solid")
-    red_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
+    fills = {"medium": solid_fill("FFA500"), "low": solid_fill("FF0000")}
 
     # Process each results file
-    for row, results_file in enumerate(results_files, start=2):
+    for results_file in results_files:
         file_name = os.path.splitext(os.path.basename(results_file))[0]
-        ws.cell(row=row, column=1, value=file_name)
-        ws_quotes.cell(row=row, column=1, value=file_name)
+        answer_cells = [answers_sheet.cell(file_name), answers_sheet.cell()]
+        quote_cells = [quotes_sheet.cell(file_name), quotes_sheet.cell()]
 
         results = load_results(results_file)
-        for col, (question_id, _) in enumerate(questions, start=3):
-            cell = ws.cell(row=row, column=col)
-            quote_cell = ws_quotes.cell(row=row, column=col)
-            if question_id in results:
-                result = results[question_id]['analysis']
-                if result['found']:
-                    cell.value = result['answer']
-                    quote_cell.value = result.get('quote', '')
-                    if result['confidence'] == 'medium':
-                        cell.fill = orange_fill
-                    elif result['confidence'] == 'low':
-                        cell.fill = red_fill
-
-    def format_worksheet_columns(worksheet):
-        """Format columns of a worksheet with proper width and text wrapping"""
-        for column_cells in worksheet.columns:
-            for cell in column_cells:
-                cell.alignment = Alignment(wrap_text=True)
-            col_letter = column_cells[0].column_letter
-            if col_letter in ['A', 'B']:
-                worksheet.column_dimensions[col_letter].width = 30
+        for question_id, _ in questions:
+            # questions whose analysis failed have no answer yet
+            result = results.get(question_id, {}).get('analysis')
+            if result and result['found']:
+                answer_cells.append(answers_sheet.cell(result['answer'], fill=fills.get(result['confidence'])))
+                quote_cells.append(quotes_sheet.cell(result.get('quote', '')))
             else:
-                worksheet.column_dimensions[col_letter].width = 80
-    
-    # Apply formatting to both worksheets
-    format_worksheet_columns(ws)
-    format_worksheet_columns(ws_quotes)
+                answer_cells.append(answers_sheet.cell())
+                quote_cells.append(quotes_sheet.cell())
+        answers_sheet.append(answer_cells)
+        quotes_sheet.append(quote_cells)
 
     # Save both workbooks
-    wb.save(output_file)
-    wb_quotes.save(output_file.replace('.xlsx', '_quotes.xlsx'))
-    wb.close()
-    wb_quotes.close()   
+    answers_sheet.save(output_file)
+    quotes_sheet.save(output_file.replace('.xlsx', '_quotes.xlsx'))
 
 def test_report_builder():
     # Example usage
@@ -0,0 +1,172 @@
+import math
+import re
+from collections import Counter
+from typing import Callable, List, Optional
+
+from pydantic import BaseModel
+
+
+BLOCK_HEADER_PATTERN = re.compile(r"^Speaker (\S+) \[([\d.]+) - ([\d.]+)\]:[ \t]*$", re.MULTILINE)
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class TranscriptBlock(BaseModel):
+    """One speaker turn of a raw transcript"""
+    index: int
+    speaker: Optional[str] = None
+    start: Optional[float] = None
+    end: Optional[float] = None
+    text: str
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in WORD_PATTERN.findall(text.lower()) if len(word) > 1]
+
+
+def split_transcript_blocks(transcript: str) -> List[TranscriptBlock]:
+    """
+    Split a raw transcript on its `Speaker X [t0 - t1]:` headers
+
+    Transcripts without headers are split on blank lines.
+
+    Args:
+        transcript: Raw transcript
+
+    Returns:
+        List[TranscriptBlock]: Blocks in transcript order, each text including its header
+    """
+    headers = list(BLOCK_HEADER_PATTERN.finditer(transcript))
+    if not headers:
+        paragraphs = [p.strip() for p in re.split(r"\n\s*\n", transcript) if p.strip()]
+        return [TranscriptBlock(index=i, text=p) for i, p in enumerate(paragraphs)]
+
+    blocks = []
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(transcript)
+        blocks.append(TranscriptBlock(
+            index=i,
+            speaker=header.group(1),
+            start=float(header.group(2)),
+            end=float(header.group(3)),
+            text=transcript[header.start():end].strip(),
+        ))
+    return blocks
+
+
+class TranscriptIndex:
+    """
+    Lexical (BM25) index of the speaker blocks of a transcript.
+
+    `select` returns the blocks most relevant to a question within a token budget. The block
+    following a selected block is added when it fits (`neighbors`), since the answer of the
+    interviewee usually follows the question of the interviewer.
+    Another relevance measure of the blocks (e.g. embedding similarity) can replace BM25
+    with `scorer`.
+    """
+
+    def __init__(
+        self, transcript: str, k1: float = 1.5, b: float = 0.75,
+        scorer: Optional[Callable[[str], List[float]]] = None
+    ):
+        """
+        Args:
+            transcript: Raw transcript
+            k1, b: BM25 parameters
+            scorer: Function scoring every block (in `split_transcript_blocks` order) for a query
+        """
+        self.transcript = transcript
+        self.scorer = scorer
+        self.transcript_tokens = estimate_tokens(transcript)
+        self.blocks = split_transcript_blocks(transcript)
+        self.block_tokens = [estimate_tokens(block.text) for block in self.blocks]
+        self.k1 = k1
+        self.b = b
+        self._term_counts = [Counter(tokenize(block.text)) for block in self.blocks]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._average_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0
+        document_frequency = Counter(term for counts in self._term_counts for term in counts)
+        n = len(self.blocks)
+        self._idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        """Relevance score of every block for the query (BM25 unless a scorer was given)"""
+        if self.scorer is not None:
+            return self.scorer(query)
+        terms = tokenize(query)
+        scores = []
+        for counts, length in zip(self._term_counts, self._lengths):
+            score = 0.0
+            for term in terms:
+                frequency = counts.get(term, 0)
+                if frequency:
+                    norm = self.k1 * (1 - self.b + self.b * length / (self._average_length or 1))
+                    score += self._idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+    def select(self, queries: List[str], top_k: int = 4, token_budget: int = 1500, neighbors: int = 1) -> List[TranscriptBlock]:
+        """
+        Select the blocks relevant to the queries within the token budget
+
+        Args:
+            queries: Question texts, each one getting its own `top_k` blocks
+            top_k: Number of best scoring blocks per query
+            token_budget: Maximum tokens of the selected blocks
+            neighbors: Number of following blocks added to each selected block
+
+        Returns:
+            List[TranscriptBlock]: Selected blocks in transcript order
+        """
+        candidates = []
+        for query in queries:
+            scores = self.scores(query)
+            ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i])
+            candidates.append(ranked[:top_k])
+
+        # Interleave the queries so that every question gets its best blocks first
+        selected = []
+        used_tokens = 0
+        for rank in range(top_k):
+            for ranked in candidates:
+                if rank >= len(ranked):
+                    continue
+                block_ids = range(ranked[rank], min(len(self.blocks), ranked[rank] + neighbors + 1))
+                for block_id in block_ids:
+                    if block_id in selected:
+                        continue
+                    if used_tokens + self.block_tokens[block_id] > token_budget:
+                        break
+                    selected.append(block_id)
+                    used_tokens += self.block_tokens[block_id]
+        return [self.blocks[i] for i in sorted(selected)]
+
+    def context(self, queries: List[str], top_k: int = 4, token_budget: int = 1500, neighbors: int = 1) -> str:
+        """
+        Excerpts of the transcript relevant to the queries, the whole transcript when it fits the budget
+
+        Args:
+            queries: Question texts
+            top_k: Number of best scoring blocks per query
+            token_budget: Maximum tokens of the excerpts
+            neighbors: Number of following blocks added to each selected block
+        """
+        if self.transcript_tokens <= token_budget:
+            return self.transcript
+        parts = []
+        previous_index = -1
+        for block in self.select(queries, top_k, token_budget, neighbors):
+            if block.index != previous_index + 1:
+                parts.append("[...]")
+            parts.append(block.text)
+            previous_index = block.index
+        if previous_index != len(self.blocks) - 1 and parts:
+            parts.append("[...]")
+        return "\n\n".join(parts)
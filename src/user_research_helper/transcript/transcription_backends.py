@@ -0,0 +1,223 @@
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from user_research_helper.transcript.audio_chunking import Utterance
+
+
+class TranscriptionBackend(ABC):
+    """
+    Speech-to-text engine producing diarized utterances.
+
+    Subclasses implement `_transcribe`, which returns the utterances and the duration of the
+    audio. `transcribe` times every call so that the real-time factor (processing time /
+    audio duration) of the engine can be compared between campaigns.
+    """
+
+    name = "backend"
+
+    def __init__(self):
+        self.timings: Dict[str, Tuple[float, float]] = {}  # audio file -> (audio seconds, processing seconds)
+        self._timings_lock = threading.Lock()
+
+    @abstractmethod
+    def _transcribe(
+        self, audio_file_path: str, language_code: str, word_boost: Optional[List[str]]
+    ) -> Tuple[List[Utterance], float]:
+        """Transcribe an audio file, returning its utterances and its duration in seconds"""
+
+    def transcribe(
+        self, audio_file_path: str, language_code: str = "fr", word_boost: Optional[List[str]] = None
+    ) -> List[Utterance]:
+        """
+        Transcribe an audio file
+
+        Args:
+            audio_file_path: Path to the audio file
+            language_code: Language of the recording
+            word_boost: Words to boost
+
+        Returns:
+            List[Utterance]: Utterances with times in milliseconds
+        """
+        start = time.perf_counter()
+        utterances, audio_seconds = self._transcribe(audio_file_path, language_code, word_boost)
+        self.record_timing(audio_file_path, audio_seconds, time.perf_counter() - start)
+        return utterances
+
+    def record_timing(self, audio_file_path: str, audio_seconds: float, processing_seconds: float) -> None:
+        """
+        Record the duration and processing time of a transcription, also for the transcriptions
+        not done by `transcribe` (e.g. AssemblyAI batch jobs)
+
+        Args:
+            audio_file_path: Path to the audio file
+            audio_seconds: Duration of the audio
+            processing_seconds: Time from the start of the transcription to its result
+        """
+        with self._timings_lock:
+            self.timings[audio_file_path] = (audio_seconds, processing_seconds)
+
+    def real_time_factor(self, audio_file_path: Optional[str] = None) -> Optional[float]:
+        """
+        Processing time divided by audio duration (below 1 is faster than real time)
+
+        Args:
+            audio_file_path: File to report, or None for all the files transcribed so far
+        """
+        with self._timings_lock:
+            timings = [self.timings[audio_file_path]] if audio_file_path in self.timings else (
+                list(self.timings.values()) if audio_file_path is None else []
+            )
+        audio_seconds = sum(t[0] for t in timings)
+        return sum(t[1] for t in timings) / audio_seconds if audio_seconds else None
+
+
+class AssemblyAIBackend(TranscriptionBackend):
+    """Cloud transcription with speaker diarization (AssemblyAI)"""
+
+    name = "assemblyai"
+
+    def __init__(self, speakers_expected: int = 2):
+        """
+        Raises:
+            ValueError: If ASSEMBLYAI_API_KEY is not set
+        """
+        super().__init__()
+        import assemblyai as aai
+
+        api_key = os.environ.get("ASSEMBLYAI_API_KEY")
+        if not api_key:
+            raise ValueError("ASSEMBLYAI_API_KEY not found in environment variables. Please check your .env file.")
+        aai.settings.api_key = api_key
+        self.speakers_expected = speakers_expected
+
+    def _transcribe(self, audio_file_path, language_code, word_boost):
+        import assemblyai as aai
+
+        # Configure transcription with speaker diarization
+        config = aai.TranscriptionConfig(
+            speaker_labels=True,
+            speakers_expected=self.speakers_expected,
+            language_code=language_code,
+            word_boost=word_boost,
+            boost_param="high",
+        )
+
+        # Create transcriber and process file
+        transcriber = aai.Transcriber()
+        transcript = transcriber.transcribe(
+            audio_file_path,
+            config=config
+        )
+        if transcript.status == aai.TranscriptStatus.error:
+            raise RuntimeError(f"AssemblyAI transcription failed: {transcript.error}")
+
+        utterances = [
+            Utterance(speaker=utterance.speaker, start=utterance.start, end=utterance.end, text=utterance.text)
+            for utterance in transcript.utterances or []
+        ]
+        return utterances, float(transcript.audio_duration or 0)
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """
+    Local CPU transcription with a CTranslate2 Whisper model (faster-whisper), no network needed.
+
+    Whisper does not diarize: every utterance is attributed to speaker A.
+    The model is loaded once and shared by the threads of the pipeline
+    (`num_workers` transcriptions can run in parallel, each using `cpu_threads` threads).
+    """
+
+    name = "faster_whisper"
+
+    def __init__(
+        self,
+        model: str = "small",
+        device: str = "cpu",
+        compute_type: str = "int8",
+        cpu_threads: int = 4,
+        num_workers: int = 1,
+        beam_size: int = 5,
+    ):
+        """
+        Args:
+            model: Model size (tiny, base, small, medium, large-v3...) or path to a converted model
+            device: cpu or cuda
+            compute_type: Quantization (int8, int8_float16, float16, float32)
+            cpu_threads: Threads used by one transcription
+            num_workers: Transcriptions that can run at the same time
+
+        Raises:
+            ImportError: If faster-whisper is not installed
+        """
+        super().__init__()
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise ImportError(
+                "The faster_whisper transcription backend requires faster-whisper. "
+                "Install it with: pip install faster-whisper"
+            )
+        self.beam_size = beam_size
+        self.model = WhisperModel(
+            model,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            num_workers=num_workers,
+        )
+
+    def _transcribe(self, audio_file_path, language_code, word_boost):
+        segments, info = self.model.transcribe(
+            audio_file_path,
+            language=language_code,
+            beam_size=self.beam_size,
+            # the boosted words guide the spelling of the model
+            initial_prompt=", ".join(word_boost) if word_boost else None,
+            vad_filter=True,
+        )
+        utterances = [
+            Utterance(speaker="A", start=segment.start * 1000, end=segment.end * 1000, text=segment.text.strip())
+            for segment in segments
+        ]
+        return utterances, float(info.duration)
+
+
+BACKENDS = {
+    AssemblyAIBackend.name: AssemblyAIBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+}
+
+_backends: Dict[str, TranscriptionBackend] = {}
+_backends_lock = threading.Lock()
+
+def get_backend(settings: Optional[dict] = None) -> TranscriptionBackend:
+    """
+    Get the transcription backend described by the `transcription` config section.
+    Backends are created once per settings, so local models are only loaded once.
+
+    Args:
+        settings: `transcription` config section, e.g.
+            {"backend": "faster_whisper", "local": {"model": "small", "compute_type": "int8", "cpu_threads": 4}}
+
+    Returns:
+        TranscriptionBackend: The backend
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    settings = settings or {}
+    backend_name = settings.get('backend', AssemblyAIBackend.name)
+    if backend_name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {backend_name} (expected one of {list(BACKENDS)})")
+    options = settings.get('local', {}) if backend_name == FasterWhisperBackend.name else settings.get(backend_name, {})
+
+    key = json.dumps([backend_name, options], sort_keys=True)
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = BACKENDS[backend_name](**options)
+        return _backends[key]